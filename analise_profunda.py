@@ -1,26 +1,88 @@
 import os
+import re
+import time
+import threading
 import pandas as pd
 import json
 import glob
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple, Callable, Union
 import requests
-from rich.console import Console
+from requests.adapters import HTTPAdapter
+from rich.console import Console, Group
 from rich.panel import Panel
 from rich.prompt import Prompt
 from rich.table import Table
+from rich.live import Live
+from rich.text import Text
 from rich import print as rprint
+from contextlib import contextmanager
+from cache_respostas import CacheRespostas
+from compactacao_prompt import (ConstrutorPrompt, estimar_tokens, carregar_resultados_estruturados,
+                                colunas_relevantes)
+from perfil_dados import perfilar_csv, perfilar_dataframe, formatar_perfil
+from discoveryspark import analisar_argumentos
 
 class DeepSeekAPIClient:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, max_concorrencia: int = 4, cache: Optional[CacheRespostas] = None,
+                 offline: bool = False, stream: bool = False):
         self.api_key = api_key
         self.base_url = "https://api.deepseek.com/v1"
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
+        self.max_concorrencia = max(1, max_concorrencia)
+        self.temperature = 0.7
+        
+        # Cache de respostas em disco (None desativa). No modo offline nenhuma chamada de rede
+        # é feita: respostas vêm do cache ou do fallback determinístico.
+        self.cache = cache
+        self.offline = offline
+        
+        # Streaming (SSE): a resposta chega em trechos, repassados ao callback `ao_receber`
+        self.stream = stream
+        
+        # Métricas por chamada (prompt, latência, tokens); origem/uso por thread
+        self.metricas: List[Dict[str, Any]] = []
+        self._lock_metricas = threading.Lock()
+        self._local = threading.local()
+        
+        # Sessão persistente: reaproveita conexões TCP/TLS (keep-alive) entre chamadas.
+        # O pool comporta uma conexão por chamada concorrente.
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concorrencia)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
     
-    def chat_completion(self, messages: List[Dict[str, str]], model: str = "deepseek-reasoner") -> str:
+    def chat_completion(self, messages: List[Dict[str, str]], model: str = "deepseek-reasoner",
+                        ao_receber: Optional[Callable[[str, bool], None]] = None,
+                        rotulo: Optional[str] = None) -> str:
+        """Executa a chamada e registra tamanho do prompt, latência e tokens em `self.metricas`."""
+        self._local.origem = "api"
+        self._local.uso = None
+        inicio = time.perf_counter()
+        resposta = self._chat_completion(messages, model, ao_receber)
+        latencia = time.perf_counter() - inicio
+        
+        caracteres_prompt = sum(len(m.get("content", "")) for m in messages)
+        uso = self._local.uso or {}
+        with self._lock_metricas:
+            self.metricas.append({
+                "rotulo": rotulo or "chamada",
+                "origem": self._local.origem,
+                "caracteres_prompt": caracteres_prompt,
+                "tokens_prompt_estimados": estimar_tokens("".join(m.get("content", "") for m in messages)),
+                "tokens_prompt": uso.get("prompt_tokens"),
+                "tokens_resposta": uso.get("completion_tokens"),
+                "latencia_s": latencia
+            })
+        return resposta
+    
+    def _chat_completion(self, messages: List[Dict[str, str]], model: str,
+                         ao_receber: Optional[Callable[[str, bool], None]]) -> str:
         url = f"{self.base_url}/chat/completions"
         
         # Configurar timeout baseado no modelo
@@ -29,37 +91,152 @@ class DeepSeekAPIClient:
         else:
             timeout_config = (30, 120)  # connect timeout 30s, read timeout 120s
         
+        chave_cache = None
+        if self.cache is not None:
+            chave_cache = CacheRespostas.gerar_chave(model, messages, self.temperature)
+            resposta_cache = self.cache.obter(chave_cache)
+            if resposta_cache is not None:
+                self._local.origem = "cache"
+                if ao_receber is not None:
+                    ao_receber(resposta_cache, False)
+                return resposta_cache
+        
+        if self.offline:
+            self._local.origem = "offline"
+            return self._gerar_resposta_fallback(messages)
+        
         payload = {
             "model": model,
             "messages": messages,
-            "temperature": 0.7,
+            "temperature": self.temperature,
             "max_tokens": 2000
         }
         
+        if self.stream:
+            return self._chat_completion_stream(url, payload, timeout_config, chave_cache, ao_receber)
+        
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                response = requests.post(url, headers=self.headers, json=payload, timeout=timeout_config)
+                response = self.session.post(url, json=payload, timeout=timeout_config)
                 response.raise_for_status()
                 result = response.json()
-                return result["choices"][0]["message"]["content"]
+                conteudo = result["choices"][0]["message"]["content"]
+                self._local.uso = result.get("usage")
+                # Apenas respostas válidas da API vão para o cache (nunca os fallbacks)
+                if chave_cache is not None:
+                    self.cache.gravar(chave_cache, model, conteudo)
+                return conteudo
             except requests.exceptions.Timeout:
                 if attempt < max_retries - 1:
                     wait_time = 2 ** attempt  # backoff exponencial: 1, 2, 4 segundos
-                    import time
                     time.sleep(wait_time)
                     continue
+                self._local.origem = "fallback"
                 return f"Timeout após {max_retries} tentativas. O modelo '{model}' pode estar muito lento ou a conexão está instável.\n\n{self._gerar_resposta_fallback(messages)}"
             except requests.exceptions.RequestException as e:
                 if attempt < max_retries - 1:
                     wait_time = 2 ** attempt
-                    import time
                     time.sleep(wait_time)
                     continue
+                self._local.origem = "fallback"
                 return f"Erro na comunicação com a API após {max_retries} tentativas: {str(e)}\n\n{self._gerar_resposta_fallback(messages)}"
             except (KeyError, IndexError) as e:
+                self._local.origem = "fallback"
                 return f"Erro ao processar resposta da API: {str(e)}\n\n{self._gerar_resposta_fallback(messages)}"
     
+    def _chat_completion_stream(self, url: str, payload: Dict[str, Any], timeout_config: Tuple[int, int],
+                                chave_cache: Optional[str],
+                                ao_receber: Optional[Callable[[str, bool], None]]) -> str:
+        """
+        Consome a resposta em server-sent events, repassando cada trecho a `ao_receber`.
+        O texto parcial sobrevive a quedas de conexão: a nova tentativa pede à API
+        apenas a continuação do que já foi recebido, em vez de reenviar do zero.
+        """
+        messages = payload["messages"]
+        partes: List[str] = []
+        max_retries = 3
+        for attempt in range(max_retries):
+            parcial = "".join(partes)
+            mensagens_tentativa = messages
+            if parcial:
+                mensagens_tentativa = messages + [
+                    {"role": "assistant", "content": parcial},
+                    {"role": "user", "content": "A resposta anterior foi interrompida. Continue exatamente de onde parou, sem repetir nada do texto já escrito."}
+                ]
+            try:
+                corpo = {**payload, "messages": mensagens_tentativa, "stream": True,
+                         "stream_options": {"include_usage": True}}
+                with self.session.post(url, json=corpo, timeout=timeout_config, stream=True) as response:
+                    response.raise_for_status()
+                    for linha in response.iter_lines(decode_unicode=True):
+                        if not linha or not linha.startswith("data:"):
+                            continue
+                        dado = linha[len("data:"):].strip()
+                        if dado == "[DONE]":
+                            break
+                        evento = json.loads(dado)
+                        if evento.get("usage"):
+                            self._local.uso = evento["usage"]
+                        if not evento.get("choices"):
+                            continue
+                        delta = evento["choices"][0].get("delta", {})
+                        if delta.get("reasoning_content") and ao_receber is not None:
+                            ao_receber(delta["reasoning_content"], True)
+                        if delta.get("content"):
+                            partes.append(delta["content"])
+                            if ao_receber is not None:
+                                ao_receber(delta["content"], False)
+                conteudo = "".join(partes)
+                if chave_cache is not None:
+                    self.cache.gravar(chave_cache, payload["model"], conteudo)
+                return conteudo
+            except (requests.exceptions.RequestException, ValueError, KeyError, IndexError) as e:
+                if attempt < max_retries - 1:
+                    time.sleep(2 ** attempt)
+                    continue
+                parcial = "".join(partes)
+                self._local.origem = "fallback"
+                if parcial:
+                    aviso = f"\n\n[Resposta interrompida após {max_retries} tentativas: {str(e)}]"
+                    if ao_receber is not None:
+                        ao_receber(aviso, False)
+                    return parcial + aviso
+                return f"Erro na comunicação com a API após {max_retries} tentativas: {str(e)}\n\n{self._gerar_resposta_fallback(messages)}"
+    
+    def chat_completion_concorrente(self, lista_mensagens: List[List[Dict[str, str]]],
+                                    rotulos: Optional[List[str]] = None,
+                                    ao_receber: Optional[Callable[[str, bool, Optional[str]], None]] = None) -> List[str]:
+        """
+        Executa prompts independentes em paralelo (limitado por max_concorrencia), preservando a ordem.
+        Com streaming, `ao_receber(texto, eh_raciocinio, rotulo)` recebe os trechos de todas as chamadas,
+        identificados pelo rótulo de cada uma.
+        """
+        rotulos = rotulos or [None] * len(lista_mensagens)
+        
+        def chamar(par):
+            mensagens, rotulo = par
+            receber = None
+            if ao_receber is not None:
+                receber = lambda texto, eh_raciocinio: ao_receber(texto, eh_raciocinio, rotulo)
+            return self.chat_completion(mensagens, ao_receber=receber, rotulo=rotulo)
+        
+        if len(lista_mensagens) <= 1 or self.max_concorrencia == 1:
+            return [chamar(par) for par in zip(lista_mensagens, rotulos)]
+        with ThreadPoolExecutor(max_workers=min(self.max_concorrencia, len(lista_mensagens))) as executor:
+            return list(executor.map(chamar, zip(lista_mensagens, rotulos)))
+    
+    def fechar(self):
+        """Encerra as conexões do pool."""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.fechar()
+        return False
+    
     def _gerar_resposta_fallback(self, messages: List[Dict[str, str]]) -> str:
         user_content = messages[-1]["content"] if messages else ""
         
@@ -136,19 +313,77 @@ FASE 4 (91-180 dias): Consolidação e melhoria contínua
 """
 
 class SeniorAnalisadorInsights:
-    def __init__(self, api_client: DeepSeekAPIClient):
+    def __init__(self, api_client: DeepSeekAPIClient, orcamento_tokens: int = 6000):
         self.api_client = api_client
         self.nome = "Senior Analisador de Insights e Tendências"
         self.expertise = "Análise de dados, identificação de padrões, insights de negócio, tendências de mercado"
+        self.construtor = ConstrutorPrompt(orcamento_tokens)
     
-    def analisar_arquivos(self, md_content: str, csv_data: pd.DataFrame) -> Dict[str, Any]:
-        csv_summary = self._resumir_csv(csv_data)
+    def analisar_arquivos(self, md_content: str, csv_data: Union[pd.DataFrame, str],
+                          ao_receber: Optional[Callable[..., None]] = None,
+                          resultados: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        `csv_data` pode ser o caminho do CSV (lido só nas colunas dos targets e drivers, com amostra de linhas se for grande)
+        ou um DataFrame já carregado. `resultados` são os dados estruturados da execução
+        (result_*.json); sem eles, o prompt é compactado a partir do próprio Markdown.
+        Com vários targets, `ao_receber` recebe também o rótulo da chamada (ver chat_completion_concorrente).
+        """
+        csv_summary = self._resumir_csv(csv_data, resultados)
+        
+        # O resumo do CSV sai do orçamento; o restante vai para o relatório compactado
+        orcamento_relatorio = max(self.construtor.orcamento_tokens - estimar_tokens(csv_summary), 500)
+        relatorios = self._preparar_relatorios(md_content, resultados, orcamento_relatorio)
+        
+        if len(relatorios) > 1:
+            # Relatórios com múltiplos targets: uma análise por target, executadas em paralelo
+            alvos = list(relatorios.keys())
+            lista_mensagens = [self._montar_mensagens(relatorios[alvo], csv_summary, foco=alvo) for alvo in alvos]
+            respostas = self.api_client.chat_completion_concorrente(
+                lista_mensagens, rotulos=[f"Analisador ({alvo})" for alvo in alvos], ao_receber=ao_receber
+            )
+            por_target = dict(zip(alvos, respostas))
+            analise = "\n\n".join(
+                f"=== ANÁLISE DO TARGET: {alvo} ===\n{resposta}" for alvo, resposta in por_target.items()
+            )
+        else:
+            por_target = {}
+            analise = self.api_client.chat_completion(self._montar_mensagens(relatorios[None], csv_summary),
+                                                      ao_receber=ao_receber, rotulo="Analisador")
         
+        return {
+            "analista": self.nome,
+            "timestamp": datetime.now().isoformat(),
+            "analise_completa": analise,
+            "analise_por_target": por_target,
+            "resumo_csv": csv_summary
+        }
+    
+    def _preparar_relatorios(self, md_content: str, resultados: Optional[Dict[str, Any]],
+                             orcamento: int) -> Dict[Optional[str], str]:
+        """Conteúdo compactado do relatório: {target: texto} para múltiplos targets ou {None: texto}."""
+        if resultados and resultados.get('individual'):
+            alvos = list(resultados['individual'].keys())
+            focos = alvos if len(alvos) > 1 else [None]
+            return {
+                foco: self.construtor.compactar(self.construtor.secoes_de_resultados(resultados, foco), orcamento)
+                for foco in focos
+            }
+        
+        contexto, secoes_target = self._separar_secoes_por_target(md_content)
+        if len(secoes_target) > 1:
+            return {
+                alvo: self.construtor.compactar(self.construtor.secoes_de_markdown(contexto + "\n" + secao), orcamento)
+                for alvo, secao in secoes_target.items()
+            }
+        return {None: self.construtor.compactar(self.construtor.secoes_de_markdown(md_content), orcamento)}
+    
+    def _montar_mensagens(self, md_content: str, csv_summary: str, foco: Optional[str] = None) -> List[Dict[str, str]]:
+        foco_txt = f"\n        FOCO DESTA ANÁLISE: target '{foco}'\n" if foco else ""
         prompt = f"""
         Você é um {self.nome} com expertise em {self.expertise}.
         
         ANALISE OS SEGUINTES DADOS:
-        
+        {foco_txt}
         1. RELATÓRIO DE INSIGHTS (formato markdown):
         {md_content}
         
@@ -183,32 +418,38 @@ class SeniorAnalisadorInsights:
             {"role": "user", "content": prompt}
         ]
         
-        analise = self.api_client.chat_completion(messages)
-        
-        return {
-            "analista": self.nome,
-            "timestamp": datetime.now().isoformat(),
-            "analise_completa": analise,
-            "resumo_csv": csv_summary
-        }
+        return messages
     
-    def _resumir_csv(self, df: pd.DataFrame) -> str:
-        summary = []
-        summary.append(f"Total de registros: {len(df)}")
-        summary.append(f"Colunas disponíveis: {', '.join(df.columns.tolist())}")
-        
-        if 'churn' in df.columns:
-            churn_stats = df['churn'].value_counts()
-            summary.append(f"Distribuição de churn: {churn_stats.to_dict()}")
-            summary.append(f"Taxa de churn: {(churn_stats.get(1, 0) / len(df) * 100):.2f}%")
-        
-        numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns
-        if len(numeric_cols) > 0:
-            summary.append(f"Colunas numéricas: {len(numeric_cols)}")
-            for col in numeric_cols[:5]:
-                summary.append(f"  {col}: média={df[col].mean():.2f}, std={df[col].std():.2f}")
-        
-        return "\n".join(summary)
+    def _separar_secoes_por_target(self, md_content: str) -> Tuple[str, Dict[str, str]]:
+        """Separa as seções '## 🎯 Análise Individual para: <target>' do restante (contexto comum) do relatório."""
+        padrao = re.compile(r"^## 🎯 Análise Individual para: (\S+)", re.MULTILINE)
+        marcos = list(padrao.finditer(md_content))
+        if not marcos:
+            return md_content, {}
+        
+        secoes = {}
+        partes_contexto = [md_content[:marcos[0].start()]]
+        for i, marco in enumerate(marcos):
+            fim = marcos[i + 1].start() if i + 1 < len(marcos) else len(md_content)
+            bloco = md_content[marco.start():fim]
+            # O rodapé (após o último '---') volta para o contexto comum
+            proximo_titulo = re.search(r"^(## (?!🎯)|\n--- )", bloco[3:], re.MULTILINE)
+            if proximo_titulo:
+                corte = proximo_titulo.start() + 3
+                partes_contexto.append(bloco[corte:])
+                bloco = bloco[:corte]
+            secoes[marco.group(1)] = bloco
+        return "".join(partes_contexto), secoes
+    
+    def _resumir_csv(self, csv_data: Union[pd.DataFrame, str], resultados: Optional[Dict[str, Any]] = None) -> str:
+        """Perfil vetorizado de todas as colunas numéricas, resumido nas mais informativas da execução."""
+        drivers = colunas_relevantes(resultados)
+        alvos = list((resultados or {}).get('individual', {}).keys()) or ['churn']
+        if isinstance(csv_data, str):
+            perfil = perfilar_csv(csv_data, alvos, drivers)
+        else:
+            perfil = perfilar_dataframe(csv_data, alvos, drivers)
+        return formatar_perfil(perfil, drivers)
 
 class SeniorEstrategista:
     def __init__(self, api_client: DeepSeekAPIClient):
@@ -216,12 +457,40 @@ class SeniorEstrategista:
         self.nome = "Senior Estrategista de Negócios"
         self.expertise = "Estratégia empresarial, tomada de decisão, planejamento tático, implementação de soluções"
     
-    def criar_estrategia(self, analise_insights: Dict[str, Any]) -> Dict[str, Any]:
+    def criar_estrategia(self, analise_insights: Dict[str, Any],
+                         ao_receber: Optional[Callable[..., None]] = None) -> Dict[str, Any]:
+        """
+        Estratégia a partir da análise. Com vários targets, cada um recebe a sua estratégia, em
+        chamadas paralelas (dependem só da análise do próprio target); senão, uma chamada única.
+        """
+        por_target = analise_insights.get('analise_por_target') or {}
+        if len(por_target) > 1:
+            alvos = list(por_target.keys())
+            respostas = self.api_client.chat_completion_concorrente(
+                [self._montar_mensagens(analise_insights, por_target[alvo]) for alvo in alvos],
+                rotulos=[f"Estrategista ({alvo})" for alvo in alvos], ao_receber=ao_receber
+            )
+            estrategia = "\n\n".join(
+                f"=== ESTRATÉGIA DO TARGET: {alvo} ===\n{resposta}" for alvo, resposta in zip(alvos, respostas)
+            )
+        else:
+            estrategia = self.api_client.chat_completion(
+                self._montar_mensagens(analise_insights, analise_insights['analise_completa']),
+                ao_receber=ao_receber, rotulo="Estrategista")
+        
+        return {
+            "estrategista": self.nome,
+            "timestamp": datetime.now().isoformat(),
+            "estrategia_completa": estrategia,
+            "baseado_em": analise_insights['analista']
+        }
+    
+    def _montar_mensagens(self, analise_insights: Dict[str, Any], analise: str) -> List[Dict[str, str]]:
         prompt = f"""
         Você é um {self.nome} com expertise em {self.expertise}.
         
         ANALISE DE INSIGHTS RECEBIDA DO ANALISTA:
-        {analise_insights['analise_completa']}
+        {analise}
         
         DADOS ADICIONAIS:
         Analista: {analise_insights['analista']}
@@ -261,26 +530,21 @@ class SeniorEstrategista:
             {"role": "user", "content": prompt}
         ]
         
-        estrategia = self.api_client.chat_completion(messages)
-        
-        return {
-            "estrategista": self.nome,
-            "timestamp": datetime.now().isoformat(),
-            "estrategia_completa": estrategia,
-            "baseado_em": analise_insights['analista']
-        }
+        return messages
 
 class AnaliseProfunda:
-    def __init__(self, api_key: str, model: str = "deepseek-reasoner"):
+    def __init__(self, api_key: str, model: str = "deepseek-reasoner", max_concorrencia: int = 4,
+                 cache: Optional[CacheRespostas] = None, offline: bool = False, stream: bool = True,
+                 orcamento_tokens: int = 6000):
         # Criar cliente API com modelo personalizado
         class DeepSeekAPIClientPersonalizado(DeepSeekAPIClient):
-            def chat_completion(self, messages: List[Dict[str, str]], model_param: str = None) -> str:
+            def chat_completion(self, messages: List[Dict[str, str]], model_param: str = None, **kwargs) -> str:
                 # Usar o modelo especificado no construtor
                 model_to_use = model if model_param is None else model_param
-                return super().chat_completion(messages, model_to_use)
+                return super().chat_completion(messages, model_to_use, **kwargs)
         
-        self.api_client = DeepSeekAPIClientPersonalizado(api_key)
-        self.analisador = SeniorAnalisadorInsights(self.api_client)
+        self.api_client = DeepSeekAPIClientPersonalizado(api_key, max_concorrencia, cache, offline, stream)
+        self.analisador = SeniorAnalisadorInsights(self.api_client, orcamento_tokens)
         self.estrategista = SeniorEstrategista(self.api_client)
         self.console = Console()
         self.model = model
@@ -350,13 +614,21 @@ class AnaliseProfunda:
             with open(arquivo_md, 'r', encoding='utf-8') as f:
                 md_content = f.read()
             
-            csv_data = pd.read_csv(arquivo_csv)
+            # O CSV não é carregado inteiro aqui: o analisador lê só as colunas relevantes (com amostragem)
+            if not os.path.exists(arquivo_csv):
+                raise FileNotFoundError(arquivo_csv)
+            csv_data = arquivo_csv
             
             return md_content, csv_data, os.path.basename(arquivo_md), os.path.basename(arquivo_csv)
         except Exception as e:
             raise Exception(f"Erro ao carregar arquivos: {str(e)}")
     
     def executar_analise(self, resultados_dir: str = "resultados"):
+        """Fluxo interativo completo; as conexões do cliente são encerradas mesmo em caso de erro."""
+        with self.api_client:
+            self._executar_analise(resultados_dir)
+    
+    def _executar_analise(self, resultados_dir: str):
         self.console.clear()
         self.console.print(Panel.fit(
             "🚀 [bold blue]ANÁLISE PROFUNDA COM IA GENERATIVA[/bold blue]\n[italic]Sistema de análise inteligente com agentes especializados[/italic]",
@@ -375,6 +647,9 @@ class AnaliseProfunda:
             md_content, csv_data, md_nome, csv_nome = self.carregar_arquivos(arquivo_md, arquivo_csv)
             self.console.print(f"   [green]✓[/green] Arquivo de relatório: {md_nome}")
             self.console.print(f"   [green]✓[/green] Arquivo de dados: {csv_nome}")
+            resultados = carregar_resultados_estruturados(arquivo_md)
+            if resultados:
+                self.console.print("   [green]✓[/green] Resultados estruturados encontrados (prompt montado a partir dos rankings)")
         except Exception as e:
             self.console.print(f"[red]❌ Erro ao carregar arquivos: {str(e)}[/red]")
             return
@@ -382,33 +657,118 @@ class AnaliseProfunda:
         self.console.print("\n[bold]3. ANALISANDO DADOS COM AGENTE SENIOR ANALISADOR DE INSIGHTS...[/bold]")
         self.console.print(f"   [dim]Usando modelo: {self.model}[/dim]")
         self.console.print("   [yellow]⏳ Isso pode levar alguns minutos...[/yellow]")
-        analise_result = self.analisador.analisar_arquivos(md_content, csv_data)
+        with self._exibir_stream("Analisador de Insights") as ao_receber:
+            analise_result = self.analisador.analisar_arquivos(md_content, csv_data, ao_receber=ao_receber,
+                                                               resultados=resultados)
         
         self.console.print("\n[bold]4. GERANDO ESTRATÉGIA COM AGENTE SENIOR ESTRATEGISTA...[/bold]")
         self.console.print(f"   [dim]Usando modelo: {self.model}[/dim]")
         self.console.print("   [yellow]⏳ Gerando estratégia...[/yellow]")
-        estrategia_result = self.estrategista.criar_estrategia(analise_result)
+        with self._exibir_stream("Estrategista") as ao_receber:
+            estrategia_result = self.estrategista.criar_estrategia(analise_result, ao_receber=ao_receber)
         
+        # O arquivo de recomendação é aberto antes da consolidação: com streaming, cada trecho
+        # é gravado assim que chega e o texto parcial sobrevive a uma queda de conexão.
         self.console.print("\n[bold]5. CONSOLIDANDO RECOMENDAÇÕES...[/bold]")
-        recomendacoes = self.consolidar_recomendacoes(analise_result, estrategia_result)
-        
-        self.console.print("\n[bold]6. SALVANDO ARQUIVO DE RECOMENDAÇÃO...[/bold]")
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
         arquivo_recomendacao = os.path.join(resultados_dir, f"recomendacao_{timestamp}.txt")
         
         try:
             with open(arquivo_recomendacao, 'w', encoding='utf-8') as f:
-                f.write(recomendacoes)
+                escrito = []
+                
+                def gravar_trecho(texto: str, raciocinio: bool):
+                    if not raciocinio:
+                        f.write(texto)
+                        f.flush()
+                        escrito.append(texto)
+                
+                with self._exibir_stream("Relatório Final", gravar_trecho) as ao_receber:
+                    recomendacoes = self.consolidar_recomendacoes(analise_result, estrategia_result, ao_receber=ao_receber)
+                
+                self.console.print("\n[bold]6. SALVANDO ARQUIVO DE RECOMENDAÇÃO...[/bold]")
+                # Sem streaming (ou em respostas de fallback) o texto ainda não foi gravado
+                ja_escrito = "".join(escrito)
+                if recomendacoes.startswith(ja_escrito):
+                    f.write(recomendacoes[len(ja_escrito):])
+                else:
+                    f.write("\n\n" + recomendacoes)
             self.console.print(f"   [green]✓ Arquivo salvo: {arquivo_recomendacao}[/green]")
         except Exception as e:
             self.console.print(f"[red]❌ Erro ao salvar arquivo: {str(e)}[/red]")
             return
         
+        self.exibir_metricas()
+        
+        if self.api_client.cache is not None:
+            cache = self.api_client.cache
+            self.console.print(f"   [dim]Cache de respostas: {cache.acertos} acerto(s), {cache.falhas} falha(s)[/dim]")
+        
         self.console.print("\n" + "=" * 80)
         self.console.print("[bold green]ANÁLISE CONCLUÍDA COM SUCESSO![/bold green]")
         self.console.print("=" * 80)
     
-    def consolidar_recomendacoes(self, analise_result: Dict[str, Any], estrategia_result: Dict[str, Any]) -> str:
+    def exibir_metricas(self):
+        """Exibe tamanho do prompt, latência e tokens de cada chamada aos agentes."""
+        if not self.api_client.metricas:
+            return
+        tabela = Table(title="📏 Métricas das Chamadas aos Agentes")
+        tabela.add_column("Chamada", style="white")
+        tabela.add_column("Origem", style="cyan")
+        tabela.add_column("Prompt (caracteres)", justify="right")
+        tabela.add_column("Prompt (tokens est.)", justify="right")
+        tabela.add_column("Tokens prompt/resposta (API)", justify="right")
+        tabela.add_column("Latência (s)", style="green", justify="right")
+        for m in self.api_client.metricas:
+            tokens_api = "-"
+            if m["tokens_prompt"] is not None:
+                tokens_api = f"{m['tokens_prompt']}/{m['tokens_resposta']}"
+            tabela.add_row(m["rotulo"], m["origem"], str(m["caracteres_prompt"]),
+                           str(m["tokens_prompt_estimados"]), tokens_api, f"{m['latencia_s']:.2f}")
+        self.console.print(tabela)
+    
+    @contextmanager
+    def _exibir_stream(self, titulo: str, repassar: Optional[Callable[[str, bool], None]] = None):
+        """
+        Renderiza ao vivo (Rich) os trechos recebidos por streaming e devolve o callback a ser usado.
+        O callback aceita um rótulo opcional: chamadas concorrentes (um painel por target) aparecem
+        lado a lado no mesmo Live, cada uma com o seu painel; sem rótulo, o painel é `titulo`.
+        """
+        if not self.api_client.stream:
+            yield repassar
+            return
+        
+        paineis: Dict[str, Dict[str, Any]] = {}
+        lock = threading.Lock()
+        
+        def painel(rotulo: str, estado: Dict[str, Any], max_linhas: int) -> Panel:
+            texto = "".join(estado['conteudo'])
+            ultimas_linhas = "\n".join(texto.splitlines()[-max_linhas:])
+            status = f"🧠 raciocinando... ({estado['raciocinio']} caracteres)" if estado['raciocinio'] and not texto else ""
+            return Panel(Text(ultimas_linhas or status or "⏳ aguardando resposta..."),
+                         title=f"[bold cyan]{rotulo}[/bold cyan]", border_style="cyan")
+        
+        def renderizar():
+            if not paineis:
+                return painel(titulo, {'conteudo': [], 'raciocinio': 0}, 15)
+            max_linhas = max(15 // len(paineis), 4)
+            return Group(*(painel(rotulo, estado, max_linhas) for rotulo, estado in paineis.items()))
+        
+        with Live(renderizar(), console=self.console, refresh_per_second=8, transient=True) as live:
+            def ao_receber(texto: str, eh_raciocinio: bool, rotulo: Optional[str] = None):
+                with lock:
+                    estado = paineis.setdefault(rotulo or titulo, {'conteudo': [], 'raciocinio': 0})
+                    if eh_raciocinio:
+                        estado['raciocinio'] += len(texto)
+                    else:
+                        estado['conteudo'].append(texto)
+                    live.update(renderizar())
+                if repassar is not None and rotulo is None:
+                    repassar(texto, eh_raciocinio)
+            yield ao_receber
+    
+    def consolidar_recomendacoes(self, analise_result: Dict[str, Any], estrategia_result: Dict[str, Any],
+                                 ao_receber: Optional[Callable[[str, bool], None]] = None) -> str:
         prompt = f"""
         Com base na análise de insights e na estratégia desenvolvida, crie um relatório completo e profissional.
         
@@ -450,12 +810,27 @@ class AnaliseProfunda:
             {"role": "user", "content": prompt}
         ]
         
-        return self.api_client.chat_completion(messages)
+        return self.api_client.chat_completion(messages, ao_receber=ao_receber, rotulo="Consolidação")
         print(relatorio['estrategia_completa'])
         
-def main():
+def main(args=None):
+    if args is None:
+        args = analisar_argumentos("deep-analysis")
+    
     console = Console()
     
+    cache = None
+    if not args.no_cache:
+        cache = CacheRespostas(args.cache_dir, args.cache_ttl_horas * 3600, args.cache_max_mb)
+    
+    if args.offline:
+        # Modo offline: não precisa de chave nem de seleção de modelo
+        console.print("[bold yellow]📴 Modo offline: respostas apenas do cache ou de fallback.[/bold yellow]")
+        analise_profunda = AnaliseProfunda("offline", "deepseek-reasoner", args.concorrencia, cache, offline=True,
+                                           stream=not args.no_stream, orcamento_tokens=args.orcamento_tokens)
+        analise_profunda.executar_analise()
+        return
+    
     console.print(Panel.fit(
         "[bold cyan]🔐 CONFIGURAÇÃO DA API DEEPSEEK[/bold cyan]\n\n"
         "Para usar o sistema de análise profunda com IA, você precisa de uma chave de API do DeepSeek.\n"
@@ -518,7 +893,8 @@ def main():
         console.print("[bold green]✓ Modelo selecionado: deepseek-chat (análise rápida)[/bold green]")
     
     # Criar instância de AnaliseProfunda com o modelo escolhido
-    analise_profunda = AnaliseProfunda(api_key, modelo)
+    analise_profunda = AnaliseProfunda(api_key, modelo, args.concorrencia, cache, stream=not args.no_stream,
+                                       orcamento_tokens=args.orcamento_tokens)
     
     # Adicionar informação do modelo ao início da execução
     analise_profunda.console.print(f"\n[bold cyan]🔧 Configuração:[/bold cyan] Usando modelo [bold]{modelo}[/bold]")
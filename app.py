@@ -1,23 +1,46 @@
 import os
-import argparse
+import json
 import warnings
 import pandas as pd
 import featuretools as ft
 import numpy as np
+import joblib
 from datetime import datetime
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from sklearn.preprocessing import LabelEncoder
+from instrumentacao import MonitorExecucao
+from fontes_dados import interpretar_fonte, ler_fonte, assinatura_datasets
+from primitivas_rapidas import PRIMITIVAS_AGREGACAO
+from janelas_temporais import agregar_janelas, coluna_data_da_tabela, JANELAS_PADRAO
+from codificacao_categorica import colunas_categoricas, codificar_target_oof, tabela_codificacao, descrever_categorias
+from segmentos import MatrizSegmentada, analisar_segmentos, drivers_comuns, MIN_LINHAS_SEGMENTO
+from redundancia import analisar_redundancia, LIMIAR_PADRAO
+from informacao_mutua import informacao_mutua
+from interacoes import descobrir_interacoes, descrever_padrao, ORCAMENTO_S, FORCA_MINIMA
+from estabilidade import estabilidade_ranking, MODOS_REAMOSTRAGEM
+from checkpoints import ExecucaoCheckpoint, SemCheckpoint, CheckpointInvalido
+from padroes import POLITICAS_TARGETS, MAPEAMENTO_PADRAO
+from discoveryspark import analisar_argumentos, criar_parser
+from deriva_temporal import (FREQUENCIAS, COLUNA_PERIODO, PERIODOS_PADRAO, rotular_periodos, cortes_por_periodo,
+                             matriz_por_cortes, estatisticas_por_periodo, correlacoes_moveis, tabela_deriva)
 
 # Suprime avisos específicos do woodwork e featuretools
 warnings.filterwarnings('ignore', message='Could not infer format')
 warnings.filterwarnings('ignore', message='pkg_resources is deprecated')
 warnings.filterwarnings('ignore', category=FutureWarning, module='featuretools')
+# PercentTrue faz parte do conjunto padrão de agregações, mas raramente há colunas booleanas nas filhas
+warnings.filterwarnings('ignore', message='Some specified primitives were not used during DFS')
 
 # Configuração de interface
 console = Console()
+CONSOLE_SILENCIOSO = Console(quiet=True)
+
+# Etapas perfiladas com cProfile quando --profile é informado
+ESTAGIOS_PERFILADOS = ['carga', 'entityset', 'dfs', 'janelas', 'cortes_periodo', 'estatisticas_periodo',
+                       'analytics', 'redundancia', 'export_markdown', 'export_csv', 'export_modelo']
 
 def formatar_impacto(valor):
     """
@@ -42,28 +65,36 @@ def setup_environment():
         if not os.path.exists(folder):
             os.makedirs(folder)
 
-def parse_mapping_file():
-    """Interpreta a lógica: tabela:pai|id#tabela:filho|id"""
+def parse_mapping_file(caminho=MAPEAMENTO_PADRAO, verbose=True):
+    """
+    Interpreta a lógica: tabela:pai|id#tabela:filho|id
+    Um terceiro campo opcional declara a fonte da tabela (ver fontes_dados.interpretar_fonte):
+    tabela:filho|id|sqlite=dados/dw.db;colunas=valor,data_venda;coluna_data=data_venda;desde=2024-01-01
+    """
+    saida = console if verbose else CONSOLE_SILENCIOSO
     try:
-        with open("mapeamento/mapeamento.txt", "r") as f:
+        with open(caminho, "r") as f:
             line = f.readline().strip()
             if not line: return None
         
         tables_raw = line.split('#')
         parsed = []
         for item in tables_raw:
-            info, keys_raw = item.split('|')
+            info, keys_raw, *fonte_raw = item.split('|', 2)
             name, role = info.split(':')
             keys = keys_raw.split(';')
-            parsed.append({'name': name, 'role': role, 'keys': keys})
+            fonte = interpretar_fonte(fonte_raw[0]) if fonte_raw and fonte_raw[0].strip() else None
+            parsed.append({'name': name, 'role': role, 'keys': keys, 'fonte': fonte})
         return parsed
     except Exception as e:
-        console.print(f"[red]Erro ao ler mapeamento.txt: {e}[/red]")
+        saida.print(f"[red]Erro ao ler mapeamento.txt: {e}[/red]")
         return None
 
 def traduzir_feature(nome_tecnico):
     """Converte termos técnicos do Featuretools para linguagem de negócios."""
     traducoes = {
+        "DAYS_SINCE_LAST": "Dias desde o último registro de",
+        "MODE": "Categoria mais frequente de",
         "SUM": "Soma total de",
         "MEAN": "Média de",
         "COUNT": "Quantidade total de",
@@ -74,7 +105,8 @@ def traduzir_feature(nome_tecnico):
         "MONTH": "Mês do evento",
         "WEEKDAY": "Dia da semana"
     }
-    nome = nome_tecnico
+    # Janelas de tempo: "SUM(vendas.valor, Last 30 Days)"
+    nome = nome_tecnico.replace(", Last ", " nos últimos ").replace(" Days)", " dias)")
     for eng, pt in traducoes.items():
         if eng in nome:
             nome = nome.replace(eng, pt)
@@ -169,113 +201,246 @@ def suggest_appropriate_targets(df):
     
     return suggestions[:5]  # Retorna até 5 sugestões
 
-def run_analytics(df, target):
-    # Primeiro valida os targets
+def run_analytics(df, target, monitor=None, politica=None, por=None, min_linhas_segmento=MIN_LINHAS_SEGMENTO,
+                  janela_periodos=None, pre_filtro_mi=None, orcamento_interacoes=ORCAMENTO_S,
+                  reamostras=None, modo_reamostragem="bootstrap", checkpoint=None, verbose=True):
+    """
+    Executa a análise de relevância e direção para um ou mais targets (separados por vírgula).
+    `politica` define o que fazer com targets sinalizados sem perguntar ao usuário
+    (ver POLITICAS_TARGETS); None mantém a pergunta interativa.
+    `por` (coluna da matriz) repete a análise dentro de cada segmento dessa coluna (tipo "Segmentado").
+    `janela_periodos` ativa a análise de deriva sobre a coluna de período de preparar_matriz_periodos
+    (tipo "Deriva"), com correlações em janelas móveis desse número de períodos.
+    `pre_filtro_mi` treina cada modelo só com as N features de maior informação mútua com o target.
+    `orcamento_interacoes` limita (segundos por target) a busca de interações entre drivers; 0 desativa.
+    `reamostras` (B) mede a estabilidade do Top 10 de cada target em B reamostras (`modo_reamostragem`).
+    Segmentos e períodos não buscam interações nem medem estabilidade.
+    `checkpoint` (ExecucaoCheckpoint) grava a escolha dos targets e o modelo de cada target,
+    de modo que uma execução retomada só treina os targets que faltavam.
+    verbose=False silencia as mensagens sem mexer no console do módulo (ex.: motor.DiscoverySpark).
+    """
+    saida = console if verbose else CONSOLE_SILENCIOSO
+    if monitor is None:
+        monitor = MonitorExecucao(saida, exibir_progresso=False, medir_memoria=False)
+    ck = checkpoint or SemCheckpoint()
+    
+    # Primeiro valida os targets (etapa interativa, sem barra de progresso)
+    with monitor.estagio("validacao_targets", progresso=False):
+        target = ck.etapa("validacao_targets", lambda: _resolver_targets(df, target, politica, verbose))
+    
+    if target is None:
+        return None, "Cancelado"
+
+    if janela_periodos:
+        targets = [t.strip() for t in target.split(',')]
+        return ck.etapa("analise_deriva", lambda: _run_drift_analytics(
+            df, targets, monitor, min_linhas_segmento, janela_periodos, pre_filtro_mi, verbose)), "Deriva"
+    if por:
+        targets = [t.strip() for t in target.split(',')]
+        return ck.etapa("analise_segmentos", lambda: _run_segmented_analytics(
+            df, targets, por, monitor, min_linhas_segmento, pre_filtro_mi=pre_filtro_mi, verbose=verbose)), "Segmentado"
+    
+    # Verifica se target contém múltiplos campos separados por vírgula
+    if ',' in target:
+        targets = [t.strip() for t in target.split(',')]
+        saida.print(f"\n[bold yellow]🔍 Analisando relevância e direção para {len(targets)} targets: {', '.join(targets)}...[/bold yellow]")
+        
+        with monitor.estagio("analytics", total=len(targets) + 1):
+            # Análise individual para cada target
+            all_results = {}
+            for single_target in targets:
+                saida.print(f"\n[cyan]▶️  Analisando individualmente: {single_target}[/cyan]")
+                with monitor.subestagio(single_target):
+                    ranking, tipo, modelo = ck.etapa(f"modelo_{single_target}", lambda: _run_single_analytics(
+                        df, single_target, pre_filtro_mi=pre_filtro_mi, orcamento_interacoes=orcamento_interacoes,
+                        reamostras=reamostras, modo_reamostragem=modo_reamostragem, verbose=verbose))
+                all_results[single_target] = {'ranking': ranking, 'tipo': tipo, 'modelo': modelo,
+                                              'interacoes': modelo.pop('interacoes', []),
+                                              'estabilidade': modelo.pop('estabilidade', None)}
+            
+            # Análise multivariada - interações entre targets
+            saida.print(f"\n[bold magenta]🔗 Analisando interações entre {len(targets)} targets...[/bold magenta]")
+            with monitor.subestagio("multivariada"):
+                multivariate_results = ck.etapa("multivariada", lambda: _run_multivariate_analytics(df, targets, verbose))
+        
+        return {
+            'individual': all_results,
+            'multivariate': multivariate_results
+        }, "Múltiplos"
+    else:
+        # Caso único target (compatibilidade com versão anterior)
+        saida.print(f"\n[bold yellow]🔍 Analisando relevância e direção para: {target}...[/bold yellow]")
+        with monitor.estagio("analytics", total=1):
+            with monitor.subestagio(target):
+                ranking, tipo, modelo = ck.etapa(f"modelo_{target}", lambda: _run_single_analytics(
+                    df, target, pre_filtro_mi=pre_filtro_mi, orcamento_interacoes=orcamento_interacoes,
+                    reamostras=reamostras, modo_reamostragem=modo_reamostragem, verbose=verbose))
+        return {target: {'ranking': ranking, 'tipo': tipo, 'modelo': modelo,
+                         'interacoes': modelo.pop('interacoes', []),
+                         'estabilidade': modelo.pop('estabilidade', None)}}, tipo
+
+def _run_segmented_analytics(df, targets, coluna, monitor, min_linhas, segmentada=None, pre_filtro_mi=None,
+                             verbose=True):
+    """Ranking de cada target dentro de cada segmento de `coluna`, com os segmentos em paralelo."""
+    saida = console if verbose else CONSOLE_SILENCIOSO
+    if segmentada is None:
+        segmentada = MatrizSegmentada(df, coluna, min_linhas)
+    saida.print(f"\n[bold yellow]🔍 Analisando {len(targets)} target(s) em {len(segmentada.fatias)} segmentos "
+                  f"de '{coluna}'...[/bold yellow]")
+    if segmentada.ignorados:
+        saida.print(f"[yellow]⚠️  {len(segmentada.ignorados)} segmento(s) com menos de {min_linhas} linhas "
+                      f"ignorado(s): {', '.join(map(str, segmentada.ignorados))}[/yellow]")
+
+    with monitor.estagio("analytics", total=len(segmentada.fatias) * len(targets)) as etapa:
+        # A saída detalhada de cada segmento se misturaria entre as threads: fica desligada no pool
+        resultado = analisar_segmentos(
+            segmentada, targets,
+            lambda df_segmento, t: _run_single_analytics(df_segmento, t, verbose=False, pre_filtro_mi=pre_filtro_mi),
+            ao_concluir=lambda valor, t: etapa.avancar(descricao=f"analytics ({valor}: {t})"))
+
+    for valor, erros in resultado['erros'].items():
+        for t, erro in erros.items():
+            saida.print(f"[yellow]⚠️  Segmento {valor} / {t} não analisado: {erro}[/yellow]")
+    return resultado
+
+def _run_drift_analytics(df, targets, monitor, min_linhas, janela, pre_filtro_mi=None, verbose=True):
+    """
+    Deriva dos drivers entre períodos:
+    - Correlações com cada target em janelas móveis de `janela` períodos, a partir das estatísticas
+      suficientes de cada período (somadas, não recalculadas, nas janelas que se sobrepõem)
+    - Ranking de importância de cada período, com os períodos em paralelo
+    - Tabela de mudanças de posição dos principais drivers
+    """
+    segmentada = MatrizSegmentada(df, COLUNA_PERIODO, min_linhas)
+    periodos = list(segmentada.fatias)
+    if not periodos:
+        raise ValueError(f"Nenhum período com pelo menos {min_linhas} linhas")
+    colunas = [c for c in df.select_dtypes(include=['number', 'bool']).columns if c not in targets]
+
+    correlacoes = {}
+    with monitor.estagio("estatisticas_periodo", total=len(targets)) as etapa:
+        for t in targets:
+            stats = estatisticas_por_periodo(segmentada, t, colunas)
+            correlacoes[t] = correlacoes_moveis(stats, periodos, colunas, janela)
+            etapa.avancar()
+
+    resultado = _run_segmented_analytics(df, targets, COLUNA_PERIODO, monitor, min_linhas, segmentada, pre_filtro_mi,
+                                         verbose)
+    resultado['janela_periodos'] = janela
+    resultado['correlacoes'] = correlacoes
+    resultado['deriva'] = {t: tabela_deriva(resultado, t, correlacoes=correlacoes[t]) for t in targets}
+    return resultado
+
+def _aplicar_politica(target, suggestions, politica, verbose=True):
+    """Decide sem input() o que fazer com targets sinalizados. Retorna None se a análise deve ser cancelada."""
+    saida = console if verbose else CONSOLE_SILENCIOSO
+    if politica == 'cancelar':
+        saida.print("[red]❌ Análise cancelada (política: cancelar).[/red]")
+        return None
+    if politica == 'sugeridos' and suggestions:
+        new_targets = [s['coluna'] for s in suggestions]
+        saida.print(f"[green]✓ Usando todos os targets sugeridos (política): {', '.join(new_targets)}[/green]")
+        return ','.join(new_targets)
+    saida.print(f"[yellow]⚠️  Continuando com targets informados (política: {politica}): {target}[/yellow]")
+    return target
+
+def _resolver_targets(df, target, politica=None, verbose=True):
+    """Valida os targets e, se necessário, pergunta ao usuário como prosseguir. Retorna None se cancelado."""
+    saida = console if verbose else CONSOLE_SILENCIOSO
     appropriate_targets, inappropriate_targets = validate_targets(df, target)
     
     if inappropriate_targets:
-        console.print(f"\n[bold yellow]⚠️  Atenção: Alguns targets podem não ser apropriados para análise:[/bold yellow]")
+        saida.print(f"\n[bold yellow]⚠️  Atenção: Alguns targets podem não ser apropriados para análise:[/bold yellow]")
         for t in inappropriate_targets:
-            console.print(f"  • {t}")
+            saida.print(f"  • {t}")
         
         # Sugere targets apropriados
         suggestions = suggest_appropriate_targets(df)
         
         if suggestions:
-            console.print(f"\n[bold cyan]💡 Sugestões de targets apropriados:[/bold cyan]")
+            saida.print(f"\n[bold cyan]💡 Sugestões de targets apropriados:[/bold cyan]")
             for i, s in enumerate(suggestions, 1):
-                console.print(f"  {i}. {s['coluna']} ({s['tipo']}) - {s['razao']}")
+                saida.print(f"  {i}. {s['coluna']} ({s['tipo']}) - {s['razao']}")
+        
+        if politica is not None:
+            return _aplicar_politica(target, suggestions, politica, verbose)
         
         # Oferece opções interativas ao usuário
-        console.print(f"\n[bold]📋 Opções disponíveis:[/bold]")
-        console.print(f"[cyan]1.[/cyan] Continuar com os targets informados (apesar da advertência)")
+        saida.print(f"\n[bold]📋 Opções disponíveis:[/bold]")
+        saida.print(f"[cyan]1.[/cyan] Continuar com os targets informados (apesar da advertência)")
         
         if suggestions:
             # Cria opções para cada sugestão
             for i, s in enumerate(suggestions, 2):
-                console.print(f"[cyan]{i}.[/cyan] Usar target: [bold]{s['coluna']}[/bold] ({s['tipo']})")
+                saida.print(f"[cyan]{i}.[/cyan] Usar target: [bold]{s['coluna']}[/bold] ({s['tipo']})")
             
             # Opção para usar todas as sugestões
             last_option = len(suggestions) + 2
-            console.print(f"[cyan]{last_option}.[/cyan] Usar todos os targets sugeridos")
-            console.print(f"[cyan]{last_option + 1}.[/cyan] Cancelar análise")
+            saida.print(f"[cyan]{last_option}.[/cyan] Usar todos os targets sugeridos")
+            saida.print(f"[cyan]{last_option + 1}.[/cyan] Cancelar análise")
             
-            console.print(f"\n[bold]Escolha uma opção (1-{last_option + 1}):[/bold] ", end="")
+            saida.print(f"\n[bold]Escolha uma opção (1-{last_option + 1}):[/bold] ", end="")
             
             try:
                 choice = input().strip()
                 if choice == str(last_option + 1):  # Cancelar
-                    console.print("[red]❌ Análise cancelada pelo usuário.[/red]")
-                    return None, "Cancelado"
+                    saida.print("[red]❌ Análise cancelada pelo usuário.[/red]")
+                    return None
                 elif choice == str(last_option):  # Usar todos os targets sugeridos
                     new_targets = [s['coluna'] for s in suggestions]
-                    console.print(f"[green]✓ Usando todos os targets sugeridos: {', '.join(new_targets)}[/green]")
+                    saida.print(f"[green]✓ Usando todos os targets sugeridos: {', '.join(new_targets)}[/green]")
                     target = ','.join(new_targets)
                 elif choice.isdigit() and 2 <= int(choice) <= last_option - 1:  # Usar uma sugestão específica
                     idx = int(choice) - 2
                     new_target = suggestions[idx]['coluna']
-                    console.print(f"[green]✓ Usando target sugerido: {new_target}[/green]")
+                    saida.print(f"[green]✓ Usando target sugerido: {new_target}[/green]")
                     target = new_target
                 elif choice == "1":  # Continuar com targets informados
-                    console.print(f"[yellow]⚠️  Continuando com targets informados: {target}[/yellow]")
+                    saida.print(f"[yellow]⚠️  Continuando com targets informados: {target}[/yellow]")
                 else:
-                    console.print(f"[yellow]⚠️  Opção inválida. Continuando com targets informados: {target}[/yellow]")
+                    saida.print(f"[yellow]⚠️  Opção inválida. Continuando com targets informados: {target}[/yellow]")
             except KeyboardInterrupt:
-                console.print("[red]❌ Análise cancelada pelo usuário.[/red]")
-                return None, "Cancelado"
+                saida.print("[red]❌ Análise cancelada pelo usuário.[/red]")
+                return None
             except Exception as e:
-                console.print(f"[yellow]⚠️  Erro na seleção: {e}. Continuando com targets informados: {target}[/yellow]")
+                saida.print(f"[yellow]⚠️  Erro na seleção: {e}. Continuando com targets informados: {target}[/yellow]")
         else:
-            console.print(f"[cyan]2.[/cyan] Cancelar análise")
-            console.print(f"\n[bold]Escolha uma opção (1-2):[/bold] ", end="")
+            saida.print(f"[cyan]2.[/cyan] Cancelar análise")
+            saida.print(f"\n[bold]Escolha uma opção (1-2):[/bold] ", end="")
             
             try:
                 choice = input().strip()
                 if choice == "2":
-                    console.print("[red]❌ Análise cancelada pelo usuário.[/red]")
-                    return None, "Cancelado"
+                    saida.print("[red]❌ Análise cancelada pelo usuário.[/red]")
+                    return None
                 elif choice != "1":
-                    console.print(f"[yellow]⚠️  Opção inválida. Continuando com targets informados: {target}[/yellow]")
+                    saida.print(f"[yellow]⚠️  Opção inválida. Continuando com targets informados: {target}[/yellow]")
             except KeyboardInterrupt:
-                console.print("[red]❌ Análise cancelada pelo usuário.[/red]")
-                return None, "Cancelado"
+                saida.print("[red]❌ Análise cancelada pelo usuário.[/red]")
+                return None
             except Exception as e:
-                console.print(f"[yellow]⚠️  Erro na seleção: {e}. Continuando com targets informados: {target}[/yellow]")
+                saida.print(f"[yellow]⚠️  Erro na seleção: {e}. Continuando com targets informados: {target}[/yellow]")
     
-    # Verifica se target contém múltiplos campos separados por vírgula
-    if ',' in target:
-        targets = [t.strip() for t in target.split(',')]
-        console.print(f"\n[bold yellow]🔍 Analisando relevância e direção para {len(targets)} targets: {', '.join(targets)}...[/bold yellow]")
-        
-        # Análise individual para cada target
-        all_results = {}
-        for single_target in targets:
-            console.print(f"\n[cyan]▶️  Analisando individualmente: {single_target}[/cyan]")
-            ranking, tipo = _run_single_analytics(df, single_target)
-            all_results[single_target] = {'ranking': ranking, 'tipo': tipo}
-        
-        # Análise multivariada - interações entre targets
-        console.print(f"\n[bold magenta]🔗 Analisando interações entre {len(targets)} targets...[/bold magenta]")
-        multivariate_results = _run_multivariate_analytics(df, targets)
-        
-        return {
-            'individual': all_results,
-            'multivariate': multivariate_results
-        }, "Múltiplos"
-    else:
-        # Caso único target (compatibilidade com versão anterior)
-        console.print(f"\n[bold yellow]🔍 Analisando relevância e direção para: {target}...[/bold yellow]")
-        ranking, tipo = _run_single_analytics(df, target)
-        return {target: {'ranking': ranking, 'tipo': tipo}}, tipo
+    return target
 
-def _run_single_analytics(df, target):
-    """Função auxiliar para análise de um único target."""
+def _run_single_analytics(df, target, verbose=True, pre_filtro_mi=None, orcamento_interacoes=None,
+                          reamostras=None, modo_reamostragem="bootstrap"):
+    """
+    Função auxiliar para análise de um único target.
+    Retorna (ranking, tipo, modelo); `modelo` guarda o estimador treinado e o necessário para
+    pontuar entidades novas (colunas, codificação das categóricas e classes do target).
+    verbose=False silencia as mensagens (ex.: vários segmentos analisados em paralelo).
+    `pre_filtro_mi` limita o modelo às N features de maior informação mútua com o target.
+    `orcamento_interacoes` (segundos) ativa a busca de pares de drivers que interagem (modelo['interacoes']).
+    `reamostras` ativa a estabilidade do ranking em B reamostras (modelo['estabilidade']).
+    """
+    saida = console if verbose else CONSOLE_SILENCIOSO
     # 1. Verifica se o target existe no DataFrame original
     if target not in df.columns:
         # Tenta encontrar colunas similares
         similar_cols = [col for col in df.columns if target.lower() in col.lower()]
         if similar_cols:
-            console.print(f"[yellow]⚠️  Target '{target}' não encontrado. Usando coluna similar: {similar_cols[0]}[/yellow]")
+            saida.print(f"[yellow]⚠️  Target '{target}' não encontrado. Usando coluna similar: {similar_cols[0]}[/yellow]")
             target = similar_cols[0]
         else:
             raise ValueError(f"Target '{target}' não encontrado no DataFrame")
@@ -285,28 +450,29 @@ def _run_single_analytics(df, target):
     is_numeric = pd.api.types.is_numeric_dtype(target_dtype)
     is_integer = pd.api.types.is_integer_dtype(target_dtype)
     
-    console.print(f"[cyan]📊 Tipo da coluna '{target}': {target_dtype}[/cyan]")
+    saida.print(f"[cyan]📊 Tipo da coluna '{target}': {target_dtype}[/cyan]")
     
     if is_numeric:
         if is_integer:
-            console.print(f"[green]✓ Coluna '{target}' é numérica (inteiro)[/green]")
+            saida.print(f"[green]✓ Coluna '{target}' é numérica (inteiro)[/green]")
         else:
-            console.print(f"[green]✓ Coluna '{target}' é numérica (decimal)[/green]")
+            saida.print(f"[green]✓ Coluna '{target}' é numérica (decimal)[/green]")
     else:
-        console.print(f"[yellow]⚠️  Coluna '{target}' não é numérica[/yellow]")
-        console.print(f"[cyan]Valores únicos (primeiros 5): {df[target].unique()[:5]}[/cyan]")
-        console.print(f"\n[bold green]� RECOMENDAÇÃO:[/bold green]")
-        console.print(f"Para melhor análise, considere transformar '{target}' em uma coluna numérica:")
-        console.print(f"1. Crie uma nova coluna numérica baseada em '{target}'")
-        console.print(f"2. Use uma coluna já existente que seja numérica")
-        console.print(f"3. Transforme '{target}' em uma coluna numérica usando:")
-        console.print(f"   - Códigos numéricos para categorias")
-        console.print(f"   - Contagens ou frequências")
-        console.print(f"   - Valores binários (0/1)")
-        console.print(f"\n[bold yellow]📝 O programa tentará converter automaticamente para análise...[/bold yellow]")
+        saida.print(f"[yellow]⚠️  Coluna '{target}' não é numérica[/yellow]")
+        saida.print(f"[cyan]Valores únicos (primeiros 5): {df[target].unique()[:5]}[/cyan]")
+        saida.print(f"\n[bold green]� RECOMENDAÇÃO:[/bold green]")
+        saida.print(f"Para melhor análise, considere transformar '{target}' em uma coluna numérica:")
+        saida.print(f"1. Crie uma nova coluna numérica baseada em '{target}'")
+        saida.print(f"2. Use uma coluna já existente que seja numérica")
+        saida.print(f"3. Transforme '{target}' em uma coluna numérica usando:")
+        saida.print(f"   - Códigos numéricos para categorias")
+        saida.print(f"   - Contagens ou frequências")
+        saida.print(f"   - Valores binários (0/1)")
+        saida.print(f"\n[bold yellow]📝 O programa tentará converter automaticamente para análise...[/bold yellow]")
     
     # 3. Cria uma cópia do DataFrame para processamento
     df_ml = df.copy()
+    classes = None
     
     # 4. Garante que o target seja numérico (transforma categóricos)
     if df_ml[target].dtype == 'object' or df_ml[target].dtype == 'string' or df_ml[target].nunique() <= 20:
@@ -326,7 +492,8 @@ def _run_single_analytics(df, target):
         df_ml = df_ml.drop(columns=[target])
         df_ml = df_ml.rename(columns={new_target_name: target})
         
-        console.print(f"[green]✓ Target '{target}' transformado em IDs numéricos ({len(mapping)} categorias)[/green]")
+        classes = {i: val for val, i in mapping.items()}
+        saida.print(f"[green]✓ Target '{target}' transformado em IDs numéricos ({len(mapping)} categorias)[/green]")
     
     # 4. Filtra apenas colunas numéricas para análise (exclui o target da filtragem)
     # Primeiro mantemos o target transformado (cria uma cópia explícita para evitar referências)
@@ -334,6 +501,18 @@ def _run_single_analytics(df, target):
     
     # Depois filtramos as features (todas as outras colunas)
     features_df = df_ml.drop(columns=[target]).select_dtypes(include=['number', 'bool']).copy()
+
+    # Categóricas (ex.: MODE(vendas.categoria)) entram como target encoding fora da dobra, sem one-hot
+    categoricas = colunas_categoricas(df_ml.drop(columns=[target]))
+    codificacao = {}
+    if categoricas:
+        y_codificacao = pd.to_numeric(target_series, errors='coerce').fillna(0)
+        codificadas, info = codificar_target_oof(df_ml[categoricas], y_codificacao, categoricas)
+        codificacao = tabela_codificacao(df_ml[categoricas], y_codificacao, categoricas)
+        features_df = pd.concat([features_df, codificadas], axis=1)
+        saida.print(f"[green]✓ {info['colunas']} variável(is) categórica(s) incluída(s) via target encoding "
+                    f"({info['categorias']} categorias; bloco codificado de {info['bloco_mb']:.1f} MB, "
+                    f"one-hot denso estimado em {info['one_hot_estimado_mb']:.1f} MB)[/green]")
     
     # Recria o DataFrame com features numéricas + target transformado
     df_ml = pd.concat([features_df, target_series], axis=1)
@@ -344,7 +523,14 @@ def _run_single_analytics(df, target):
     X = df_ml.drop(columns=[target])
     y = df_ml[target]
 
-    # 6. Treino do Modelo
+    # 6. Triagem não linear barata (histogramas), antes da floresta: informação mútua com o target
+    informacao = informacao_mutua(X, y, classificacao=y.nunique() <= 20)
+    if pre_filtro_mi and X.shape[1] > pre_filtro_mi:
+        X = X[informacao.nlargest(pre_filtro_mi).index]
+        saida.print(f"[cyan]🔎 Pré-filtro de informação mútua: {X.shape[1]} de {len(informacao)} features "
+                    f"seguem para o modelo[/cyan]")
+
+    # 7. Treino do Modelo
     if y.nunique() <= 2:
         model = RandomForestClassifier(n_estimators=100, random_state=123)
         tipo = "Classificação"
@@ -354,21 +540,71 @@ def _run_single_analytics(df, target):
 
     model.fit(X, y)
 
-    # 7. Cálculo de Importância + Direção usando função segura
+    # 8. Cálculo de Importância + Direção usando função segura
     ranking_data = []
     for i, col in enumerate(X.columns):
-        # Usa função segura para evitar warnings
-        corr = _safe_correlation(X[col], y)
+        # Categóricas codificadas: a correlação com o target é positiva por construção, então a
+        # direção vem das categorias de maior/menor média (coluna Direcao) e a correlação fica NaN
+        if col in codificacao:
+            corr = np.nan
+            direcao = descrever_categorias(codificacao[col])
+        else:
+            # Usa função segura para evitar warnings
+            corr = _safe_correlation(X[col], y)
+            direcao = None
         
         ranking_data.append({
             'Feature': col,
             'Importance': model.feature_importances_[i],
-            'Correlation': corr
+            'Correlation': corr,
+            'MutualInfo': informacao[col],
+            'Direcao': direcao
         })
     
     ranking = pd.DataFrame(ranking_data)
     ranking = ranking.sort_values(by='Importance', ascending=False).head(10)
-    return ranking, tipo
+    modelo = {'estimador': model, 'colunas': list(X.columns), 'codificacao': codificacao,
+              'classes': classes, 'tipo': tipo}
+
+    # 9. Interações entre os principais drivers (co-ocorrência nas árvores + tabelas 2-D)
+    if orcamento_interacoes:
+        interacoes = descobrir_interacoes(model, X, y, model.feature_importances_, orcamento_s=orcamento_interacoes)
+        modelo['interacoes'] = interacoes
+        if interacoes:
+            saida.print(f"[green]✓ {len(interacoes)} interação(ões) significativa(s) entre drivers "
+                        f"({interacoes[0]['verificados']} de {interacoes[0]['candidatos']} pares candidatos testados)[/green]")
+
+    # 10. Estabilidade do ranking: B florestas em reamostras das linhas, em processos paralelos
+    if reamostras:
+        estabilidade = estabilidade_ranking(X, y, tipo == "Classificação", reamostras, modo_reamostragem)
+        estabilidade['posicao_original'] = {f: i for i, f in enumerate(ranking['Feature'], 1)}
+        modelo['estabilidade'] = estabilidade
+        saida.print(f"[green]✓ Estabilidade do ranking: {reamostras} reamostras ({modo_reamostragem}) em "
+                    f"{estabilidade['workers']} processo(s), {estabilidade['duracao_s']:.1f}s[/green]")
+    return ranking, tipo, modelo
+
+def _direcao_categorica(row):
+    """Categorias de maior/menor média de uma categórica codificada (None para features numéricas)."""
+    direcao = getattr(row, 'Direcao', None)
+    return direcao if isinstance(direcao, str) else None
+
+def _seta(row, terminal=False):
+    """Sinal da tendência: pela correlação, ou marcador de categórica (sem direção linear)."""
+    if _direcao_categorica(row):
+        return "🔤" if terminal else "(cat.)"
+    if terminal:
+        return "↗️" if row.Correlation > 0 else "↘️"
+    return "(+)" if row.Correlation > 0 else "(-)"
+
+def _tendencia(row, target_name, terminal=False):
+    """Texto da coluna Tendência do ranking (Markdown ou terminal)."""
+    direcao = _direcao_categorica(row)
+    if direcao:
+        return f"{_seta(row, terminal)} {target_name} {direcao}"
+    relacao = "aumenta" if row.Correlation > 0 else "diminui"
+    if terminal:
+        return f"{_seta(row, terminal)} {relacao} {target_name}"
+    return f"{_seta(row)} Quanto maior, mais {relacao} o(a) {target_name}"
 
 def _safe_correlation(x, y):
     """Cálculo seguro de correlação que evita warnings de divisão por zero."""
@@ -393,8 +629,9 @@ def _safe_correlation(x, y):
     # Garante que não seja NaN
     return 0.0 if pd.isna(correlation) else correlation
 
-def _run_multivariate_analytics(df, targets):
+def _run_multivariate_analytics(df, targets, verbose=True):
     """Análise multivariada - identifica padrões complexos entre múltiplos targets."""
+    saida = console if verbose else CONSOLE_SILENCIOSO
     # 1. Prepara os dados
     df_ml = df.copy()
     
@@ -434,7 +671,7 @@ def _run_multivariate_analytics(df, targets):
             if target in targets_data.columns:
                 std_val = targets_data[target].std()
                 if std_val == 0 or pd.isna(std_val):
-                    console.print(f"[yellow]⚠️  Target '{target}' tem desvio padrão zero, removendo da análise multivariada[/yellow]")
+                    saida.print(f"[yellow]⚠️  Target '{target}' tem desvio padrão zero, removendo da análise multivariada[/yellow]")
                 else:
                     valid_targets.append(target)
         
@@ -456,13 +693,13 @@ def _run_multivariate_analytics(df, targets):
                         full_matrix.loc[t1, t2] = float(correlation_matrix.loc[t1, t2])
                 correlation_matrix = full_matrix
         else:
-            console.print(f"[yellow]⚠️  Não há targets suficientes com variância para análise multivariada[/yellow]")
+            saida.print(f"[yellow]⚠️  Não há targets suficientes com variância para análise multivariada[/yellow]")
             correlation_matrix = pd.DataFrame(0.0, index=targets, columns=targets, dtype=float)
             for i, t in enumerate(targets):
                 correlation_matrix.loc[t, t] = 1.0
                 
     except Exception as e:
-        console.print(f"[yellow]⚠️  Erro ao calcular correlações: {e}[/yellow]")
+        saida.print(f"[yellow]⚠️  Erro ao calcular correlações: {e}[/yellow]")
         # Cria matriz de correlação vazia com tipo float
         correlation_matrix = pd.DataFrame(0.0, index=targets, columns=targets, dtype=float)
         for i, t in enumerate(targets):
@@ -553,8 +790,9 @@ def _analyze_target_interactions(correlation_matrix, targets):
     
     return interactions
 
-def export_to_markdown(results, tipo_ml, projeto, target, ts):
+def export_to_markdown(results, tipo_ml, projeto, target, ts, redundancia=None, verbose=True):
     """Gera um arquivo .md com tratamento robusto de erros e codificação."""
+    saida = console if verbose else CONSOLE_SILENCIOSO
     filename = f"result_{projeto}_{ts}.md"
     filepath = os.path.join("resultados", filename)
     
@@ -564,7 +802,12 @@ def export_to_markdown(results, tipo_ml, projeto, target, ts):
             f.write(f"**Alvos Analisados:** {target} | **Tipo:** {tipo_ml}\n\n")
             
             # Se for análise múltipla, mostra um sumário executivo primeiro
-            if tipo_ml == "Múltiplos":
+            if tipo_ml == "Deriva":
+                _escrever_deriva_markdown(f, results)
+                _escrever_segmentos_markdown(f, results)
+            elif tipo_ml == "Segmentado":
+                _escrever_segmentos_markdown(f, results)
+            elif tipo_ml == "Múltiplos":
                 # Extrai targets da string
                 targets = [t.strip() for t in target.split(',')]
                 
@@ -626,18 +869,18 @@ def export_to_markdown(results, tipo_ml, projeto, target, ts):
                         
                         f.write(f"## 🎯 Análise Individual para: {target_name} ({target_tipo})\n\n")
                         
-                        f.write("| Rank | Insight | Impacto | Tendencia |\n")
-                        f.write("| :--- | :--- | :--- | :--- |\n")
+                        f.write("| Rank | Insight | Impacto | Dependencia (MI) | Tendencia |\n")
+                        f.write("| :--- | :--- | :--- | :--- | :--- |\n")
                         
                         for i, row in enumerate(ranking.itertuples(), 1):
                             traducao = traduzir_feature(row.Feature)
-                            seta = "(+)" if row.Correlation > 0 else "(-)"
-                            relacao = "aumenta" if row.Correlation > 0 else "diminui"
-                            tendencia = f"{seta} Quanto maior, mais {relacao} o(a) {target_name}"
+                            tendencia = _tendencia(row, target_name)
                             
-                            f.write(f"| #{i} | {traducao} | {formatar_impacto(row.Importance)} | {tendencia} |\n")
+                            f.write(f"| #{i} | {traducao} | {formatar_impacto(row.Importance)} | {formatar_impacto(row.MutualInfo)} | {tendencia} |\n")
                         
                         f.write("\n")
+                        _escrever_interacoes_markdown(f, result_data.get('interacoes'), target_name)
+                        _escrever_estabilidade_markdown(f, result_data.get('estabilidade'), target_name)
             else:
                 # Caso único target
                 for target_name, result_data in results.items():
@@ -646,128 +889,317 @@ def export_to_markdown(results, tipo_ml, projeto, target, ts):
                     
                     f.write("## Top 10 Insights e Tendencias\n\n")
                     
-                    f.write("| Rank | Insight | Impacto | Tendencia |\n")
-                    f.write("| :--- | :--- | :--- | :--- |\n")
+                    f.write("| Rank | Insight | Impacto | Dependencia (MI) | Tendencia |\n")
+                    f.write("| :--- | :--- | :--- | :--- | :--- |\n")
                     
                     for i, row in enumerate(ranking.itertuples(), 1):
                         traducao = traduzir_feature(row.Feature)
-                        seta = "(+)" if row.Correlation > 0 else "(-)"
-                        relacao = "aumenta" if row.Correlation > 0 else "diminui"
-                        tendencia = f"{seta} Quanto maior, mais {relacao} o(a) {target_name}"
+                        tendencia = _tendencia(row, target_name)
                         
-                        f.write(f"| #{i} | {traducao} | {formatar_impacto(row.Importance)} | {tendencia} |\n")
+                        f.write(f"| #{i} | {traducao} | {formatar_impacto(row.Importance)} | {formatar_impacto(row.MutualInfo)} | {tendencia} |\n")
                     
                     f.write("\n")
+                    _escrever_interacoes_markdown(f, result_data.get('interacoes'), target_name)
+                    _escrever_estabilidade_markdown(f, result_data.get('estabilidade'), target_name)
             
+            if redundancia:
+                _escrever_redundancia_markdown(f, redundancia)
+
             f.write(f"\n\n--- \n*Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}*")
         return filename
     except Exception as e:
-        console.print(f"[red]Erro ao gravar Markdown: {e}[/red]")
+        saida.print(f"[red]Erro ao gravar Markdown: {e}[/red]")
         return None
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--projeto", required=True)
-    parser.add_argument("--target", required=True)
-    args = parser.parse_args()
+def _escrever_interacoes_markdown(f, interacoes, target_name):
+    """Pares de drivers cujo efeito combinado no target vai além da soma dos efeitos isolados."""
+    if not interacoes:
+        return
+    f.write(f"### 🔀 Interações entre Drivers: {target_name}\n\n")
+    f.write("Força = fração da variância do target explicada pela combinação dos dois drivers além dos "
+            "efeitos isolados (médias por quartil de cada driver). Só entram pares com força de pelo menos "
+            f"{FORCA_MINIMA:.0%} e teste F significativo após a correção de Bonferroni.\n\n")
+    f.write("| Driver A | Driver B | Co-ocorrência nas Árvores | Força | p-valor | Padrão (A/B) |\n")
+    f.write("| :--- | :--- | :--- | :--- | :--- | :--- |\n")
+    for interacao in interacoes:
+        f.write(f"| {traduzir_feature(interacao['Feature1'])} | {traduzir_feature(interacao['Feature2'])} | "
+                f"{interacao['Coocorrencia']:.3f} | {formatar_impacto(interacao['forca'])} | "
+                f"{interacao['p_valor']:.2g} | {descrever_padrao(interacao)} |\n")
+    f.write("\n")
 
-    rules = parse_mapping_file()
-    if not rules: return
+def _escrever_estabilidade_markdown(f, estabilidade, target_name):
+    """Frequência no Top N e faixa de posições de cada feature nas reamostras."""
+    if not estabilidade:
+        return
+    f.write(f"### 🎲 Estabilidade do Ranking: {target_name}\n\n")
+    f.write(f"{estabilidade['reamostras']} florestas em reamostras das linhas ({estabilidade['modo']}). "
+            f"Features com baixa frequência no Top {estabilidade['top']} ou faixa larga de posições "
+            f"podem trocar de lugar entre execuções.\n\n")
+    f.write(f"| Insight | Posição Original | Frequência no Top {estabilidade['top']} | Posição Mediana | Faixa (P5-P95) |\n")
+    f.write("| :--- | :--- | :--- | :--- | :--- |\n")
+    for row in estabilidade['tabela'].itertuples():
+        original = estabilidade['posicao_original'].get(row.Feature)
+        f.write(f"| {traduzir_feature(row.Feature)} | {f'#{original}' if original else '-'} | "
+                f"{row.frequencia_top:.0%} | {row.posicao_mediana:g} | {row.posicao_p05}-{row.posicao_p95} |\n")
+    f.write("\n")
 
-    console.print(Panel(f"🚀 [bold]DiscoverySpark Engine[/bold] v3.0\nProjeto: {args.projeto}", style="blue"))
-    
-    es = ft.EntitySet(id=args.projeto)
-    parent_table = ""
+def _escrever_redundancia_markdown(f, redundancia):
+    """Grupos de features redundantes (|r| >= limiar entre si) e os pares mais correlacionados."""
+    f.write("\n---\n\n## 🧬 Redundância entre Features\n\n")
+    f.write(f"{redundancia['features']} features numéricas; {redundancia['arestas']} pares com "
+            f"|correlação| >= {redundancia['limiar']} (lista de arestas: `{os.path.basename(redundancia['arquivo'])}`).\n\n")
+    if redundancia['grupos']:
+        f.write("### Grupos Redundantes\n\n")
+        f.write("Manter o representante de cada grupo costuma bastar: os demais membros repetem a mesma informação.\n\n")
+        f.write("| Grupo | Representante | Features | Demais membros |\n")
+        f.write("| :--- | :--- | :--- | :--- |\n")
+        for i, grupo in enumerate(redundancia['grupos'][:20], 1):
+            demais = [traduzir_feature(m) for m in grupo['membros'][1:6]]
+            if len(grupo['membros']) > 6:
+                demais.append(f"+{len(grupo['membros']) - 6}")
+            f.write(f"| {i} | {traduzir_feature(grupo['representante'])} | {len(grupo['membros'])} | {', '.join(demais)} |\n")
+        f.write("\n")
+    if redundancia['pares']:
+        f.write("### Pares Mais Correlacionados\n\n")
+        f.write("| Feature 1 | Feature 2 | Correlação |\n")
+        f.write("| :--- | :--- | :--- |\n")
+        for par in redundancia['pares'][:20]:
+            f.write(f"| {traduzir_feature(par['Feature1'])} | {traduzir_feature(par['Feature2'])} | {par['Correlation']:+.3f} |\n")
+        f.write("\n")
 
-    # 1. Carga
-    for r in rules:
-        df = pd.read_csv(f"datasets/{r['name']}.csv")
-        for col in df.columns:
-            if 'data' in col.lower() or 'date' in col.lower():
-                df[col] = pd.to_datetime(df[col], format='%Y-%m-%d %H:%M:%S', errors='coerce')
-        
-        # Featuretools 1.31.0+ requer woodwork obrigatoriamente
-        # Abordagem direta: inicializa woodwork explicitamente
-        
-        # Debug: mostra tipos de dados
-        console.print(f"[yellow]Tipos de dados para {r['name']}:[/yellow]")
-        for col in df.columns:
-            console.print(f"  {col}: {df[col].dtype}")
-        
-        # Converte tipos problemáticos para garantir compatibilidade
-        for col in df.columns:
-            if df[col].dtype == 'object' or df[col].dtype == 'string':
-                df[col] = df[col].astype('str')
-        
-        # Abordagem: cria uma cópia limpa do DataFrame e remove woodwork
-        # O featuretools 1.31.0 requer woodwork, mas podemos trabalhar com cópias limpas
-        df_clean = df.copy()
-        
-        # Remove qualquer atributo woodwork que possa existir
-        if hasattr(df_clean, 'ww'):
-            # Cria um novo DataFrame a partir de um dicionário para evitar woodwork
-            data_dict = {}
-            for col in df_clean.columns:
-                data_dict[col] = df_clean[col].values
-            
-            df_clean = pd.DataFrame(data_dict)
-        
-        console.print(f"[green]✓ DataFrame limpo criado para {r['name']}[/green]")
+def _escrever_deriva_markdown(f, results):
+    """Tabela de deriva: posição de cada driver por período, variação e correlação da última janela."""
+    for target_name, deriva in results['deriva'].items():
+        if deriva.empty:
+            continue
+        periodos = [c for c in deriva.columns if c not in ('variacao', 'correlacao_ultima')]
+        f.write(f"## 📈 Deriva dos Drivers: {target_name}\n\n")
+        f.write(f"Posição no Top 10 de importância de cada período (- = fora do Top 10). "
+                f"Correlação em janela móvel de {results['janela_periodos']} período(s).\n\n")
+        f.write("| Insight | " + " | ".join(periodos) + " | Variação | Correlação |\n")
+        f.write("| :--- | " + " | ".join(":---" for _ in periodos) + " | :--- | :--- |\n")
+        for feature, row in deriva.iterrows():
+            posicoes = " | ".join("-" if pd.isna(row[p]) else f"#{int(row[p])}" for p in periodos)
+            f.write(f"| {traduzir_feature(feature)} | {posicoes} | {_formatar_variacao(row['variacao'])} | "
+                    f"{_formatar_correlacao(row.get('correlacao_ultima'))} |\n")
+        f.write("\n---\n\n")
+
+def _formatar_variacao(variacao):
+    if variacao > 0:
+        return f"▲ {int(variacao)}"
+    if variacao < 0:
+        return f"▼ {int(-variacao)}"
+    return "="
+
+def _formatar_correlacao(correlacao):
+    return "-" if correlacao is None or pd.isna(correlacao) else f"{correlacao:+.3f}"
+
+def _escrever_segmentos_markdown(f, results):
+    """Relatório consolidado da análise por segmento: sumário, drivers comuns e ranking de cada segmento."""
+    coluna = results['coluna']
+    f.write(f"## 🧭 Sumário por Segmento ({coluna})\n\n")
+    f.write(f"{len(results['segmentos'])} segmentos analisados ({results['workers']} worker(s) em paralelo).\n\n")
+    f.write("| Segmento | Linhas | Target | Tipo | Principal Driver | Tendencia |\n")
+    f.write("| :--- | :--- | :--- | :--- | :--- | :--- |\n")
+    for valor, por_target in results['segmentos'].items():
+        for target_name, r in por_target.items():
+            topo = r['ranking'].iloc[0]
+            seta = _seta(topo)
+            f.write(f"| {valor} | {r['linhas']} | {target_name} | {r['tipo']} | "
+                    f"{traduzir_feature(topo['Feature'])} | {seta} |\n")
+    if results['ignorados']:
+        ignorados = ", ".join(f"{v} ({n} linhas)" for v, n in results['ignorados'].items())
+        f.write(f"\n*Segmentos ignorados por terem poucas linhas:* {ignorados}\n")
+    for valor, erros in results['erros'].items():
+        for target_name, erro in erros.items():
+            f.write(f"\n*Segmento {valor} / {target_name} não analisado:* {erro}\n")
+    f.write("\n---\n\n")
+
+    for target_name in results['targets']:
+        comuns = drivers_comuns(results, target_name)
+        if comuns.empty:
+            continue
+        segmentos = [c for c in comuns.columns if c not in ('segmentos', 'posicao_media')]
+        f.write(f"## 🔁 Drivers Comuns entre Segmentos: {target_name}\n\n")
+        f.write("Posição de cada feature no Top 10 de cada segmento (- = fora do Top 10).\n\n")
+        f.write("| Insight | Segmentos | " + " | ".join(segmentos) + " |\n")
+        f.write("| :--- | :--- | " + " | ".join(":---" for _ in segmentos) + " |\n")
+        for feature, row in comuns.head(15).iterrows():
+            posicoes = " | ".join("-" if pd.isna(row[c]) else f"#{int(row[c])}" for c in segmentos)
+            f.write(f"| {traduzir_feature(feature)} | {int(row['segmentos'])}/{len(segmentos)} | {posicoes} |\n")
+        f.write("\n---\n\n")
+
+    for valor, por_target in results['segmentos'].items():
+        for target_name, r in por_target.items():
+            f.write(f"## 🎯 {coluna} = {valor}: {target_name} ({r['tipo']}, {r['linhas']} linhas)\n\n")
+            f.write("| Rank | Insight | Impacto | Dependencia (MI) | Tendencia |\n")
+            f.write("| :--- | :--- | :--- | :--- | :--- |\n")
+            for i, row in enumerate(r['ranking'].itertuples(), 1):
+                tendencia = _tendencia(row, target_name)
+                f.write(f"| #{i} | {traduzir_feature(row.Feature)} | {formatar_impacto(row.Importance)} | {formatar_impacto(row.MutualInfo)} | {tendencia} |\n")
+            f.write("\n")
+
+def ler_dataset(nome, pasta_datasets="datasets"):
+    """
+    Lê uma tabela de datasets/ em um dos formatos aceitos:
+    - <nome>.csv ou <nome>.parquet
+    - diretório <nome>/ com partições part-*.csv ou part-*.parquet (gerado por gerar_dados.py --escala)
+    """
+    base = os.path.join(pasta_datasets, nome)
+    encontrados = [c for c in (f"{base}.csv", f"{base}.parquet") if os.path.exists(c)]
+    if os.path.isdir(base):
+        encontrados.append(f"{base}/")
+    if len(encontrados) > 1:
+        raise ValueError(f"Tabela '{nome}' ambígua em {pasta_datasets}: {', '.join(encontrados)}. "
+                         f"Remova uma das versões ou use outra pasta (--datasets)")
+    if os.path.exists(f"{base}.csv"):
+        return pd.read_csv(f"{base}.csv")
+    if os.path.exists(f"{base}.parquet"):
+        return pd.read_parquet(f"{base}.parquet")
+    if os.path.isdir(base):
+        particoes = sorted(p for p in os.listdir(base) if p.startswith('part-'))
+        if not particoes:
+            raise FileNotFoundError(f"Nenhuma partição encontrada em {base}")
+        if all(p.endswith('.parquet') for p in particoes):
+            return pd.read_parquet(base)
+        return pd.concat([pd.read_csv(os.path.join(base, p)) for p in particoes if p.endswith('.csv')],
+                         ignore_index=True)
+    raise FileNotFoundError(f"Tabela '{nome}' não encontrada em {pasta_datasets} (.csv, .parquet ou partições)")
+
+def carregar_tabela(r, pasta_datasets="datasets", mostrar_tipos=False, verbose=True):
+    """
+    Lê uma tabela do mapeamento e prepara os tipos para o featuretools.
+    Mostra um resumo dos tipos (colunas por dtype); `mostrar_tipos` lista o dtype de cada coluna.
+    """
+    saida = console if verbose else CONSOLE_SILENCIOSO
+    if r.get('fonte'):
+        fonte = r['fonte']
+        df = ler_fonte(r)
+        saida.print(f"[cyan]Fonte {fonte['tipo']} ({fonte['caminho']}): "
+                      f"{len(df)} linhas x {len(df.columns)} colunas lidas para {r['name']}[/cyan]")
+    else:
+        df = ler_dataset(r['name'], pasta_datasets)
+    for col in df.columns:
+        if 'data' in col.lower() or 'date' in col.lower():
+            df[col] = pd.to_datetime(df[col], format='%Y-%m-%d %H:%M:%S', errors='coerce')
+    
+    # Featuretools 1.31.0+ requer woodwork obrigatoriamente
+    # Abordagem direta: inicializa woodwork explicitamente
+    
+    # Debug: tipos de dados (uma linha por coluna só quando pedido: tabelas largas têm milhares)
+    resumo_tipos = ", ".join(f"{tipo}: {n}" for tipo, n in df.dtypes.astype(str).value_counts().items())
+    saida.print(f"Tipos de dados para {r['name']} ({len(df.columns)} colunas): {resumo_tipos}",
+                  style="yellow", markup=False)
+    if mostrar_tipos:
+        saida.print("\n".join(f"  {col}: {tipo}" for col, tipo in df.dtypes.items()), markup=False)
+    
+    # Converte tipos problemáticos para garantir compatibilidade
+    for col in df.columns:
+        if df[col].dtype == 'object' or df[col].dtype == 'string':
+            df[col] = df[col].astype('str')
+    
+    # Abordagem: cria uma cópia limpa do DataFrame e remove woodwork
+    # O featuretools 1.31.0 requer woodwork, mas podemos trabalhar com cópias limpas
+    df_clean = df.copy()
+    
+    # Remove qualquer atributo woodwork que possa existir
+    if hasattr(df_clean, 'ww'):
+        # Cria um novo DataFrame a partir de um dicionário para evitar woodwork
+        data_dict = {}
+        for col in df_clean.columns:
+            data_dict[col] = df_clean[col].values
         
+        df_clean = pd.DataFrame(data_dict)
+    
+    saida.print(f"[green]✓ DataFrame limpo criado para {r['name']}[/green]")
+    return df_clean
+
+def construir_entityset(projeto, tabelas, tipos_logicos=None, verbose=True):
+    """
+    Monta o EntitySet a partir das tabelas carregadas [(regra, DataFrame), ...].
+    `tipos_logicos` ({tabela: {coluna: tipo}}) fixa os tipos do woodwork, como na pontuação,
+    em que poucas linhas não bastam para inferir os mesmos tipos do treino.
+    """
+    saida = console if verbose else CONSOLE_SILENCIOSO
+    tipos_logicos = tipos_logicos or {}
+    es = ft.EntitySet(id=projeto)
+    parent_table = ""
+    rules = [r for r, _ in tabelas]
+    
+    for r, df_clean in tabelas:
         if r['role'] == 'pai':
             parent_table = r['name']
             # Para tabelas pai, usa a chave existente
             try:
-                es.add_dataframe(dataframe_name=r['name'], dataframe=df_clean, index=r['keys'][0])
-                console.print(f"[green]✓[/green] Tabela '{r['name']}' carregada.")
+                es.add_dataframe(dataframe_name=r['name'], dataframe=df_clean, index=r['keys'][0],
+                                 logical_types=tipos_logicos.get(r['name']))
+                saida.print(f"[green]✓[/green] Tabela '{r['name']}' carregada.")
             except Exception as e:
-                console.print(f"[red]❌ Erro ao adicionar tabela '{r['name']}': {e}[/red]")
+                saida.print(f"[red]❌ Erro ao adicionar tabela '{r['name']}': {e}[/red]")
                 raise
         else:
             # Para tabelas filhas, cria um índice manualmente ANTES de adicionar
             index_name = f"id_auto_{r['name']}"
             df_clean[index_name] = range(len(df_clean))
             try:
-                es.add_dataframe(dataframe_name=r['name'], dataframe=df_clean, index=index_name)
-                console.print(f"[green]✓[/green] Tabela '{r['name']}' carregada.")
+                es.add_dataframe(dataframe_name=r['name'], dataframe=df_clean, index=index_name,
+                                 logical_types=tipos_logicos.get(r['name']))
+                saida.print(f"[green]✓[/green] Tabela '{r['name']}' carregada.")
             except Exception as e:
-                console.print(f"[red]❌ Erro ao adicionar tabela '{r['name']}': {e}[/red]")
+                saida.print(f"[red]❌ Erro ao adicionar tabela '{r['name']}': {e}[/red]")
                 raise
 
-    # 2. Relacionamentos
+    # Relacionamentos
     pai = [r for r in rules if r['role'] == 'pai'][0]
     for f in [r for r in rules if r['role'] == 'filho']:
         es.add_relationship(pai['name'], pai['keys'][0], f['name'], f['keys'][0])
     
-    # 3. DFS
-    console.print("\n[bold magenta]⚙️  Sintetizando variáveis...[/bold magenta]")
-    feature_matrix, _ = ft.dfs(entityset=es, target_dataframe_name=parent_table, max_depth=2)
+    return es, parent_table
 
-# 4. Analytics
-    results, tipo_ml = run_analytics(feature_matrix, args.target)
-    
-    # Verifica se o usuário cancelou a análise
-    if results is None:
-        console.print("[yellow]📝 Análise não realizada (cancelada pelo usuário).[/yellow]")
-        return
+def tipos_logicos_entityset(es):
+    """Tipos lógicos do woodwork de cada tabela do EntitySet ({tabela: {coluna: tipo}})."""
+    return {df.ww.name: {col: str(tipo) for col, tipo in df.ww.logical_types.items()} for df in es.dataframes}
 
-    # 5. Saída (Invertemos a ordem para garantir a tentativa do MD)
-    ts = datetime.now().strftime("%Y%m%d%H%M%S")
-    
-    console.print("[yellow]💾 Gravando arquivos de saída...[/yellow]")
-    
-    # Tenta MD primeiro
-    md_file = export_to_markdown(results, tipo_ml, args.projeto, args.target, ts)
-    if md_file:
-        console.print(f"[green]✓ Relatório MD criado: {md_file}[/green]")
-    
-    # Tenta CSV depois
-    csv_path = f"resultados/result_{args.projeto}_{ts}.csv"
-    feature_matrix.to_csv(csv_path)
-    console.print(f"[green]✓ Dataset CSV criado: {csv_path}[/green]")
+def sintetizar_features(es, parent_table, verbose=True):
+    """Executa o Deep Feature Synthesis sobre a tabela pai. Retorna (feature_matrix, definições das features)."""
+    saida = console if verbose else CONSOLE_SILENCIOSO
+    saida.print("\n[bold magenta]⚙️  Sintetizando variáveis...[/bold magenta]")
+    feature_matrix, features = ft.dfs(entityset=es, target_dataframe_name=parent_table,
+                                      agg_primitives=PRIMITIVAS_AGREGACAO, max_depth=2)
+    return feature_matrix, features
 
-    # Exibe resultados no terminal
-    if tipo_ml == "Múltiplos":
+def sintetizar_janelas(tabelas, feature_matrix, janelas, corte=None, verbose=True):
+    """
+    Acrescenta features de recência/frequência/valor por janela de tempo (ex.: últimos 30 e 90 dias)
+    de cada tabela filha com coluna de data. O corte padrão é a data mais recente de cada filha;
+    `corte` pode ser uma data única, uma Series com o corte de cada linha (indexada pela chave do pai)
+    ou um dicionário {tabela: data}.
+    """
+    saida = console if verbose else CONSOLE_SILENCIOSO
+    if not janelas:
+        return feature_matrix
+    novas = []
+    for r, df in tabelas:
+        if r['role'] != 'filho':
+            continue
+        coluna_data = coluna_data_da_tabela(r, df)
+        if coluna_data is None:
+            continue
+        corte_tabela = corte.get(r['name']) if isinstance(corte, dict) else corte
+        novas.append(agregar_janelas(df, r['name'], r['keys'][0], coluna_data, feature_matrix.index,
+                                     corte=corte_tabela, janelas=janelas))
+        saida.print(f"[green]✓[/green] Janelas de {', '.join(map(str, janelas))} dias para '{r['name']}' ({coluna_data}).")
+    if not novas:
+        return feature_matrix
+    return pd.concat([feature_matrix] + novas, axis=1)
+
+def exibir_resultados(results, tipo_ml):
+    """Exibe as tabelas de resumo de impacto no terminal."""
+    if tipo_ml == "Deriva":
+        _exibir_deriva(results)
+    elif tipo_ml == "Segmentado":
+        _exibir_segmentos(results)
+    elif tipo_ml == "Múltiplos":
         # Análise individual para cada target
         if 'individual' in results:
             for target_name, result_data in results['individual'].items():
@@ -777,17 +1209,18 @@ def main():
                 res_table = Table(title=f"Resumo de Impacto para: {target_name} ({target_tipo})")
                 res_table.add_column("Insight", style="white")
                 res_table.add_column("Impacto", style="green")
+                res_table.add_column("MI", style="magenta")
                 res_table.add_column("Tendência", style="cyan")
                 
                 for row in ranking.itertuples():
                     traducao = traduzir_feature(row.Feature)
-                    seta = "↗️" if row.Correlation > 0 else "↘️"
-                    relacao = "aumenta" if row.Correlation > 0 else "diminui"
-                    tendencia = f"{seta} {relacao} {target_name}"
+                    tendencia = _tendencia(row, target_name, terminal=True)
                     
-                    res_table.add_row(traducao, formatar_impacto(row.Importance), tendencia)
+                    res_table.add_row(traducao, formatar_impacto(row.Importance), formatar_impacto(row.MutualInfo), tendencia)
                 
                 console.print(res_table)
+                _exibir_interacoes(result_data.get('interacoes'), target_name)
+                _exibir_estabilidade(result_data.get('estabilidade'), target_name)
         
         # Análise multivariada
         if 'multivariate' in results:
@@ -840,23 +1273,555 @@ def main():
             res_table = Table(title=f"Resumo de Impacto para: {target_name} ({target_tipo})")
             res_table.add_column("Insight", style="white")
             res_table.add_column("Impacto", style="green")
+            res_table.add_column("MI", style="magenta")
             res_table.add_column("Tendência", style="cyan")
             
             for row in ranking.itertuples():
                 traducao = traduzir_feature(row.Feature)
-                seta = "↗️" if row.Correlation > 0 else "↘️"
-                relacao = "aumenta" if row.Correlation > 0 else "diminui"
-                tendencia = f"{seta} {relacao} {target_name}"
+                tendencia = _tendencia(row, target_name, terminal=True)
                 
-                res_table.add_row(traducao, formatar_impacto(row.Importance), tendencia)
+                res_table.add_row(traducao, formatar_impacto(row.Importance), formatar_impacto(row.MutualInfo), tendencia)
             
             console.print(res_table)
+            _exibir_interacoes(result_data.get('interacoes'), target_name)
+            _exibir_estabilidade(result_data.get('estabilidade'), target_name)
+
+def _exibir_estabilidade(estabilidade, target_name):
+    if not estabilidade:
+        return
+    tabela = Table(title=f"🎲 Estabilidade do ranking: {target_name} "
+                         f"({estabilidade['reamostras']} reamostras, {estabilidade['modo']})")
+    tabela.add_column("Insight", style="white")
+    tabela.add_column("Original", style="cyan")
+    tabela.add_column(f"Freq. Top {estabilidade['top']}", style="green")
+    tabela.add_column("Faixa (P5-P95)", style="magenta")
+    for row in estabilidade['tabela'].head(estabilidade['top']).itertuples():
+        original = estabilidade['posicao_original'].get(row.Feature)
+        tabela.add_row(traduzir_feature(row.Feature), f"#{original}" if original else "-",
+                       f"{row.frequencia_top:.0%}", f"{row.posicao_p05}-{row.posicao_p95}")
+    console.print(tabela)
+
+def _exibir_interacoes(interacoes, target_name):
+    if not interacoes:
+        return
+    tabela = Table(title=f"🔀 Interações entre drivers: {target_name} (Top 5)")
+    tabela.add_column("Driver A", style="white")
+    tabela.add_column("Driver B", style="white")
+    tabela.add_column("Força", style="green")
+    tabela.add_column("Padrão (A/B)", style="cyan")
+    for interacao in interacoes[:5]:
+        tabela.add_row(traduzir_feature(interacao['Feature1']), traduzir_feature(interacao['Feature2']),
+                       formatar_impacto(interacao['forca']), descrever_padrao(interacao))
+    console.print(tabela)
+
+def _exibir_segmentos(results):
+    """Top 3 drivers de cada segmento, lado a lado, e os drivers comuns a vários segmentos."""
+    for target_name in results['targets']:
+        seg_table = Table(title=f"Drivers por {results['coluna']}: {target_name}")
+        seg_table.add_column("Segmento", style="cyan")
+        seg_table.add_column("Linhas", justify="right")
+        for i in range(1, 4):
+            seg_table.add_column(f"#{i}", style="white")
+        for valor, por_target in results['segmentos'].items():
+            if target_name not in por_target:
+                continue
+            r = por_target[target_name]
+            drivers = [f"{_seta(row, terminal=True)} {traduzir_feature(row.Feature)} "
+                       f"({formatar_impacto(row.Importance)})" for row in r['ranking'].head(3).itertuples()]
+            seg_table.add_row(str(valor), str(r['linhas']), *(drivers + [""] * (3 - len(drivers))))
+        console.print(seg_table)
+
+        comuns = drivers_comuns(results, target_name)
+        if not comuns.empty:
+            n_segmentos = comuns.shape[1] - 2
+            comuns_table = Table(title=f"🔁 Drivers comuns entre segmentos: {target_name} (Top 5)")
+            comuns_table.add_column("Insight", style="white")
+            comuns_table.add_column("Segmentos (Top 10)", style="green")
+            comuns_table.add_column("Posição média", style="yellow")
+            for feature, row in comuns.head(5).iterrows():
+                comuns_table.add_row(traduzir_feature(feature), f"{int(row['segmentos'])}/{n_segmentos}",
+                                     f"{row['posicao_media']:.1f}")
+            console.print(comuns_table)
+
+def exibir_redundancia(redundancia):
+    """Maiores grupos de features redundantes no terminal."""
+    if not redundancia['grupos']:
+        console.print(f"[green]✓ Nenhum par de features com |correlação| >= {redundancia['limiar']}[/green]")
+        return
+    tabela = Table(title=f"🧬 Grupos de features redundantes (|r| >= {redundancia['limiar']})")
+    tabela.add_column("Representante", style="white")
+    tabela.add_column("Features", justify="right", style="yellow")
+    tabela.add_column("Exemplos de membros", style="cyan")
+    for grupo in redundancia['grupos'][:10]:
+        tabela.add_row(traduzir_feature(grupo['representante']), str(len(grupo['membros'])),
+                       ", ".join(traduzir_feature(m) for m in grupo['membros'][1:3]))
+    console.print(tabela)
+
+def _exibir_deriva(results):
+    """Mudanças de posição dos principais drivers entre os períodos (últimos 6 períodos na tela)."""
+    for target_name, deriva in results['deriva'].items():
+        if deriva.empty:
+            continue
+        periodos = [c for c in deriva.columns if c not in ('variacao', 'correlacao_ultima')][-6:]
+        deriva_table = Table(title=f"📈 Deriva dos drivers de {target_name} (posição por período)")
+        deriva_table.add_column("Insight", style="white")
+        for periodo in periodos:
+            deriva_table.add_column(periodo, justify="right", style="cyan")
+        deriva_table.add_column("Variação", justify="right", style="yellow")
+        deriva_table.add_column("Correlação", justify="right", style="green")
+        for feature, row in deriva.head(10).iterrows():
+            posicoes = ["-" if pd.isna(row[p]) else f"#{int(row[p])}" for p in periodos]
+            deriva_table.add_row(traduzir_feature(feature), *posicoes, _formatar_variacao(row['variacao']),
+                                 _formatar_correlacao(row.get('correlacao_ultima')))
+        console.print(deriva_table)
+
+def _ranking_para_lista(ranking):
+    """Converte o ranking (DataFrame) em lista de dicionários serializáveis."""
+    return [
+        {
+            'Feature': row.Feature,
+            'Descricao': traduzir_feature(row.Feature),
+            'Importance': float(row.Importance),
+            'Correlation': None if pd.isna(row.Correlation) else float(row.Correlation),
+            'MutualInfo': float(row.MutualInfo),
+            'Direcao': _direcao_categorica(row)
+        }
+        for row in ranking.itertuples()
+    ]
+
+def _interacoes_para_lista(interacoes):
+    """Interações entre drivers em lista serializável (sem as tabelas 2-D)."""
+    return [
+        {
+            'Feature1': i['Feature1'],
+            'Feature2': i['Feature2'],
+            'Descricao': f"{traduzir_feature(i['Feature1'])} x {traduzir_feature(i['Feature2'])}",
+            'Coocorrencia': float(i['Coocorrencia']),
+            'Forca': float(i['forca']),
+            'PValor': float(i['p_valor']),
+            'Padrao': descrever_padrao(i)
+        }
+        for i in (interacoes or [])
+    ]
+
+def _estabilidade_para_dict(estabilidade):
+    if not estabilidade:
+        return None
+    return {
+        'reamostras': estabilidade['reamostras'],
+        'modo': estabilidade['modo'],
+        'top': estabilidade['top'],
+        'workers': estabilidade['workers'],
+        'duracao_s': estabilidade['duracao_s'],
+        'features': [
+            {
+                'Feature': row.Feature,
+                'Descricao': traduzir_feature(row.Feature),
+                'PosicaoOriginal': estabilidade['posicao_original'].get(row.Feature),
+                'FrequenciaTop': float(row.frequencia_top),
+                'PosicaoMediana': float(row.posicao_mediana),
+                'PosicaoP05': int(row.posicao_p05),
+                'PosicaoP95': int(row.posicao_p95),
+                'ImportanciaMedia': float(row.importancia_media)
+            }
+            for row in estabilidade['tabela'].itertuples()
+        ]
+    }
+
+def resultados_para_dict(results, tipo_ml, projeto, target, ts):
+    """Resultados da execução (rankings e análise multivariada) em estrutura serializável."""
+    if tipo_ml in ("Segmentado", "Deriva"):
+        dados = {
+            'projeto': projeto,
+            'target': target,
+            'tipo': tipo_ml,
+            'timestamp': ts,
+            'individual': {},
+            'multivariate': None,
+            'segmentacao': _segmentos_para_dict(results)
+        }
+        if tipo_ml == "Deriva":
+            dados['deriva'] = _deriva_para_dict(results)
+        return dados
+    if tipo_ml == "Múltiplos":
+        individuais = results.get('individual', {})
+        multivariate = results.get('multivariate')
+    else:
+        individuais = results
+        multivariate = None
+    
+    dados = {
+        'projeto': projeto,
+        'target': target,
+        'tipo': tipo_ml,
+        'timestamp': ts,
+        'individual': {
+            nome: {'tipo': r['tipo'], 'ranking': _ranking_para_lista(r['ranking']),
+                   'interacoes': _interacoes_para_lista(r.get('interacoes')),
+                   'estabilidade': _estabilidade_para_dict(r.get('estabilidade'))}
+            for nome, r in individuais.items()
+        },
+        'multivariate': None
+    }
+    if multivariate:
+        dados['multivariate'] = {
+            'target_interactions': [
+                {**i, 'Correlation': float(i['Correlation'])} for i in multivariate['target_interactions']
+            ],
+            'multivariate_insights': [
+                {
+                    'Feature': i['Feature'],
+                    'Descricao': traduzir_feature(i['Feature']),
+                    'Pattern': i['Pattern'],
+                    'AvgImpact': float(i['AvgImpact']),
+                    'StrongTargets': int(i['StrongTargets']),
+                    'Correlations': {t: float(c) for t, c in i['Correlations'].items()}
+                }
+                for i in multivariate['multivariate_insights']
+            ]
+        }
+    return dados
+
+def _segmentos_para_dict(results):
+    return {
+        'coluna': results['coluna'],
+        'workers': results['workers'],
+        'tamanhos': {str(v): int(n) for v, n in results['tamanhos'].items()},
+        'ignorados': {str(v): int(n) for v, n in results['ignorados'].items()},
+        'erros': {str(v): e for v, e in results['erros'].items()},
+        'segmentos': {
+            str(valor): {
+                t: {'tipo': r['tipo'], 'linhas': int(r['linhas']), 'duracao_s': r['duracao_s'],
+                    'ranking': _ranking_para_lista(r['ranking'])}
+                for t, r in por_target.items()
+            }
+            for valor, por_target in results['segmentos'].items()
+        },
+        'drivers_comuns': {
+            t: [
+                {'Feature': feature, 'Descricao': traduzir_feature(feature),
+                 'segmentos': int(row['segmentos']), 'posicao_media': float(row['posicao_media'])}
+                for feature, row in drivers_comuns(results, t).iterrows()
+            ]
+            for t in results['targets']
+        }
+    }
+
+def _deriva_para_dict(results):
+    deriva = {'janela_periodos': results['janela_periodos'], 'targets': {}}
+    for t, tabela in results['deriva'].items():
+        periodos = [c for c in tabela.columns if c not in ('variacao', 'correlacao_ultima')]
+        correlacoes = results['correlacoes'][t]
+        deriva['targets'][t] = [
+            {
+                'Feature': feature,
+                'Descricao': traduzir_feature(feature),
+                'posicoes': {p: None if pd.isna(row[p]) else int(row[p]) for p in periodos},
+                'variacao': float(row['variacao']),
+                'correlacoes': {p: float(correlacoes.at[p, feature]) for p in periodos if feature in correlacoes.columns}
+            }
+            for feature, row in tabela.iterrows()
+        ]
+    return deriva
+
+def export_modelo(results, tipo_ml, definicoes, projeto, ts):
+    """
+    Grava em resultados/modelo_<projeto>_<ts>/ o necessário para pontuar entidades novas:
+    - features.json: definições das features do DFS (ft.save_features)
+    - modelo.joblib: estimadores treinados por target, colunas, codificação das categóricas,
+      tipos lógicos das tabelas, mapeamento e configuração das janelas de tempo
+    """
+    diretorio = os.path.join("resultados", f"modelo_{projeto}_{ts}")
+    os.makedirs(diretorio, exist_ok=True)
+    ft.save_features(definicoes['features'], os.path.join(diretorio, "features.json"))
+
+    individuais = results.get('individual', {}) if tipo_ml == "Múltiplos" else results
+    artefato = {
+        'projeto': projeto,
+        'timestamp': ts,
+        'rules': definicoes['rules'],
+        'tipos_logicos': definicoes['tipos_logicos'],
+        'janelas': definicoes['janelas'],
+        'data_corte': definicoes['data_corte'],
+        'targets': {nome: {**r['modelo'], 'drivers': list(r['ranking']['Feature'])} for nome, r in individuais.items()}
+    }
+    joblib.dump(artefato, os.path.join(diretorio, "modelo.joblib"))
+    return diretorio
+
+def export_to_json(results, tipo_ml, projeto, target, ts, redundancia=None, verbose=True):
+    """Grava os resultados estruturados da execução (rankings e análise multivariada) em .json."""
+    saida = console if verbose else CONSOLE_SILENCIOSO
+    filename = f"result_{projeto}_{ts}.json"
+    filepath = os.path.join("resultados", filename)
+    dados = resultados_para_dict(results, tipo_ml, projeto, target, ts)
+    if redundancia:
+        dados['redundancia'] = {**redundancia, 'arquivo': os.path.basename(redundancia['arquivo'])}
+    
+    try:
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+        return filename
+    except Exception as e:
+        saida.print(f"[red]Erro ao gravar JSON: {e}[/red]")
+        return None
+
+def carregar_tabelas(rules, monitor, pasta_datasets="datasets", mostrar_tipos=False, verbose=True):
+    """Carga de todas as tabelas do mapeamento: [(regra, DataFrame), ...]."""
+    with monitor.estagio("carga", total=len(rules)) as etapa:
+        tabelas = []
+        for r in rules:
+            tabelas.append((r, carregar_tabela(r, pasta_datasets, mostrar_tipos, verbose)))
+            etapa.avancar()
+    return tabelas
+
+def preparar_matriz(projeto, rules, monitor, janelas=(), data_corte=None, tabelas=None, pasta_datasets="datasets",
+                    checkpoint=None, mostrar_tipos=False, verbose=True):
+    """
+    Carga das tabelas, EntitySet, DFS e janelas de tempo.
+    Retorna (feature_matrix, tabelas, definicoes); `definicoes` é o necessário para recalcular
+    as mesmas features para entidades novas (ver salvar_modelo).
+    `tabelas` já carregadas (ex.: vários jobs do mesmo mapeamento) pulam a carga.
+    `checkpoint` (ExecucaoCheckpoint) grava cada etapa e retoma da última concluída; retomada
+    a partir da matriz final, `tabelas` volta None (não é mais necessária).
+    verbose=False silencia as mensagens da carga, do EntitySet e das janelas.
+    """
+    ck = checkpoint or SemCheckpoint()
+    if ck.concluida("janelas"):
+        feature_matrix, definicoes = ck.carregar("janelas")
+        return feature_matrix, None, definicoes
+
+    # 1. Carga
+    if tabelas is None:
+        tabelas = ck.etapa("carga", lambda: carregar_tabelas(rules, monitor, pasta_datasets, mostrar_tipos, verbose))
+
+    def _entityset():
+        with monitor.estagio("entityset"):
+            return construir_entityset(projeto, tabelas, verbose=verbose)
+
+    def _dfs():
+        # 2. EntitySet e relacionamentos
+        es, parent_table = ck.etapa("entityset", _entityset)
+        # 3. DFS
+        with monitor.estagio("dfs"):
+            feature_matrix, features = sintetizar_features(es, parent_table, verbose)
+        return feature_matrix, features, tipos_logicos_entityset(es)
+
+    feature_matrix, features, tipos_logicos = ck.etapa("dfs", _dfs)
+
+    def _janelas():
+        with monitor.estagio("janelas"):
+            matriz = sintetizar_janelas(tabelas, feature_matrix, janelas, data_corte, verbose)
+        definicoes = {'features': features, 'tipos_logicos': tipos_logicos, 'rules': rules,
+                      'janelas': list(janelas), 'data_corte': data_corte}
+        return matriz, definicoes
+
+    feature_matrix, definicoes = ck.etapa("janelas", _janelas)
+    return feature_matrix, tabelas, definicoes
+
+def preparar_matriz_periodos(projeto, rules, monitor, frequencia, janelas=(), n_periodos=PERIODOS_PADRAO,
+                             tabelas=None, pasta_datasets="datasets", mostrar_tipos=False, verbose=True):
+    """
+    Matriz de features com a coluna de período (COLUNA_PERIODO) para a análise de deriva:
+    - Tabela pai com coluna de data: DFS uma única vez e cada linha pertence ao período da sua data;
+      as janelas de tempo das filhas usam como corte o fim desse período, linha a linha
+    - Caso contrário: um corte no fim de cada período e, para cada corte, as colunas da tabela pai
+      mais as janelas de tempo das filhas até aquele corte (uma linha por entidade e período).
+      Agregados do DFS sobre todo o histórico não entram aqui, pois usariam eventos posteriores ao corte
+    Mantém só os `n_periodos` períodos mais recentes.
+    """
+    saida = console if verbose else CONSOLE_SILENCIOSO
+    if tabelas is None:
+        tabelas = carregar_tabelas(rules, monitor, pasta_datasets, mostrar_tipos, verbose)
+
+    r_pai, df_pai = [(r, df) for r, df in tabelas if r['role'] == 'pai'][0]
+    chave_pai = r_pai['keys'][0]
+    coluna_data_pai = coluna_data_da_tabela(r_pai, df_pai)
+
+    if coluna_data_pai is not None:
+        datas_pai = df_pai.set_index(chave_pai)[coluna_data_pai]
+        with monitor.estagio("entityset"):
+            es, parent_table = construir_entityset(projeto, tabelas, verbose=verbose)
+        with monitor.estagio("dfs"):
+            feature_matrix, _ = sintetizar_features(es, parent_table, verbose)
+        # Corte de cada linha = fim do período da sua data: as janelas não veem eventos de períodos seguintes
+        fim_periodo = pd.to_datetime(datas_pai).dt.to_period(FREQUENCIAS[frequencia]).dt.end_time.dt.floor('s')
+        with monitor.estagio("janelas"):
+            feature_matrix = sintetizar_janelas(tabelas, feature_matrix, janelas, fim_periodo, verbose)
+        feature_matrix[COLUNA_PERIODO] = rotular_periodos(datas_pai.reindex(feature_matrix.index), frequencia).to_numpy()
+        feature_matrix = feature_matrix[datas_pai.reindex(feature_matrix.index).notna().to_numpy()]
+        recentes = sorted(feature_matrix[COLUNA_PERIODO].unique())[-n_periodos:]
+        feature_matrix = feature_matrix[feature_matrix[COLUNA_PERIODO].isin(recentes)]
+        saida.print(f"[green]✓ Períodos pela coluna '{coluna_data_pai}' da tabela pai: {len(recentes)}[/green]")
+        return feature_matrix, tabelas
+
+    filhas = []
+    for r, df in tabelas:
+        if r['role'] == 'filho':
+            coluna_data = coluna_data_da_tabela(r, df)
+            if coluna_data is not None:
+                filhas.append((r['name'], df, r['keys'][0], coluna_data))
+    if not filhas:
+        raise ValueError("--period requer uma coluna de data na tabela pai ou em alguma tabela filha")
+
+    datas = pd.concat([df[coluna_data] for _, df, _, coluna_data in filhas]).dropna()
+    cortes = cortes_por_periodo(datas, frequencia, n_periodos)
+    with monitor.estagio("cortes_periodo", total=len(cortes)):
+        feature_matrix = matriz_por_cortes(df_pai, chave_pai, filhas, cortes, janelas or JANELAS_PADRAO)
+    saida.print(f"[green]✓ {len(cortes)} cortes ({', '.join(list(cortes)[:1] + list(cortes)[-1:])}): "
+                  f"{feature_matrix.shape[0]} linhas entidade x período, {feature_matrix.shape[1] - 1} features[/green]")
+    return feature_matrix, tabelas
+
+def main(args=None):
+    """Pipeline de linha de comando; `args` já validado vem de discoveryspark.py (senão lê sys.argv)."""
+    if args is None:
+        args = analisar_argumentos("run")
+
+    checkpoint = SemCheckpoint()
+    if args.resume:
+        try:
+            checkpoint = ExecucaoCheckpoint.retomar(args.resume, console=console)
+        except CheckpointInvalido as e:
+            criar_parser("run").error(str(e))
+        # A execução retomada usa os argumentos originais (e o mesmo timestamp nos arquivos de saída);
+        # só --target pode ser corrigido, o que refaz a validação dos targets e as exportações
+        novo_target = args.target
+        for nome, valor in checkpoint.argumentos.items():
+            setattr(args, nome, valor)
+        if novo_target and novo_target != args.target:
+            args.target = checkpoint.argumentos['target'] = novo_target
+            checkpoint.descartar("validacao_targets", "multivariada", "redundancia", "export_markdown",
+                                 "export_json", "export_csv", "export_modelo")
+    janelas = [int(j) for j in args.janelas.split(',') if j.strip()]
+
+    rules = parse_mapping_file()
+    if not rules: return
+
+    console.print(Panel(f"🚀 [bold]DiscoverySpark Engine[/bold] v3.0\nProjeto: {args.projeto}", style="blue"))
+    
+    if args.resume:
+        ts = args.ts
+        checkpoint.validar_ambiente(assinatura_datasets(rules, args.datasets))
+        console.print(f"[cyan]↩️  Retomando a execução {checkpoint.run_id}[/cyan]")
+    else:
+        ts = datetime.now().strftime("%Y%m%d%H%M%S")
+        if args.checkpoint:
+            argumentos = {**{k: v for k, v in vars(args).items()
+                             if k not in ('resume', 'checkpoint', 'manter_checkpoints')}, 'ts': ts}
+            checkpoint = ExecucaoCheckpoint(f"{args.projeto}_{ts}", argumentos, assinatura_datasets(rules, args.datasets),
+                                            console=console)
+    try:
+        _executar_pipeline(args, rules, janelas, ts, checkpoint)
+    except Exception:
+        if checkpoint.run_id:
+            console.print(f"[yellow]💾 Etapas concluídas salvas em checkpoint. Para continuar de onde parou: "
+                          f"python discoveryspark.py run --resume {checkpoint.run_id}[/yellow]")
+        raise
+    if checkpoint.run_id and not args.manter_checkpoints:
+        checkpoint.remover()
+
+def _executar_pipeline(args, rules, janelas, ts, checkpoint):
+    """Carga → DFS → analytics → exportações, cada etapa com checkpoint (ver ExecucaoCheckpoint)."""
+    monitor = MonitorExecucao(
+        console,
+        medir_memoria=args.memoria,
+        perfilar=args.profile,
+        estagios_perfilados=ESTAGIOS_PERFILADOS,
+        prefixo_perfil=f"perfil_{args.projeto}_{ts}"
+    )
+
+    # 1-3. Carga, EntitySet e DFS (+ janelas de tempo)
+    if args.periodo:
+        feature_matrix = checkpoint.etapa("matriz_periodos", lambda: preparar_matriz_periodos(
+            args.projeto, rules, monitor, args.periodo, janelas, args.periodos,
+            pasta_datasets=args.datasets, mostrar_tipos=args.mostrar_tipos)[0])
+    else:
+        feature_matrix, _, definicoes = preparar_matriz(args.projeto, rules, monitor, janelas,
+                                            pd.Timestamp(args.data_corte) if args.data_corte else None,
+                                            pasta_datasets=args.datasets, checkpoint=checkpoint,
+                                            mostrar_tipos=args.mostrar_tipos)
+
+    # 4. Analytics (validação de targets e modelos são medidos dentro de run_analytics)
+    results, tipo_ml = run_analytics(feature_matrix, args.target, monitor=monitor, politica=args.politica,
+                                     por=args.por, min_linhas_segmento=args.min_segmento,
+                                     janela_periodos=args.janela_periodos if args.periodo else None,
+                                     pre_filtro_mi=args.pre_filtro_mi, orcamento_interacoes=args.orcamento_interacoes,
+                                     reamostras=args.estabilidade, modo_reamostragem=args.modo_estabilidade,
+                                     checkpoint=checkpoint)
+    
+    # Verifica se o usuário cancelou a análise
+    if results is None:
+        console.print("[yellow]📝 Análise não realizada (cancelada pelo usuário).[/yellow]")
+        return
+
+    # Redundância entre features (opcional): correlações em blocos sobre uma cópia float32 em disco
+    redundancia = None
+    if args.redundancia:
+        with monitor.estagio("redundancia"):
+            redundancia = checkpoint.etapa("redundancia", lambda: analisar_redundancia(
+                feature_matrix.drop(columns=[t.strip() for t in args.target.split(',')], errors='ignore'),
+                os.path.join("resultados", f"redundancia_{args.projeto}_{ts}.npz"), args.limiar_redundancia))
+        console.print(f"[green]✓ Redundância: {redundancia['arestas']} pares com |r| >= {redundancia['limiar']} "
+                      f"em {len(redundancia['grupos'])} grupos ({redundancia['blocos']} blocos). "
+                      f"Arestas: {redundancia['arquivo']}[/green]")
+
+    # 5. Saída (Invertemos a ordem para garantir a tentativa do MD)
+    console.print("[yellow]💾 Gravando arquivos de saída...[/yellow]")
+    
+    # Tenta MD primeiro
+    with monitor.estagio("export_markdown"):
+        md_file = checkpoint.etapa("export_markdown", lambda: export_to_markdown(
+            results, tipo_ml, args.projeto, args.target, ts, redundancia))
+    if md_file:
+        console.print(f"[green]✓ Relatório MD criado: {md_file}[/green]")
+    
+    # Resultados estruturados (usados pela análise profunda para montar prompts compactos)
+    with monitor.estagio("export_json"):
+        json_file = checkpoint.etapa("export_json", lambda: export_to_json(
+            results, tipo_ml, args.projeto, args.target, ts, redundancia))
+    if json_file:
+        console.print(f"[green]✓ Resultados estruturados: {json_file}[/green]")
+    
+    # Tenta CSV depois
+    csv_path = f"resultados/result_{args.projeto}_{ts}.csv"
+    def _exportar_csv():
+        feature_matrix.to_csv(csv_path)
+        return csv_path
+    with monitor.estagio("export_csv"):
+        checkpoint.etapa("export_csv", _exportar_csv)
+    console.print(f"[green]✓ Dataset CSV criado: {csv_path}[/green]")
+
+    # Definições das features + modelos treinados (usados por pontuacao.py para entidades novas)
+    if tipo_ml not in ("Segmentado", "Deriva"):
+        with monitor.estagio("export_modelo"):
+            modelo_dir = checkpoint.etapa("export_modelo", lambda: export_modelo(
+                results, tipo_ml, definicoes, args.projeto, ts))
+        console.print(f"[green]✓ Modelo para pontuação salvo em: {modelo_dir}[/green]")
+
+    # Exibe resultados no terminal
+    exibir_resultados(results, tipo_ml)
+    if redundancia:
+        exibir_redundancia(redundancia)
+
+    # Perfil de execução (tempo e memória por etapa)
+    console.print(monitor.tabela_resumo())
+    perfil_path = monitor.salvar(
+        f"resultados/perfil_{args.projeto}_{ts}.json",
+        metadados={'projeto': args.projeto, 'target': args.target, 'timestamp': ts,
+                   'linhas': len(feature_matrix), 'features': feature_matrix.shape[1]}
+    )
+    console.print(f"[green]✓ Perfil de execução salvo: {perfil_path}[/green]")
+    if monitor.arquivos_perfil:
+        console.print(f"[green]✓ Saídas do cProfile: {', '.join(monitor.arquivos_perfil)}[/green]")
 
     console.print(f"\n[bold green]✅ Relatórios gerados em /resultados![/bold green]")
 
-if __name__ == "__main__":
+def executar(args=None):
+    """Entrada de `python app.py` e `discoveryspark run`: prepara as pastas e mostra erros fatais sem traceback."""
     setup_environment()
     try:
-        main()
+        main(args)
     except Exception as e:
-        console.print(f"[red]Erro fatal: {e}[/red]")
\ No newline at end of file
+        console.print(f"[red]Erro fatal: {e}[/red]")
+
+if __name__ == "__main__":
+    executar()
\ No newline at end of file
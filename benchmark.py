@@ -0,0 +1,483 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from rich.console import Console
+from rich.table import Table
+from rich.panel import Panel
+
+from gerar_dados import gerar_dados_parametrizados
+from instrumentacao import MonitorExecucao
+from matriz_compartilhada import MatrizCompartilhada, anexar
+from discoveryspark import analisar_argumentos
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+console = Console()
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+ENTRADA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "discoveryspark.py")
+TARGET_BENCH = "alvo"
+
+def preparar_cenario(diretorio, n_pais, fanout, n_colunas, cardinalidade, esparsidade, n_filhas, seed):
+    """Cria datasets/ e mapeamento/ de um cenário sintético dentro de `diretorio`."""
+    for pasta in ['datasets', 'mapeamento', 'resultados']:
+        os.makedirs(os.path.join(diretorio, pasta), exist_ok=True)
+
+    mapeamento = gerar_dados_parametrizados(
+        n_pais=n_pais, fanout=fanout, n_colunas=n_colunas, cardinalidade=cardinalidade,
+        esparsidade=esparsidade, n_filhas=n_filhas, seed=seed,
+        pasta=os.path.join(diretorio, 'datasets')
+    )
+    with open(os.path.join(diretorio, 'mapeamento', 'mapeamento.txt'), 'w') as f:
+        f.write(mapeamento + "\n")
+    return mapeamento
+
+def medir_pipeline_completo(diretorio, projeto="bench"):
+    """Executa app.py em um subprocesso e mede tempo total e pico de RSS (amostrado)."""
+    comando = [sys.executable, APP_PATH, "--projeto", projeto, "--target", TARGET_BENCH]
+    inicio = time.perf_counter()
+    proc = subprocess.Popen(comando, cwd=diretorio, stdin=subprocess.DEVNULL,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    pico_rss = 0.0
+    if psutil is not None:
+        try:
+            p = psutil.Process(proc.pid)
+            while proc.poll() is None:
+                try:
+                    pico_rss = max(pico_rss, p.memory_info().rss / (1024 * 1024))
+                except psutil.Error:
+                    break
+                time.sleep(0.05)
+        except psutil.Error:
+            pass
+    _, stderr = proc.communicate()
+    duracao = time.perf_counter() - inicio
+
+    if psutil is None and hasattr(os, 'getrusage'):
+        import resource
+        # ru_maxrss em KB no Linux: é o máximo entre todos os filhos já finalizados
+        pico_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+    if proc.returncode != 0:
+        console.print(f"[red]❌ app.py terminou com código {proc.returncode}: {stderr.decode(errors='ignore')[-500:]}[/red]")
+
+    return {
+        'etapa': 'pipeline_completo',
+        'duracao_s': duracao,
+        'pico_memoria_mb': None,
+        'rss_mb': pico_rss or None,
+        'status': 'ok' if proc.returncode == 0 else 'erro'
+    }
+
+def medir_estagios(diretorio, projeto="bench"):
+    """Executa cada etapa do pipeline isoladamente (em processo) com o MonitorExecucao."""
+    import app
+
+    diretorio_original = os.getcwd()
+    os.chdir(diretorio)
+    try:
+        monitor = MonitorExecucao(app.CONSOLE_SILENCIOSO, exibir_progresso=False, medir_memoria=True)
+        rules = app.parse_mapping_file(verbose=False)
+        ts = datetime.now().strftime("%Y%m%d%H%M%S")
+
+        with monitor.estagio("carga"):
+            tabelas = [(r, app.carregar_tabela(r, verbose=False)) for r in rules]
+        with monitor.estagio("entityset"):
+            es, parent_table = app.construir_entityset(projeto, tabelas, verbose=False)
+        with monitor.estagio("dfs"):
+            feature_matrix, _ = app.sintetizar_features(es, parent_table, verbose=False)
+        results, tipo_ml = app.run_analytics(feature_matrix, TARGET_BENCH, monitor=monitor, verbose=False)
+        with monitor.estagio("export_markdown"):
+            app.export_to_markdown(results, tipo_ml, projeto, TARGET_BENCH, ts, verbose=False)
+        with monitor.estagio("export_csv"):
+            feature_matrix.to_csv(os.path.join("resultados", f"result_{projeto}_{ts}.csv"))
+    finally:
+        os.chdir(diretorio_original)
+
+    medicoes = []
+    for r in monitor.registros:
+        etapa = r['estagio'] if r['alvo'] is None else f"{r['estagio']}:{r['alvo']}"
+        medicoes.append({
+            'etapa': etapa,
+            'duracao_s': r['duracao_s'],
+            'pico_memoria_mb': r['pico_memoria_mb'],
+            'rss_mb': r['rss_mb'],
+            'status': r['status']
+        })
+    return medicoes, feature_matrix.shape
+
+def comparar_primitivas(diretorio, projeto="bench", repeticoes=3):
+    """
+    Compara cada primitiva de agregação rápida com a padrão do featuretools:
+    tempo do ft.dfs só com aquela primitiva (melhor de `repeticoes`) e igualdade das saídas.
+    """
+    import featuretools as ft
+    import pandas as pd
+    import app
+    from primitivas_rapidas import PARES_PRIMITIVAS, KERNEL_JA_VETORIZADO
+
+    diretorio_original = os.getcwd()
+    os.chdir(diretorio)
+    try:
+        tabelas = [(r, app.carregar_tabela(r, verbose=False)) for r in app.parse_mapping_file(verbose=False)]
+        es, parent_table = app.construir_entityset(projeto, tabelas, verbose=False)
+    finally:
+        os.chdir(diretorio_original)
+
+    def executar(primitiva):
+        melhor, matriz = float('inf'), None
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            matriz, _ = ft.dfs(entityset=es, target_dataframe_name=parent_table, agg_primitives=[primitiva],
+                               trans_primitives=[], max_depth=1)
+            melhor = min(melhor, time.perf_counter() - inicio)
+        return melhor, matriz
+
+    comparacoes = []
+    for padrao, rapida in PARES_PRIMITIVAS:
+        tempo_padrao, matriz_padrao = executar(padrao)
+        tempo_rapida, matriz_rapida = executar(rapida)
+        try:
+            pd.testing.assert_frame_equal(matriz_padrao, matriz_rapida, check_dtype=False, rtol=1e-9)
+            identica, diferencas = True, 0
+        except AssertionError:
+            identica = False
+            comuns = matriz_padrao.columns.intersection(matriz_rapida.columns)
+            a, b = matriz_padrao[comuns], matriz_rapida[comuns]
+            diferencas = int(((a != b) & ~(a.isna() & b.isna())).to_numpy().sum())
+        comparacoes.append({
+            'primitiva': padrao.name,
+            'muda_kernel': padrao not in KERNEL_JA_VETORIZADO,
+            'features': matriz_padrao.shape[1],
+            'padrao_s': tempo_padrao,
+            'rapida_s': tempo_rapida,
+            'aceleracao': tempo_padrao / tempo_rapida if tempo_rapida > 0 else None,
+            'identica': identica,
+            'valores_diferentes': diferencas
+        })
+    return comparacoes
+
+def exibir_primitivas(comparacoes, cenario):
+    tabela = Table(title=f"⚡ Primitivas de Agregação: padrão x rápidas ({cenario})")
+    tabela.add_column("Primitiva", style="cyan")
+    tabela.add_column("Features", justify="right")
+    tabela.add_column("Padrão (s)", justify="right")
+    tabela.add_column("Rápida (s)", style="green", justify="right")
+    tabela.add_column("Aceleração", style="yellow", justify="right")
+    tabela.add_column("Kernel")
+    tabela.add_column("Saída")
+    for c in comparacoes:
+        saida = "[green]idêntica[/green]" if c['identica'] else f"[red]{c['valores_diferentes']} valor(es) diferente(s)[/red]"
+        aceleracao = f"{c['aceleracao']:.1f}x" if c['aceleracao'] else "-"
+        kernel = "[green]novo[/green]" if c['muda_kernel'] else "[dim]igual[/dim]"
+        tabela.add_row(c['primitiva'].upper(), str(c['features']), f"{c['padrao_s']:.3f}", f"{c['rapida_s']:.3f}",
+                       aceleracao, kernel, saida)
+    console.print(tabela)
+
+def comparar_com_baseline(medicoes, baseline, tolerancia=0.25, minimo_s=0.05):
+    """
+    Compara medições com um baseline salvo (mesmo cenário e etapa).
+    Uma etapa é regressão quando fica mais de `tolerancia` mais lenta
+    e a diferença absoluta passa de `minimo_s` segundos (evita ruído em etapas curtas).
+    """
+    referencia = {(m['cenario'], m['etapa']): m for m in baseline.get('medicoes', [])}
+    comparacoes = []
+    for m in medicoes:
+        base = referencia.get((m['cenario'], m['etapa']))
+        if base is None or not base.get('duracao_s'):
+            continue
+        razao = m['duracao_s'] / base['duracao_s']
+        regressao = razao > 1 + tolerancia and (m['duracao_s'] - base['duracao_s']) > minimo_s
+        comparacoes.append({
+            'cenario': m['cenario'],
+            'etapa': m['etapa'],
+            'baseline_s': base['duracao_s'],
+            'atual_s': m['duracao_s'],
+            'razao': razao,
+            'regressao': regressao
+        })
+    return comparacoes
+
+def _memoria_worker():
+    """RSS e USS (memória privada do processo) em MB; o USS não conta páginas compartilhadas."""
+    info = psutil.Process(os.getpid()).memory_full_info()
+    return info.rss / (1024 * 1024), info.uss / (1024 * 1024)
+
+def _worker_base(_):
+    import numpy  # noqa: F401 - mesmo custo de importação dos outros workers
+    return _memoria_worker()
+
+def _worker_copia(df):
+    # A matriz chegou serializada (pickle): o worker tem a própria cópia
+    df.to_numpy().sum(axis=0)
+    return _memoria_worker()
+
+def _worker_compartilhado(descritor):
+    # A matriz é anexada sem cópia: somar todas as colunas toca todas as páginas do bloco compartilhado
+    matriz, recurso = anexar(descritor)
+    try:
+        matriz.sum(axis=0)
+        return _memoria_worker()
+    finally:
+        del matriz
+        recurso.close()
+
+def medir_memoria_workers(n_linhas, n_colunas, workers=2, seed=42):
+    """
+    RSS/USS por worker de um pool de processos que lê uma matriz float32 n_linhas x n_colunas:
+    (a) enviada a cada tarefa por pickle e (b) publicada uma vez em memória compartilhada
+    (modos "memoria" e "arquivo"). Descontado o worker ocioso, o USS mostra a cópia privada de (a).
+    """
+    if psutil is None:
+        console.print("[yellow]⚠️  psutil não disponível: medição de memória por worker ignorada[/yellow]")
+        return []
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.random((n_linhas, n_colunas), dtype=np.float32),
+                      columns=[f"f{i}" for i in range(n_colunas)])
+    matriz_mb = df.memory_usage(index=False).sum() / (1024 * 1024)
+
+    def executar(funcao, argumento):
+        inicio = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            medidas = list(pool.map(funcao, [argumento] * workers))
+        return time.perf_counter() - inicio, medidas
+
+    _, base = executar(_worker_base, None)
+    rss_base = sum(m[0] for m in base) / len(base)
+    uss_base = sum(m[1] for m in base) / len(base)
+    medicoes = []
+    cenarios = [('pickle', _worker_copia, lambda: None)]
+    cenarios += [(f'compartilhada_{modo}', _worker_compartilhado, lambda modo=modo: MatrizCompartilhada(df, modo=modo))
+                 for modo in ("memoria", "arquivo")]
+    for nome, funcao, publicar in cenarios:
+        publicada = publicar()
+        try:
+            duracao, medidas = executar(funcao, publicada.descritor if publicada else df)
+        finally:
+            if publicada:
+                publicada.fechar()
+        medicoes.append({
+            'modo': nome,
+            'matriz_mb': matriz_mb,
+            'workers': workers,
+            'duracao_s': duracao,
+            'rss_worker_mb': sum(m[0] for m in medidas) / len(medidas) - rss_base,
+            'uss_worker_mb': sum(m[1] for m in medidas) / len(medidas) - uss_base
+        })
+    return medicoes
+
+def exibir_memoria_workers(medicoes):
+    tabela = Table(title="🧠 Memória por Worker (acima de um worker ocioso)")
+    tabela.add_column("Modo", style="cyan", no_wrap=True)
+    tabela.add_column("Matriz (MB)", justify="right")
+    tabela.add_column("Workers", justify="right")
+    tabela.add_column("Tempo (s)", style="green", justify="right")
+    tabela.add_column("RSS/worker (MB)", style="magenta", justify="right")
+    tabela.add_column("USS/worker (MB)", style="yellow", justify="right")
+    for m in medicoes:
+        tabela.add_row(m['modo'], f"{m['matriz_mb']:.1f}", str(m['workers']), f"{m['duracao_s']:.2f}",
+                       f"{m['rss_worker_mb']:.1f}", f"{m['uss_worker_mb']:.1f}")
+    console.print(tabela)
+
+# Comandos medidos por --inicializacao: respostas que não deveriam carregar o motor (ajuda, erros de
+# argumento, mapeamento ausente) e, como referência, app.py executado direto (importa tudo no topo)
+COMANDOS_INICIALIZACAO = [
+    ("discoveryspark --help", [ENTRADA_PATH, "--help"]),
+    ("run --help", [ENTRADA_PATH, "run", "--help"]),
+    ("run sem mapeamento", [ENTRADA_PATH, "run", "--projeto", "bench", "--target", TARGET_BENCH]),
+    ("run argumento inválido", [ENTRADA_PATH, "run", "--politica", "nenhuma"]),
+    ("score --help", [ENTRADA_PATH, "score", "--help"]),
+    ("bench --help", [ENTRADA_PATH, "bench", "--help"]),
+    ("deep-analysis --help", [ENTRADA_PATH, "deep-analysis", "--help"]),
+    ("app.py --help (direto)", [APP_PATH, "--help"]),
+]
+MODULOS_PESADOS = ("pandas", "featuretools", "sklearn")
+
+def _ler_importtime(stderr):
+    """
+    Linhas de `python -X importtime` ("import time: self | cumulativo | módulo", em µs). Os módulos de
+    primeiro nível (sem recuo) somam o tempo total de importação; os aninhados só entram na contagem.
+    """
+    primeiro_nivel = {}
+    modulos = 0
+    for linha in stderr.splitlines():
+        if not linha.startswith("import time:") or "[us]" in linha:
+            continue
+        _, cumulativo, nome = linha[len("import time:"):].split("|", 2)
+        modulos += 1
+        if not nome[1:].startswith(" "):
+            primeiro_nivel[nome.strip()] = int(cumulativo) / 1e6
+    return primeiro_nivel, modulos
+
+def medir_inicializacao(comandos=COMANDOS_INICIALIZACAO, repeticoes=3):
+    """
+    Tempo de inicialização de cada comando com `python -X importtime`, em um diretório vazio
+    (sem mapeamento): tempo total do processo (mediana de `repeticoes`), tempo somado das
+    importações, módulos importados e quais bibliotecas pesadas foram carregadas.
+    """
+    diretorio = tempfile.mkdtemp(prefix="dspark_inicializacao_")
+    medicoes = []
+    try:
+        for rotulo, argumentos in comandos:
+            duracoes = []
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                proc = subprocess.run([sys.executable, "-X", "importtime", *argumentos], cwd=diretorio,
+                                      stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                      text=True, errors="ignore")
+                duracoes.append(time.perf_counter() - inicio)
+            primeiro_nivel, modulos = _ler_importtime(proc.stderr)
+            duracoes.sort()
+            medicoes.append({
+                'comando': rotulo,
+                'codigo_saida': proc.returncode,
+                'duracao_s': duracoes[len(duracoes) // 2],
+                'importacoes_s': sum(primeiro_nivel.values()),
+                'modulos': modulos,
+                'pesados': [m for m in MODULOS_PESADOS if m in primeiro_nivel or
+                            any(nome.startswith(m + ".") for nome in primeiro_nivel)],
+                'mais_lentos': sorted(primeiro_nivel.items(), key=lambda item: -item[1])[:3]
+            })
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+    return medicoes
+
+def exibir_inicializacao(medicoes):
+    tabela = Table(title="⏱️  Inicialização por Comando (python -X importtime)")
+    tabela.add_column("Comando", style="cyan", no_wrap=True)
+    tabela.add_column("Saída", justify="right")
+    tabela.add_column("Tempo (s)", style="green", justify="right")
+    tabela.add_column("Importações (s)", style="yellow", justify="right")
+    tabela.add_column("Módulos", justify="right")
+    tabela.add_column("Bibliotecas pesadas", style="magenta")
+    tabela.add_column("Mais lento", style="dim")
+    for m in medicoes:
+        lentos = ", ".join(f"{nome} {s:.2f}s" for nome, s in m['mais_lentos'][:1])
+        tabela.add_row(m['comando'], str(m['codigo_saida']), f"{m['duracao_s']:.2f}", f"{m['importacoes_s']:.2f}",
+                       str(m['modulos']), ", ".join(m['pesados']) or "-", lentos)
+    console.print(tabela)
+
+def exibir_curvas(medicoes):
+    """Exibe tempo e memória por cenário/etapa."""
+    tabela = Table(title="📈 Curvas de Escala (tempo / memória)",
+                   caption="RSS: ao final da etapa; em pipeline_completo, pico amostrado do subprocesso")
+    tabela.add_column("Cenário", style="cyan")
+    tabela.add_column("Etapa", style="white")
+    tabela.add_column("Tempo (s)", style="green", justify="right")
+    tabela.add_column("Pico Python (MB)", style="yellow", justify="right")
+    tabela.add_column("RSS (MB)", style="magenta", justify="right")
+    for m in medicoes:
+        pico = f"{m['pico_memoria_mb']:.1f}" if m.get('pico_memoria_mb') is not None else "-"
+        rss = f"{m['rss_mb']:.1f}" if m.get('rss_mb') is not None else "-"
+        tabela.add_row(m['cenario'], m['etapa'], f"{m['duracao_s']:.3f}", pico, rss)
+    console.print(tabela)
+
+def exibir_comparacao(comparacoes):
+    tabela = Table(title="🔍 Comparação com Baseline")
+    tabela.add_column("Cenário", style="cyan")
+    tabela.add_column("Etapa", style="white")
+    tabela.add_column("Baseline (s)", justify="right")
+    tabela.add_column("Atual (s)", justify="right")
+    tabela.add_column("Razão", justify="right")
+    tabela.add_column("Status")
+    for c in comparacoes:
+        status = "[red]REGRESSÃO[/red]" if c['regressao'] else "[green]ok[/green]"
+        tabela.add_row(c['cenario'], c['etapa'], f"{c['baseline_s']:.3f}", f"{c['atual_s']:.3f}",
+                       f"{c['razao']:.2f}x", status)
+    console.print(tabela)
+
+def main(args=None):
+    if args is None:
+        args = analisar_argumentos("bench")
+
+    tamanhos = [int(t) for t in args.tamanhos.split(',') if t.strip()]
+    ts = datetime.now().strftime("%Y%m%d%H%M%S")
+    saida = args.saida or os.path.join("resultados", f"bench_{ts}.json")
+
+    console.print(Panel(f"🏁 [bold]DiscoverySpark Benchmark[/bold]\nTamanhos: {', '.join(map(str, tamanhos))}", style="blue"))
+
+    medicoes = []
+    primitivas = []
+    for n_pais in tamanhos:
+        cenario = f"pais={n_pais}"
+        console.print(f"\n[cyan]▶️  Cenário {cenario} (fanout={args.fanout}, colunas={args.colunas}, filhas={args.filhas})[/cyan]")
+        diretorio = tempfile.mkdtemp(prefix=f"dspark_bench_{n_pais}_")
+        try:
+            preparar_cenario(diretorio, n_pais, args.fanout, args.colunas, args.cardinalidade,
+                             args.esparsidade, args.filhas, args.seed)
+            parametros = {'cenario': cenario, 'n_pais': n_pais, 'n_filhas_linhas': n_pais * args.fanout}
+
+            if not args.sem_pipeline_completo:
+                medicoes.append({**parametros, **medir_pipeline_completo(diretorio)})
+
+            estagios, shape = medir_estagios(diretorio)
+            for m in estagios:
+                medicoes.append({**parametros, 'features': shape[1], **m})
+            console.print(f"[green]✓ {cenario}: matriz {shape[0]} x {shape[1]}[/green]")
+
+            if args.primitivas:
+                comparacoes = comparar_primitivas(diretorio)
+                exibir_primitivas(comparacoes, cenario)
+                primitivas.extend({'cenario': cenario, **c} for c in comparacoes)
+        finally:
+            if args.manter_dados:
+                console.print(f"[dim]Dados mantidos em {diretorio}[/dim]")
+            else:
+                shutil.rmtree(diretorio, ignore_errors=True)
+
+    if medicoes:
+        exibir_curvas(medicoes)
+
+    memoria_workers = []
+    if args.memoria_workers:
+        linhas, colunas = (int(v) for v in args.matriz_workers.lower().split('x'))
+        memoria_workers = medir_memoria_workers(linhas, colunas, args.workers, args.seed)
+        exibir_memoria_workers(memoria_workers)
+
+    inicializacao = []
+    if args.inicializacao:
+        inicializacao = medir_inicializacao()
+        exibir_inicializacao(inicializacao)
+
+    resultado = {
+        'metadados': {
+            'timestamp': ts,
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'parametros': vars(args)
+        },
+        'medicoes': medicoes,
+        'primitivas': primitivas,
+        'memoria_workers': memoria_workers,
+        'inicializacao': inicializacao
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    console.print(f"[green]✓ Resultados salvos em: {saida}[/green]")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        comparacoes = comparar_com_baseline(medicoes, baseline, args.tolerancia)
+        exibir_comparacao(comparacoes)
+        regressoes = [c for c in comparacoes if c['regressao']]
+        if regressoes:
+            console.print(f"[bold red]❌ {len(regressoes)} regressão(ões) de desempenho detectada(s).[/bold red]")
+            sys.exit(1)
+        console.print("[bold green]✅ Nenhuma regressão de desempenho em relação ao baseline.[/bold green]")
+
+if __name__ == "__main__":
+    main()
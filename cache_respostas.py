@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+
+class CacheRespostas:
+    """
+    Cache em disco das respostas da API, chaveado por (modelo, hash das mensagens, temperatura):
+    - Um arquivo JSON por resposta em `diretorio`, gravado de forma atômica
+    - Entradas expiram após `ttl_segundos`
+    - Quando o diretório passa de `tamanho_max_mb`, remove as entradas menos usadas (LRU por mtime)
+    O tamanho do diretório é mantido como total corrente (somado a cada gravação); o diretório só é
+    listado na abertura e quando o total passa do limite, o que também corrige entradas gravadas
+    ou removidas por outros processos.
+    """
+
+    def __init__(self, diretorio: str = ".cache_ia", ttl_segundos: float = 7 * 24 * 3600,
+                 tamanho_max_mb: float = 200):
+        self.diretorio = diretorio
+        self.ttl_segundos = ttl_segundos
+        self.tamanho_max_bytes = int(tamanho_max_mb * 1024 * 1024)
+        self.acertos = 0
+        self.falhas = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.diretorio, exist_ok=True)
+        self._total_bytes = sum(tamanho for _, tamanho, _ in self._listar())
+
+    @staticmethod
+    def gerar_chave(model: str, messages: List[Dict[str, str]], temperature: float) -> str:
+        hash_mensagens = hashlib.sha256(
+            json.dumps(messages, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        return hashlib.sha256(f"{model}|{hash_mensagens}|{temperature}".encode("utf-8")).hexdigest()
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, f"{chave}.json")
+
+    def obter(self, chave: str) -> Optional[str]:
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                entrada = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.falhas += 1
+            return None
+
+        if time.time() - entrada.get("criado_em", 0) > self.ttl_segundos:
+            self._remover(caminho)
+            with self._lock:
+                self.falhas += 1
+            return None
+
+        # Atualiza o mtime para a política LRU
+        try:
+            os.utime(caminho, None)
+        except OSError:
+            pass
+        with self._lock:
+            self.acertos += 1
+        return entrada.get("resposta")
+
+    def gravar(self, chave: str, model: str, resposta: str):
+        entrada = {"criado_em": time.time(), "model": model, "resposta": resposta}
+        caminho = self._caminho(chave)
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(entrada, f, ensure_ascii=False)
+        tamanho = os.path.getsize(temporario)
+        with self._lock:
+            try:
+                anterior = os.path.getsize(caminho)
+            except OSError:
+                anterior = 0
+            os.replace(temporario, caminho)
+            self._total_bytes += tamanho - anterior
+            excedeu = self._total_bytes > self.tamanho_max_bytes
+        if excedeu:
+            self._evitar_excesso()
+
+    def _listar(self):
+        """(mtime, tamanho, caminho) de cada entrada do diretório."""
+        entradas = []
+        for nome in os.listdir(self.diretorio):
+            if not nome.endswith(".json"):
+                continue
+            caminho = os.path.join(self.diretorio, nome)
+            try:
+                info = os.stat(caminho)
+            except OSError:
+                continue
+            entradas.append((info.st_mtime, info.st_size, caminho))
+        return entradas
+
+    def _remover(self, caminho: str):
+        with self._lock:
+            try:
+                tamanho = os.path.getsize(caminho)
+                os.remove(caminho)
+            except OSError:
+                return
+            self._total_bytes -= tamanho
+
+    def _evitar_excesso(self):
+        """Remove as entradas mais antigas (por último acesso) até caber no tamanho máximo."""
+        with self._lock:
+            entradas = self._listar()
+            total = sum(tamanho for _, tamanho, _ in entradas)
+            for _, tamanho, caminho in sorted(entradas):
+                if total <= self.tamanho_max_bytes:
+                    break
+                try:
+                    os.remove(caminho)
+                    total -= tamanho
+                except OSError:
+                    continue
+            self._total_bytes = total
+
+    def limpar(self):
+        """Remove todas as entradas do cache."""
+        for _, _, caminho in self._listar():
+            self._remover(caminho)
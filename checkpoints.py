@@ -0,0 +1,203 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+import platform
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+import joblib
+
+from padroes import RAIZ_EXECUCOES
+
+MANIFESTO = "manifesto.json"
+
+
+class CheckpointInvalido(Exception):
+    """Checkpoint ausente, corrompido ou de outra versão do ambiente."""
+
+
+def _versoes():
+    """Versões que mudam o formato dos objetos serializados (pickles de outra versão podem não abrir)."""
+    versoes = {'python': platform.python_version()}
+    for modulo in ("pandas", "numpy", "sklearn", "featuretools"):
+        try:
+            versoes[modulo] = __import__(modulo).__version__
+        except ImportError:
+            versoes[modulo] = None
+    return versoes
+
+
+def _sha256(caminho, bloco=8 * 1024 * 1024):
+    resumo = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for parte in iter(lambda: f.read(bloco), b""):
+            resumo.update(parte)
+    return resumo.hexdigest()
+
+
+def _gravar_atomico(caminho, gravar: Callable[[str], None]):
+    """Grava em um arquivo temporário ao lado do destino e renomeia: uma falha no meio nunca deixa meio arquivo."""
+    temporario = f"{caminho}.tmp"
+    gravar(temporario)
+    os.replace(temporario, caminho)
+
+
+class SemCheckpoint:
+    """Mesma interface de ExecucaoCheckpoint, sem gravar nada (execuções sem --resume/checkpoints)."""
+
+    run_id = None
+
+    def concluida(self, nome: str) -> bool:
+        return False
+
+    def etapa(self, nome: str, calcular: Callable[[], Any]) -> Any:
+        return calcular()
+
+    def carregar(self, nome: str) -> Any:
+        raise CheckpointInvalido(f"Etapa '{nome}' sem checkpoint (execução sem checkpoints)")
+
+
+class ExecucaoCheckpoint:
+    """
+    Diretório de uma execução (resultados/execucoes/<run_id>/) com um checkpoint por etapa:
+    - Cada etapa concluída vira <etapa>.joblib, gravado de forma atômica (temporário + rename)
+    - O manifesto guarda os argumentos da execução, a assinatura dos datasets, as versões das
+      bibliotecas e, por etapa, o arquivo, o tamanho e o SHA-256
+    - Ao retomar, um checkpoint só é usado se o arquivo existe e tamanho e SHA-256 conferem;
+      caso contrário a etapa é recalculada. Datasets alterados ou outras versões das bibliotecas
+      invalidam todos os checkpoints
+    Resultados None (ex.: exportação que falhou) não são gravados: a etapa roda de novo ao retomar.
+    """
+
+    def __init__(self, run_id: str, argumentos: Optional[Dict[str, Any]] = None, assinatura=None,
+                 raiz: str = RAIZ_EXECUCOES, console=None):
+        self.run_id = run_id
+        self.diretorio = os.path.join(raiz, run_id)
+        self.console = console
+        self._caminho_manifesto = os.path.join(self.diretorio, MANIFESTO)
+        self._verificadas = set()
+        os.makedirs(self.diretorio, exist_ok=True)
+        if os.path.exists(self._caminho_manifesto):
+            with open(self._caminho_manifesto, "r", encoding="utf-8") as f:
+                self.manifesto = json.load(f)
+        else:
+            self.manifesto = {'run_id': run_id, 'criado_em': datetime.now().isoformat(timespec='seconds'),
+                              'argumentos': argumentos or {}, 'etapas': {}}
+        self.manifesto['versoes'] = self.manifesto.get('versoes') or _versoes()
+        if assinatura is not None:
+            self.manifesto['assinatura'] = self.manifesto.get('assinatura') or [list(a) for a in assinatura]
+        self._salvar_manifesto()
+
+    @classmethod
+    def retomar(cls, run_id: str, raiz: str = RAIZ_EXECUCOES, console=None) -> "ExecucaoCheckpoint":
+        if not os.path.exists(os.path.join(raiz, run_id, MANIFESTO)):
+            raise CheckpointInvalido(f"Execução '{run_id}' não encontrada em {raiz}")
+        return cls(run_id, raiz=raiz, console=console)
+
+    @property
+    def argumentos(self) -> Dict[str, Any]:
+        return self.manifesto['argumentos']
+
+    def _avisar(self, mensagem):
+        if self.console is not None:
+            self.console.print(mensagem)
+
+    def _salvar_manifesto(self):
+        def gravar(caminho):
+            with open(caminho, "w", encoding="utf-8") as f:
+                json.dump(self.manifesto, f, ensure_ascii=False, indent=2, default=str)
+        _gravar_atomico(self._caminho_manifesto, gravar)
+
+    def validar_ambiente(self, assinatura) -> bool:
+        """Descarta todos os checkpoints se os datasets ou as versões das bibliotecas mudaram. Retorna se ainda valem."""
+        motivo = None
+        if self.manifesto.get('versoes') != _versoes():
+            motivo = "versões das bibliotecas diferentes"
+        elif assinatura is not None and self.manifesto.get('assinatura') != [list(a) for a in assinatura]:
+            motivo = "datasets alterados desde a execução original"
+        if motivo is None:
+            return True
+        self._avisar(f"[yellow]⚠️  Checkpoints de '{self.run_id}' descartados ({motivo}): todas as etapas serão refeitas[/yellow]")
+        for registro in self.manifesto['etapas'].values():
+            caminho = os.path.join(self.diretorio, registro['arquivo'])
+            if os.path.exists(caminho):
+                os.remove(caminho)
+        self.manifesto['etapas'] = {}
+        self._verificadas.clear()
+        self.manifesto['versoes'] = _versoes()
+        if assinatura is not None:
+            self.manifesto['assinatura'] = [list(a) for a in assinatura]
+        self._salvar_manifesto()
+        return False
+
+    def _arquivo(self, nome):
+        return re.sub(r"[^\w.-]", "_", nome) + ".joblib"
+
+    def concluida(self, nome: str) -> bool:
+        """
+        A etapa tem checkpoint íntegro (arquivo presente, tamanho e SHA-256 iguais aos do manifesto).
+        Cada arquivo é verificado uma vez por processo.
+        """
+        registro = self.manifesto['etapas'].get(nome)
+        if registro is None:
+            return False
+        if nome in self._verificadas:
+            return True
+        caminho = os.path.join(self.diretorio, registro['arquivo'])
+        if not os.path.exists(caminho):
+            problema = "arquivo ausente"
+        elif os.path.getsize(caminho) != registro['bytes']:
+            problema = "tamanho diferente"
+        elif _sha256(caminho) != registro['sha256']:
+            problema = "SHA-256 diferente"
+        else:
+            self._verificadas.add(nome)
+            return True
+        self._avisar(f"[yellow]⚠️  Checkpoint da etapa '{nome}' inválido ({problema}): a etapa será refeita[/yellow]")
+        del self.manifesto['etapas'][nome]
+        self._salvar_manifesto()
+        return False
+
+    def salvar(self, nome: str, valor: Any):
+        arquivo = self._arquivo(nome)
+        caminho = os.path.join(self.diretorio, arquivo)
+        _gravar_atomico(caminho, lambda temporario: joblib.dump(valor, temporario))
+        self.manifesto['etapas'][nome] = {
+            'arquivo': arquivo,
+            'bytes': os.path.getsize(caminho),
+            'sha256': _sha256(caminho),
+            'concluida_em': datetime.now().isoformat(timespec='seconds')
+        }
+        self._verificadas.add(nome)
+        self._salvar_manifesto()
+
+    def carregar(self, nome: str) -> Any:
+        if not self.concluida(nome):
+            raise CheckpointInvalido(f"Etapa '{nome}' sem checkpoint válido em {self.diretorio}")
+        self._avisar(f"[cyan]↩️  Etapa '{nome}' retomada do checkpoint[/cyan]")
+        return joblib.load(os.path.join(self.diretorio, self.manifesto['etapas'][nome]['arquivo']))
+
+    def etapa(self, nome: str, calcular: Callable[[], Any]) -> Any:
+        """Devolve o checkpoint da etapa se íntegro; senão calcula, grava e devolve."""
+        if self.concluida(nome):
+            return self.carregar(nome)
+        valor = calcular()
+        if valor is not None:
+            self.salvar(nome, valor)
+        return valor
+
+    def descartar(self, *nomes: str):
+        """Invalida etapas (ex.: as que dependem de um argumento alterado ao retomar)."""
+        for nome in nomes:
+            registro = self.manifesto['etapas'].pop(nome, None)
+            self._verificadas.discard(nome)
+            if registro is not None:
+                caminho = os.path.join(self.diretorio, registro['arquivo'])
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+        self._salvar_manifesto()
+
+    def remover(self):
+        shutil.rmtree(self.diretorio, ignore_errors=True)
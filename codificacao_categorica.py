@@ -0,0 +1,102 @@
+from typing import Dict, List, Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Rótulo das categorias nulas (astype(str) as transformaria no texto 'nan')
+CATEGORIA_AUSENTE = "(ausente)"
+
+
+def colunas_categoricas(df: pd.DataFrame, max_fracao_unicos: float = 0.5) -> List[str]:
+    """Colunas texto/categoria da matriz de features, exceto identificadores (quase um valor por linha)."""
+    candidatas = df.select_dtypes(include=['object', 'string', 'category']).columns
+    limite = max(2, int(len(df) * max_fracao_unicos))
+    return [c for c in candidatas if 1 < df[c].nunique(dropna=False) <= limite]
+
+
+def _rotulos(serie: pd.Series) -> pd.Series:
+    """Categorias como texto, com os nulos em CATEGORIA_AUSENTE."""
+    return serie.astype(object).where(serie.notna(), CATEGORIA_AUSENTE).astype(str)
+
+
+def codificar_target_oof(df: pd.DataFrame, y: pd.Series, colunas: List[str], n_folds: int = 5,
+                         suavizacao: float = 10.0, seed: int = 123) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Target encoding fora da dobra (out-of-fold), uma coluna float32 por categórica:
+    - Cada categoria vira um código inteiro (pd.factorize; nulos formam a categoria CATEGORIA_AUSENTE)
+    - Somas e contagens por (dobra, categoria) saem de um único np.bincount sobre `dobra * k + código`
+    - A linha recebe a média do target da sua categoria calculada só nas outras dobras,
+      suavizada em direção à média global (`suavizacao` linhas de peso), sem vazar o próprio target
+    Nenhuma matriz one-hot é criada: a memória é O(linhas x colunas categóricas).
+    """
+    n = len(df)
+    valores_y = y.to_numpy(dtype=np.float64)
+    media_global = valores_y.mean() if n else 0.0
+    dobras = np.random.default_rng(seed).permutation(n) % n_folds
+
+    codificadas = {}
+    categorias = {}
+    for coluna in colunas:
+        codigos, uniques = pd.factorize(_rotulos(df[coluna]))
+        k = len(uniques)
+        chave = dobras * k + codigos
+        soma = np.bincount(chave, weights=valores_y, minlength=n_folds * k).reshape(n_folds, k)
+        contagem = np.bincount(chave, minlength=n_folds * k).reshape(n_folds, k)
+        # Fora da dobra = total da categoria menos a própria dobra
+        soma_fora = soma.sum(axis=0) - soma
+        contagem_fora = contagem.sum(axis=0) - contagem
+        medias = (soma_fora + suavizacao * media_global) / (contagem_fora + suavizacao)
+        codificadas[coluna] = medias[dobras, codigos].astype(np.float32)
+        categorias[coluna] = k
+
+    resultado = pd.DataFrame(codificadas, index=df.index)
+    info = {
+        'colunas': len(colunas),
+        'categorias': int(sum(categorias.values())),
+        # Tamanho do bloco codificado devolvido (não é o pico de memória da codificação)
+        'bloco_mb': resultado.memory_usage(index=False).sum() / (1024 * 1024),
+        # Estimativa do equivalente one-hot denso em float64 (linhas x categorias x 8 bytes), só para comparação
+        'one_hot_estimado_mb': n * sum(categorias.values()) * 8 / (1024 * 1024)
+    }
+    return resultado, info
+
+
+def tabela_codificacao(df: pd.DataFrame, y: pd.Series, colunas: List[str],
+                       suavizacao: float = 10.0) -> Dict[str, Dict[str, Any]]:
+    """
+    Médias suavizadas por categoria com todas as linhas, para codificar entidades novas na pontuação
+    (no treino cada linha usa a versão fora da dobra de codificar_target_oof).
+    """
+    valores_y = y.to_numpy(dtype=np.float64)
+    media_global = float(valores_y.mean()) if len(valores_y) else 0.0
+    tabela = {}
+    for coluna in colunas:
+        agrupado = pd.Series(valores_y, index=df.index).groupby(_rotulos(df[coluna])).agg(['sum', 'count'])
+        medias = (agrupado['sum'] + suavizacao * media_global) / (agrupado['count'] + suavizacao)
+        tabela[coluna] = {'valores': medias.to_dict(), 'padrao': media_global}
+    return tabela
+
+
+def aplicar_codificacao(df: pd.DataFrame, tabela: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+    """Codifica as categóricas de `df` com a tabela do treino; categorias novas recebem a média global."""
+    codificadas = {}
+    for coluna, info in tabela.items():
+        if coluna in df.columns:
+            valores = _rotulos(df[coluna]).map(info['valores'])
+            codificadas[coluna] = valores.astype(np.float64).fillna(info['padrao']).astype(np.float32)
+        else:
+            codificadas[coluna] = np.full(len(df), info['padrao'], dtype=np.float32)
+    return pd.DataFrame(codificadas, index=df.index)
+
+
+def descrever_categorias(info: Dict[str, Any]) -> str:
+    """
+    Direção de uma categórica codificada: categorias de maior e de menor média do target.
+    A correlação da coluna codificada com o target é positiva por construção e não diz nada.
+    """
+    valores = info['valores']
+    if not valores:
+        return "sem categorias"
+    maior = max(valores, key=valores.get)
+    menor = min(valores, key=valores.get)
+    return f"maior com '{maior}', menor com '{menor}'"
@@ -0,0 +1,174 @@
+import os
+import re
+import json
+from typing import Dict, List, Any, Optional
+
+# Aproximação de tokens para textos em português (~4 caracteres por token).
+# Evita depender de um tokenizer específico do modelo.
+CARACTERES_POR_TOKEN = 4
+
+
+def estimar_tokens(texto: str) -> int:
+    return (len(texto) + CARACTERES_POR_TOKEN - 1) // CARACTERES_POR_TOKEN
+
+
+def carregar_resultados_estruturados(arquivo_md: str) -> Optional[Dict[str, Any]]:
+    """Carrega o result_<projeto>_<ts>.json gravado pelo app.py ao lado do relatório .md, se existir."""
+    caminho_json = os.path.splitext(arquivo_md)[0] + ".json"
+    if not os.path.exists(caminho_json):
+        return None
+    try:
+        with open(caminho_json, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def colunas_relevantes(resultados: Optional[Dict[str, Any]], limite: int = 15) -> List[str]:
+    """Targets e principais drivers da execução, na ordem de importância (sem repetições)."""
+    if not resultados:
+        return []
+    colunas = list(resultados.get('individual', {}).keys())
+    rankings = [r['ranking'] for r in resultados.get('individual', {}).values()]
+    # Intercala os rankings dos targets para que todos tenham seus drivers representados
+    for posicao in range(max((len(r) for r in rankings), default=0)):
+        for ranking in rankings:
+            if posicao < len(ranking) and ranking[posicao]['Feature'] not in colunas:
+                colunas.append(ranking[posicao]['Feature'])
+    return colunas[:limite]
+
+
+class ConstrutorPrompt:
+    """
+    Monta o conteúdo do prompt dentro de um orçamento de tokens:
+    - Quebra o material em seções com prioridade e linhas já ordenadas por importância
+    - Preenche o orçamento pelas seções mais prioritárias, truncando as linhas menos importantes
+    """
+
+    def __init__(self, orcamento_tokens: int = 6000):
+        self.orcamento_tokens = orcamento_tokens
+
+    def secoes_de_resultados(self, resultados: Dict[str, Any], foco: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Seções a partir dos resultados estruturados (.json) da execução."""
+        individuais = resultados.get('individual', {})
+        secoes = [{
+            'titulo': f"# Relatório: {resultados.get('projeto', '').upper()}",
+            'cabecalho': [f"Alvos analisados: {', '.join(individuais.keys())} | Tipo: {resultados.get('tipo', '')}"],
+            'linhas': [],
+            'prioridade': 100
+        }]
+
+        for alvo, dados in individuais.items():
+            linhas = []
+            for i, item in enumerate(sorted(dados['ranking'], key=lambda x: x['Importance'], reverse=True), 1):
+                if item.get('Direcao'):
+                    # Categórica codificada: sem correlação linear, só as categorias extremas
+                    direcao, tendencia = "categórica", f"{alvo} {item['Direcao']}"
+                else:
+                    relacao = "aumenta" if item['Correlation'] > 0 else "diminui"
+                    direcao, tendencia = f"correlação {item['Correlation']:+.3f}", f"quanto maior, mais {relacao} {alvo}"
+                linhas.append(
+                    f"#{i} {item.get('Descricao', item['Feature'])} [{item['Feature']}] | "
+                    f"impacto {item['Importance']:.2%} | {direcao} | "
+                    f"MI {item.get('MutualInfo', 0.0):.1%} "
+                    f"({tendencia})"
+                )
+            secoes.append({
+                'titulo': f"## Drivers de {alvo} ({dados['tipo']})",
+                'cabecalho': [],
+                'linhas': linhas,
+                # O target em foco vem primeiro; os demais ficam como contexto
+                'prioridade': 90 if foco in (None, alvo) else 40
+            })
+
+        multivariate = resultados.get('multivariate') or {}
+        interacoes = sorted(multivariate.get('target_interactions', []),
+                            key=lambda x: abs(x['Correlation']), reverse=True)
+        if interacoes:
+            secoes.append({
+                'titulo': "## Interações entre targets",
+                'cabecalho': [],
+                'linhas': [f"{i['Target1']} x {i['Target2']}: {i['Correlation']:+.3f} ({i['Strength']}, {i['Direction']})"
+                           for i in interacoes],
+                'prioridade': 70
+            })
+        insights = sorted(multivariate.get('multivariate_insights', []),
+                          key=lambda x: (x['StrongTargets'], x['AvgImpact']), reverse=True)
+        if insights:
+            secoes.append({
+                'titulo': "## Features que influenciam múltiplos targets",
+                'cabecalho': [],
+                'linhas': [
+                    f"{i.get('Descricao', i['Feature'])} | {i['Pattern']} | impacto médio {i['AvgImpact']:.3f} | "
+                    + ", ".join(f"{t}: {c:+.2f}" for t, c in i['Correlations'].items())
+                    for i in insights
+                ],
+                'prioridade': 60
+            })
+        return secoes
+
+    def secoes_de_markdown(self, md_content: str) -> List[Dict[str, Any]]:
+        """Seções a partir do relatório .md (quando não há resultados estruturados)."""
+        secoes = []
+        atual = {'titulo': "", 'cabecalho': [], 'linhas': [], 'prioridade': 100}
+        for linha in md_content.splitlines():
+            if re.match(r"^#{1,3} ", linha):
+                if atual['titulo'] or atual['linhas'] or atual['cabecalho']:
+                    secoes.append(atual)
+                atual = {'titulo': linha, 'cabecalho': [], 'linhas': [], 'prioridade': self._prioridade_titulo(linha)}
+            elif not linha.strip() or linha.strip() in ("---", "--- "):
+                continue
+            elif linha.startswith("|") and (not atual['linhas']) and (
+                    len(atual['cabecalho']) < 2 or set(linha.replace("|", "").strip()) <= set(":- ")):
+                # Cabeçalho e separador de tabela acompanham o título
+                atual['cabecalho'].append(linha)
+            else:
+                atual['linhas'].append(linha)
+        if atual['titulo'] or atual['linhas'] or atual['cabecalho']:
+            secoes.append(atual)
+        return secoes
+
+    @staticmethod
+    def _prioridade_titulo(titulo: str) -> int:
+        if titulo.startswith("# "):
+            return 100
+        if "Análise Individual" in titulo or "Top 10" in titulo:
+            return 90
+        if "Interações" in titulo:
+            return 70
+        if "Multivariad" in titulo:
+            return 60
+        if "Sumário" in titulo:
+            return 50
+        return 30
+
+    def compactar(self, secoes: List[Dict[str, Any]], orcamento_tokens: Optional[int] = None) -> str:
+        """Seleciona seções e linhas por prioridade até esgotar o orçamento de tokens."""
+        orcamento = self.orcamento_tokens if orcamento_tokens is None else orcamento_tokens
+        restante = orcamento
+        escolhidas = []
+        omitidas = 0
+        for indice, secao in sorted(enumerate(secoes), key=lambda x: (-x[1]['prioridade'], x[0])):
+            bloco = [l for l in [secao['titulo']] + secao['cabecalho'] if l]
+            custo_bloco = estimar_tokens("\n".join(bloco)) + 1
+            if custo_bloco > restante:
+                omitidas += len(secao['linhas'])
+                continue
+            restante -= custo_bloco
+            linhas = []
+            for linha in secao['linhas']:
+                custo = estimar_tokens(linha) + 1
+                if custo > restante:
+                    break
+                linhas.append(linha)
+                restante -= custo
+            omitidas += len(secao['linhas']) - len(linhas)
+            if linhas or not secao['linhas']:
+                escolhidas.append((indice, "\n".join(bloco + linhas)))
+
+        # Mantém a ordem original do relatório entre as seções escolhidas
+        texto = "\n\n".join(t for _, t in sorted(escolhidas))
+        if omitidas:
+            texto += f"\n\n[{omitidas} linha(s) de menor importância omitida(s) para caber no orçamento de {orcamento} tokens]"
+        return texto
+
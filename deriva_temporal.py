@@ -0,0 +1,134 @@
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from janelas_temporais import OrdenacaoTemporal, agregar_janelas
+from padroes import FREQUENCIAS, PERIODOS_PADRAO
+
+COLUNA_PERIODO = "periodo_analise"
+
+
+def rotular_periodos(datas: pd.Series, frequencia: str) -> pd.Series:
+    """Rótulo texto do período de cada data ('2025-03' ou '2025-03-03/2025-03-09'); ordena cronologicamente."""
+    return pd.to_datetime(datas).dt.to_period(FREQUENCIAS[frequencia]).astype(str)
+
+
+def cortes_por_periodo(datas: pd.Series, frequencia: str, n_periodos: int = PERIODOS_PADRAO) -> Dict[str, pd.Timestamp]:
+    """Fim (último segundo) de cada um dos `n_periodos` períodos mais recentes cobertos por `datas`."""
+    periodos = pd.period_range(datas.min(), datas.max(), freq=FREQUENCIAS[frequencia])[-n_periodos:]
+    return {str(p): p.end_time.floor('s') for p in periodos}
+
+
+def matriz_por_cortes(pai: pd.DataFrame, chave_pai: str, filhas: List[Tuple[str, pd.DataFrame, str, str]],
+                      cortes: Dict[str, pd.Timestamp], janelas: Sequence[int]) -> pd.DataFrame:
+    """
+    Matriz longa (entidade x período) com as colunas da tabela pai e as features de janela
+    de cada filha calculadas no corte de cada período. `filhas` = [(nome, df, chave, coluna_data)].
+    A ordenação por (chave, data) de cada filha é feita uma vez e reaproveitada em todos os cortes,
+    de modo que cada período custa só os searchsorted e as somas acumuladas.
+    """
+    chaves_pai = pd.Index(pai[chave_pai])
+    estaticas = pai.set_index(chave_pai)
+    ordenacoes = {nome: OrdenacaoTemporal(df[chave], df[coluna_data], chaves_pai)
+                  for nome, df, chave, coluna_data in filhas}
+    blocos = []
+    for rotulo, corte in cortes.items():
+        partes = [estaticas]
+        for nome, df, chave, coluna_data in filhas:
+            partes.append(agregar_janelas(df, nome, chave, coluna_data, chaves_pai, corte=corte,
+                                          janelas=janelas, ordenacao=ordenacoes[nome]))
+        bloco = pd.concat(partes, axis=1)
+        bloco[COLUNA_PERIODO] = rotulo
+        blocos.append(bloco)
+    return pd.concat(blocos)
+
+
+def _target_numerico(serie: pd.Series) -> np.ndarray:
+    numerico = pd.to_numeric(serie, errors='coerce')
+    if numerico.isna().all() and serie.notna().any():
+        numerico = pd.Series(pd.factorize(serie)[0], index=serie.index).astype(float)
+    return numerico.fillna(0).to_numpy(dtype=np.float64)
+
+
+def estatisticas_por_periodo(segmentada, target: str, colunas: List[str], bloco: int = 256) -> Dict[str, np.ndarray]:
+    """
+    Estatísticas suficientes de cada período (n, Σx, Σx², Σy, Σy², Σxy) para todas as colunas.
+    Os períodos já são fatias contíguas da matriz segmentada: cada soma percorre uma visão da fatia.
+    As colunas são processadas em blocos para limitar as matrizes temporárias.
+    """
+    fatias = list(segmentada.fatias.values())
+    k = len(fatias)
+    stats = {
+        'n': np.array([f.stop - f.start for f in fatias], dtype=np.float64),
+        'sy': np.empty(k), 'syy': np.empty(k),
+        'sx': np.empty((k, len(colunas))), 'sxx': np.empty((k, len(colunas))), 'sxy': np.empty((k, len(colunas))),
+    }
+    for i, fatia in enumerate(fatias):
+        matriz = segmentada.matriz.iloc[fatia]
+        y = _target_numerico(matriz[target])
+        stats['sy'][i] = y.sum()
+        stats['syy'][i] = y @ y
+        for j in range(0, len(colunas), bloco):
+            X = matriz[colunas[j:j + bloco]].to_numpy(dtype=np.float64, na_value=np.nan)
+            X[~np.isfinite(X)] = 0.0
+            stats['sx'][i, j:j + bloco] = X.sum(axis=0)
+            stats['sxx'][i, j:j + bloco] = np.einsum('ij,ij->j', X, X)
+            stats['sxy'][i, j:j + bloco] = y @ X
+    return stats
+
+
+def correlacoes_moveis(stats: Dict[str, np.ndarray], periodos: List[str], colunas: List[str],
+                       janela: int = 1) -> pd.DataFrame:
+    """
+    Correlação de Pearson de cada coluna com o target em janelas móveis de `janela` períodos.
+    Somas acumuladas das estatísticas suficientes fazem de cada janela uma diferença (fim - início),
+    sem reler as linhas dos períodos que se sobrepõem.
+    """
+    def acumular(valores):
+        return np.concatenate([np.zeros((1,) + valores.shape[1:]), np.cumsum(valores, axis=0)])
+
+    acumulados = {k: acumular(v) for k, v in stats.items()}
+    fins = np.arange(1, len(periodos) + 1)
+    inicios = np.maximum(fins - janela, 0)
+    janela_stats = {k: v[fins] - v[inicios] for k, v in acumulados.items()}
+
+    n = janela_stats['n'][:, None]
+    sy = janela_stats['sy'][:, None]
+    syy = janela_stats['syy'][:, None]
+    covariancia = n * janela_stats['sxy'] - janela_stats['sx'] * sy
+    variancia_x = n * janela_stats['sxx'] - janela_stats['sx'] ** 2
+    variancia_y = n * syy - sy ** 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlacao = covariancia / np.sqrt(variancia_x * variancia_y)
+    correlacao[~np.isfinite(correlacao)] = 0.0
+    return pd.DataFrame(np.clip(correlacao, -1.0, 1.0), index=periodos, columns=colunas)
+
+
+def tabela_deriva(resultado: Dict[str, Any], target: str, top: int = 5,
+                  correlacoes: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Posição no ranking de importância de cada período para as features que aparecem no Top `top`
+    de algum período. Fora do Top 10 fica vazio. `variacao` = posições ganhas do penúltimo para o último
+    período (fora do Top 10 conta como 11); `correlacao_ultima` vem das correlações móveis.
+    """
+    periodos = [p for p in resultado['segmentos'] if target in resultado['segmentos'][p]]
+    posicoes = {}
+    destaque = set()
+    for periodo in periodos:
+        ranking = resultado['segmentos'][periodo][target]['ranking']
+        posicoes[periodo] = pd.Series(np.arange(1, len(ranking) + 1), index=ranking['Feature'])
+        destaque.update(ranking['Feature'].head(top))
+    if not destaque:
+        return pd.DataFrame()
+
+    tabela = pd.DataFrame(posicoes).reindex(sorted(destaque))[periodos]
+    if len(periodos) >= 2:
+        anterior = tabela[periodos[-2]].fillna(11)
+        ultima = tabela[periodos[-1]].fillna(11)
+        tabela['variacao'] = anterior - ultima
+    else:
+        tabela['variacao'] = 0.0
+    if correlacoes is not None and periodos:
+        tabela['correlacao_ultima'] = correlacoes.reindex(index=[periodos[-1]], columns=tabela.index).iloc[0].to_numpy()
+    return tabela.sort_values(by=periodos[-1], na_position='last')
@@ -0,0 +1,259 @@
+"""
+Ponto de entrada único do DiscoverySpark:
+
+    python discoveryspark.py <subcomando> [opções]     (ou ./discoveryspark <subcomando> [opções])
+
+Os parsers de todos os subcomandos ficam aqui e só dependem da biblioteca padrão e de padroes.py:
+--help, erros de argumento e mapeamento ausente respondem sem carregar pandas, featuretools ou
+sklearn. O módulo do subcomando escolhido só é importado depois que os argumentos foram validados.
+Cada módulo continua executável diretamente (python app.py ...) com o mesmo parser.
+
+Uso como biblioteca: `from discoveryspark import DiscoverySpark` (ver motor.py); o motor só é
+importado quando o nome é acessado.
+"""
+import os
+import sys
+import argparse
+import importlib
+
+from padroes import (MAPEAMENTO_PADRAO, RAIZ_EXECUCOES, POLITICAS_TARGETS, FREQUENCIAS, PERIODOS_PADRAO, ORCAMENTO_S,
+                     MODOS_REAMOSTRAGEM, LIMIAR_PADRAO, MIN_LINHAS_SEGMENTO)
+
+
+def _argumentos_run(parser):
+    parser.add_argument("--projeto", default=None)
+    parser.add_argument("--target", default=None)
+    parser.add_argument("--resume", default=None, metavar="RUN_ID",
+                        help="Retoma uma execução que falhou a partir da última etapa concluída (mesmos argumentos)")
+    parser.add_argument("--checkpoint", action="store_true",
+                        help="Grava checkpoints das etapas em resultados/execucoes/ para retomar com --resume")
+    parser.add_argument("--manter-checkpoints", action="store_true",
+                        help="Com --checkpoint, mantém os checkpoints mesmo quando a execução termina com sucesso")
+    parser.add_argument("--profile", action="store_true",
+                        help="Grava saídas do cProfile (.prof/.txt) das etapas mais pesadas em /resultados")
+    parser.add_argument("--memoria", action="store_true",
+                        help="Mede o pico de memória Python de cada etapa com tracemalloc (execução bem mais lenta)")
+    parser.add_argument("--mostrar-tipos", action="store_true",
+                        help="Lista o dtype de cada coluna das tabelas carregadas (padrão: resumo por dtype)")
+    parser.add_argument("--datasets", default="datasets",
+                        help="Pasta das tabelas do mapeamento (ex.: datasets_escala, gerada por gerar_dados.py --escala)")
+    parser.add_argument("--janelas", default="30,90",
+                        help="Janelas em dias para features temporais das tabelas filhas (vazio desativa)")
+    parser.add_argument("--data-corte", default=None,
+                        help="Data de referência das janelas (padrão: data mais recente de cada filha)")
+    parser.add_argument("--politica", choices=POLITICAS_TARGETS, default=None,
+                        help="Decide sem perguntar o que fazer com targets sinalizados (padrão: pergunta)")
+    modo = parser.add_mutually_exclusive_group()
+    modo.add_argument("--by", dest="por", default=None,
+                      help="Coluna de segmento: ranking de drivers de cada segmento, em paralelo (ex.: segmento)")
+    modo.add_argument("--period", dest="periodo", choices=list(FREQUENCIAS), default=None,
+                      help="Deriva dos drivers entre períodos (mensal ou semanal)")
+    parser.add_argument("--periodos", type=int, default=PERIODOS_PADRAO,
+                        help="Quantidade de períodos mais recentes analisados em --period")
+    parser.add_argument("--janela-periodos", type=int, default=3,
+                        help="Períodos em cada janela móvel das correlações em --period")
+    parser.add_argument("--pre-filtro-mi", type=int, default=None,
+                        help="Treina cada modelo só com as N features de maior informação mútua com o target")
+    parser.add_argument("--orcamento-interacoes", type=float, default=ORCAMENTO_S,
+                        help="Segundos por target para verificar interações entre os principais drivers (0 desativa)")
+    parser.add_argument("--estabilidade", type=int, default=None, metavar="B",
+                        help="Mede a estabilidade do Top 10 ajustando B florestas em reamostras (pool de processos)")
+    parser.add_argument("--modo-estabilidade", choices=MODOS_REAMOSTRAGEM, default="bootstrap",
+                        help="Reamostragem usada por --estabilidade (padrão: bootstrap)")
+    parser.add_argument("--redundancia", action="store_true",
+                        help="Correlação feature x feature em blocos: pares mais correlacionados e grupos redundantes")
+    parser.add_argument("--limiar-redundancia", type=float, default=LIMIAR_PADRAO,
+                        help="|Correlação| mínima para duas features serem consideradas redundantes")
+    parser.add_argument("--min-segmento", type=int, default=MIN_LINHAS_SEGMENTO,
+                        help="Segmentos com menos linhas que isso são ignorados em --by")
+
+
+def _validar_run(parser, args):
+    if not args.resume and (not args.projeto or not args.target):
+        parser.error("--projeto e --target são obrigatórios (exceto com --resume)")
+    if args.manter_checkpoints and not (args.checkpoint or args.resume):
+        parser.error("--manter-checkpoints requer --checkpoint")
+    if args.resume and not os.path.isdir(os.path.join(RAIZ_EXECUCOES, args.resume)):
+        parser.error(f"Execução '{args.resume}' não encontrada em {RAIZ_EXECUCOES}")
+    try:
+        [int(j) for j in args.janelas.split(',') if j.strip()]
+    except ValueError:
+        parser.error(f"--janelas deve ser uma lista de dias separados por vírgula (recebido: {args.janelas!r})")
+    _validar_mapeamento(parser)
+
+
+def _validar_mapeamento(parser, caminho=MAPEAMENTO_PADRAO):
+    if not os.path.isfile(caminho):
+        parser.error(f"mapeamento não encontrado: {caminho} "
+                     f"(uma linha no formato tabela:pai|id#tabela:filho|id)")
+
+
+def _argumentos_deep_analysis(parser):
+    parser.add_argument("--concorrencia", type=int, default=4,
+                        help="Máximo de chamadas simultâneas à API (ex.: análises por target)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignora o cache de respostas e sempre consulta a API")
+    parser.add_argument("--offline", action="store_true",
+                        help="Não acessa a API: usa apenas o cache e as respostas de fallback (determinístico)")
+    parser.add_argument("--cache-dir", default=".cache_ia", help="Diretório do cache de respostas")
+    parser.add_argument("--cache-ttl-horas", type=float, default=168, help="Validade das respostas em cache")
+    parser.add_argument("--cache-max-mb", type=float, default=200, help="Tamanho máximo do cache em disco")
+    parser.add_argument("--orcamento-tokens", type=int, default=6000,
+                        help="Orçamento de tokens do conteúdo enviado ao Analisador de Insights")
+    parser.add_argument("--no-stream", action="store_true",
+                        help="Desativa o streaming: aguarda a resposta completa de cada agente")
+
+
+def _argumentos_score(parser):
+    parser.add_argument("--modelo", required=True, help="Diretório resultados/modelo_<projeto>_<ts>")
+    parser.add_argument("--datasets", default="datasets", help="Pasta com as tabelas das entidades a pontuar")
+    parser.add_argument("--chaves", default=None, help="Chaves da tabela pai separadas por vírgula")
+    parser.add_argument("--arquivo-chaves", default=None, help="CSV cuja primeira coluna são as chaves a pontuar")
+    parser.add_argument("--saida", default=None, help="CSV de saída (padrão: resultados/score_<projeto>_<ts>.csv)")
+    parser.add_argument("--medir", default=None,
+                        help="Mede latência/vazão para lotes destes tamanhos (ex.: 1,1000,1000000) em vez de gravar")
+
+
+def _validar_score(parser, args):
+    if not os.path.isfile(os.path.join(args.modelo, "modelo.joblib")):
+        parser.error(f"--modelo: {args.modelo} não contém modelo.joblib (use um diretório resultados/modelo_<projeto>_<ts>)")
+    if args.arquivo_chaves and not os.path.isfile(args.arquivo_chaves):
+        parser.error(f"--arquivo-chaves: arquivo não encontrado: {args.arquivo_chaves}")
+
+
+def _argumentos_bench(parser):
+    parser.add_argument("--tamanhos", default="1000,5000,20000",
+                        help="Linhas da tabela pai para cada cenário (separadas por vírgula; vazio pula os cenários)")
+    parser.add_argument("--fanout", type=int, default=5, help="Linhas filhas por linha pai")
+    parser.add_argument("--colunas", type=int, default=3, help="Colunas numéricas por tabela")
+    parser.add_argument("--cardinalidade", type=int, default=10, help="Categorias da coluna categórica")
+    parser.add_argument("--esparsidade", type=float, default=0.0, help="Fração de nulos nas filhas")
+    parser.add_argument("--filhas", type=int, default=1, help="Número de tabelas filhas")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sem-pipeline-completo", action="store_true",
+                        help="Mede apenas as etapas isoladas (não executa app.py em subprocesso)")
+    parser.add_argument("--saida", default=None, help="Arquivo JSON de resultados (padrão: resultados/bench_<ts>.json)")
+    parser.add_argument("--baseline", default=None, help="Arquivo JSON de baseline para detectar regressões")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Tolerância de lentidão (0.25 = 25%%)")
+    parser.add_argument("--manter-dados", action="store_true", help="Não apaga os diretórios temporários")
+    parser.add_argument("--primitivas", action="store_true",
+                        help="Compara as primitivas de agregação rápidas com as padrão do featuretools")
+    parser.add_argument("--memoria-workers", action="store_true",
+                        help="Mede o RSS por worker com a matriz enviada por pickle x publicada em memória compartilhada")
+    parser.add_argument("--matriz-workers", default="200000x100",
+                        help="Linhas x colunas da matriz float32 usada por --memoria-workers")
+    parser.add_argument("--workers", type=int, default=2, help="Processos usados por --memoria-workers")
+    parser.add_argument("--inicializacao", action="store_true",
+                        help="Mede o tempo de inicialização de cada subcomando com python -X importtime")
+
+
+def _validar_bench(parser, args):
+    if args.baseline and not os.path.isfile(args.baseline):
+        parser.error(f"--baseline: arquivo não encontrado: {args.baseline}")
+
+
+def _argumentos_batch(parser):
+    parser.add_argument("--jobs", required=True, help="Arquivo JSON de jobs (ver lote.ler_jobs)")
+    parser.add_argument("--workers", type=int, default=None, help="Jobs simultâneos (padrão: núcleos disponíveis)")
+    parser.add_argument("--saida", default=None, help="Resumo JSON do lote (padrão: resultados/lote_<ts>.json)")
+
+
+def _validar_batch(parser, args):
+    if not os.path.isfile(args.jobs):
+        parser.error(f"--jobs: arquivo não encontrado: {args.jobs}")
+
+
+def _argumentos_serve(parser):
+    parser.add_argument("--projeto", required=True)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--janelas", default="30,90",
+                        help="Janelas em dias para features temporais das tabelas filhas (vazio desativa)")
+    parser.add_argument("--data-corte", default=None)
+    parser.add_argument("--mapeamento", default=MAPEAMENTO_PADRAO,
+                        help=f"Arquivo de mapeamento (padrão: {MAPEAMENTO_PADRAO}); alterações nele recarregam a matriz")
+    parser.add_argument("--datasets", default="datasets", help="Pasta das tabelas do mapeamento")
+    parser.add_argument("--verbose", action="store_true", help="Mostra a saída detalhada do motor a cada análise")
+
+
+def _validar_serve(parser, args):
+    _validar_mapeamento(parser, args.mapeamento)
+
+
+# subcomando: (módulo, função de entrada, argumentos, validação, descrição)
+# A função de entrada recebe o Namespace já validado (o dashboard não tem opções e é chamado sem argumentos).
+SUBCOMANDOS = {
+    'run': ('app', 'executar', _argumentos_run, _validar_run,
+            "Pipeline completo: carga, DFS, analytics e relatórios em /resultados"),
+    'dashboard': ('dashboard', 'show_dashboard', None, None,
+                  "Navega pelos relatórios Markdown gerados"),
+    'deep-analysis': ('analise_profunda', 'main', _argumentos_deep_analysis, None,
+                      "Análise profunda dos resultados com IA Generativa (DeepSeek)"),
+    'score': ('pontuacao', 'main', _argumentos_score, _validar_score,
+              "Pontua entidades novas com as features e modelos de uma execução"),
+    'bench': ('benchmark', 'main', _argumentos_bench, _validar_bench,
+              "Benchmark de escala do pipeline DiscoverySpark"),
+    'batch': ('lote', 'main', _argumentos_batch, _validar_batch,
+              "Executa vários projetos/targets sem interação, a partir de um arquivo de jobs"),
+    'serve': ('servico', 'main', _argumentos_serve, _validar_serve,
+              "Serviço local que mantém a matriz de features em memória"),
+}
+
+
+def criar_parser(subcomando: str, prog=None) -> argparse.ArgumentParser:
+    """Parser de um subcomando (o mesmo usado quando o módulo é executado diretamente)."""
+    _, _, argumentos, _, descricao = SUBCOMANDOS[subcomando]
+    parser = argparse.ArgumentParser(prog=prog, description=descricao)
+    if argumentos is not None:
+        argumentos(parser)
+    return parser
+
+
+def analisar_argumentos(subcomando: str, argv=None, prog=None) -> argparse.Namespace:
+    """Interpreta e valida os argumentos de um subcomando; erros encerram com código 2, como no argparse."""
+    parser = criar_parser(subcomando, prog)
+    args = parser.parse_args(argv)
+    validar = SUBCOMANDOS[subcomando][3]
+    if validar is not None:
+        validar(parser, args)
+    return args
+
+
+def _parser_geral() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="discoveryspark",
+        description="DiscoverySpark: descoberta de drivers em dados relacionais",
+        epilog="Opções de cada subcomando: discoveryspark <subcomando> --help")
+    subcomandos = parser.add_subparsers(dest="subcomando", metavar="<subcomando>", required=True)
+    for nome, (_, _, _, _, descricao) in SUBCOMANDOS.items():
+        subcomandos.add_parser(nome, help=descricao, add_help=False)
+    return parser
+
+
+def __getattr__(nome):
+    # Importação tardia da API embutível: importar este módulo continua leve para a CLI
+    if nome in ("DiscoverySpark", "ResultadoAnalise"):
+        import motor
+        return getattr(motor, nome)
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in SUBCOMANDOS:
+        # Sem subcomando, subcomando desconhecido ou --help geral: o argparse mostra a ajuda/erro e encerra
+        _parser_geral().parse_args(argv[:1])
+        return
+    subcomando, *resto = argv
+    args = analisar_argumentos(subcomando, resto, prog=f"discoveryspark {subcomando}")
+
+    modulo, funcao, argumentos, _, _ = SUBCOMANDOS[subcomando]
+    entrada = getattr(importlib.import_module(modulo), funcao)
+    if argumentos is None:
+        entrada()
+    else:
+        entrada(args)
+
+
+if __name__ == "__main__":
+    main()
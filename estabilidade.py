@@ -0,0 +1,96 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from matriz_compartilhada import MatrizCompartilhada, anexar
+from padroes import MODOS_REAMOSTRAGEM
+
+REAMOSTRAS_PADRAO = 20
+FRACAO_SUBAMOSTRA = 0.5
+TOP_ESTABILIDADE = 10
+
+
+def _pesos_reamostra(n: int, modo: str, semente: int) -> np.ndarray:
+    """
+    Reamostragem expressa como pesos por linha: contagens do bootstrap (com reposição) ou 0/1 da
+    subamostra. Ajustar com sample_weight equivale a ajustar nas linhas repetidas/selecionadas,
+    sem copiar a matriz no worker.
+    """
+    rng = np.random.default_rng(semente)
+    if modo == "bootstrap":
+        return np.bincount(rng.integers(0, n, n), minlength=n).astype(np.float64)
+    pesos = np.zeros(n)
+    pesos[rng.choice(n, max(2, int(n * FRACAO_SUBAMOSTRA)), replace=False)] = 1.0
+    return pesos
+
+
+def _ajustar_reamostra(descritor_X: dict, descritor_y: dict, classificacao: bool, modo: str,
+                       semente: int, n_arvores: int) -> np.ndarray:
+    """Worker: anexa X e y publicados (sem cópia), ajusta uma floresta na reamostra e devolve as importâncias."""
+    X, recurso_X = anexar(descritor_X)
+    y, recurso_y = anexar(descritor_y)
+    try:
+        pesos = _pesos_reamostra(len(y), modo, semente)
+        classe = RandomForestClassifier if classificacao else RandomForestRegressor
+        modelo = classe(n_estimators=n_arvores, random_state=semente, n_jobs=1)
+        modelo.fit(X, y[:, 0], sample_weight=pesos)
+        return modelo.feature_importances_
+    finally:
+        del X, y
+        recurso_X.close()
+        recurso_y.close()
+
+
+def estabilidade_ranking(X: pd.DataFrame, y: pd.Series, classificacao: bool,
+                         reamostras: int = REAMOSTRAS_PADRAO, modo: str = "bootstrap",
+                         n_arvores: int = 100, top: int = TOP_ESTABILIDADE,
+                         max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Estabilidade do ranking de importância: `reamostras` florestas ajustadas em reamostras das
+    linhas (bootstrap ou subamostra sem reposição), em um pool de processos. X e y são publicados
+    uma vez em memória compartilhada e anexados sem cópia pelos workers. X é publicado por target
+    porque muda entre targets (target encoding das categóricas e pré-filtro de informação mútua).
+    Para cada feature que aparece no Top `top` de alguma reamostra: frequência no Top,
+    posição mediana e intervalo de posições (P5-P95). Retorna {'tabela', 'reamostras', 'modo', ...}.
+    """
+    if modo not in MODOS_REAMOSTRAGEM:
+        raise ValueError(f"Modo de reamostragem inválido: {modo} (use {', '.join(MODOS_REAMOSTRAGEM)})")
+    if max_workers is None:
+        max_workers = min(os.cpu_count() or 1, reamostras)
+
+    inicio = time.perf_counter()
+    with MatrizCompartilhada(X) as publicada, \
+            MatrizCompartilhada(pd.to_numeric(y, errors='coerce').fillna(0).to_frame(), dtype=np.float64) as alvo:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futuros = [pool.submit(_ajustar_reamostra, publicada.descritor, alvo.descritor, classificacao,
+                                   modo, semente, n_arvores)
+                       for semente in range(reamostras)]
+            importancias = np.vstack([f.result() for f in futuros])
+
+    # Posição de cada feature em cada reamostra (1 = mais importante)
+    ordem = np.argsort(-importancias, axis=1, kind='stable')
+    posicoes = np.empty_like(ordem)
+    np.put_along_axis(posicoes, ordem, np.arange(1, X.shape[1] + 1)[None, :], axis=1)
+    no_top = posicoes <= top
+    candidatas = np.flatnonzero(no_top.any(axis=0))
+    tabela = pd.DataFrame({
+        'Feature': X.columns[candidatas],
+        'frequencia_top': no_top[:, candidatas].mean(axis=0),
+        'posicao_mediana': np.median(posicoes[:, candidatas], axis=0),
+        'posicao_p05': np.percentile(posicoes[:, candidatas], 5, axis=0, method='lower'),
+        'posicao_p95': np.percentile(posicoes[:, candidatas], 95, axis=0, method='higher'),
+        'importancia_media': importancias[:, candidatas].mean(axis=0),
+    }).sort_values(['frequencia_top', 'posicao_mediana'], ascending=[False, True], ignore_index=True)
+    return {
+        'tabela': tabela,
+        'reamostras': reamostras,
+        'modo': modo,
+        'top': top,
+        'workers': max_workers,
+        'duracao_s': time.perf_counter() - inicio
+    }
@@ -10,10 +10,10 @@ python gerar_dados.py
 
 echo.
 echo [2/3] Processando Engine de IA...
-python app.py --projeto teste_automatizado --target churn
+python discoveryspark.py run --projeto teste_automatizado --target churn
 
 echo.
 echo [3/3] Abrindo Dashboard de Resultados...
-python dashboard.py
+python discoveryspark.py dashboard
 
 pause
\ No newline at end of file
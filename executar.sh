@@ -13,8 +13,8 @@ python3 gerar_dados.py
 
 # 2. Executar Engine (Ajuste o --projeto e --target se desejar)
 echo -e "${GREEN}>> Passagem 2: Processando Engine de IA...${NC}"
-python3 app.py --projeto test_passagem --target quantidade_assentos_comercializado,id_aeroporto_origem,id_aeroporto_destino
+python3 discoveryspark.py run --projeto test_passagem --target quantidade_assentos_comercializado,id_aeroporto_origem,id_aeroporto_destino
 
 # 3. Abrir Dashboard
 echo -e "${GREEN}>> Passagem 3: Abrindo Dashboard de Resultados...${NC}"
-python3 dashboard.py
\ No newline at end of file
+python3 discoveryspark.py dashboard
\ No newline at end of file
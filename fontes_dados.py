@@ -0,0 +1,191 @@
+import os
+import sqlite3
+from typing import Dict, List, Any, Optional
+
+import pandas as pd
+
+from padroes import MAPEAMENTO_PADRAO
+
+try:
+    import duckdb
+except ImportError:  # opcional: só necessário para fontes duckdb=
+    duckdb = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pads
+except ImportError:  # opcional: só necessário para fontes parquet= e lotes Arrow do DuckDB
+    pa = None
+    pads = None
+
+TIPOS_FONTE = ('sqlite', 'duckdb', 'parquet')
+TAMANHO_LOTE = 100_000
+
+
+def interpretar_fonte(spec: str) -> Dict[str, Any]:
+    """
+    Interpreta a especificação de fonte do mapeamento (terceiro campo após o '|'):
+        sqlite=dados/dw.db;tabela=vendas;colunas=valor,data_venda;coluna_data=data_venda;desde=2024-01-01;ate=2025-01-01
+    - tipo=caminho: sqlite, duckdb ou parquet (arquivo ou diretório)
+    - tabela: nome da tabela no banco (padrão: nome da tabela no mapeamento)
+    - colunas: projeção (as chaves e a coluna de data são incluídas automaticamente)
+    - coluna_data + desde/ate: filtro de período [desde, ate)
+    - filtro: condição SQL adicional (somente sqlite/duckdb)
+    """
+    fonte = {'tipo': None, 'caminho': None, 'tabela': None, 'colunas': None,
+             'coluna_data': None, 'desde': None, 'ate': None, 'filtro': None}
+    for parte in spec.split(';'):
+        if not parte.strip():
+            continue
+        chave, _, valor = parte.partition('=')
+        chave, valor = chave.strip(), valor.strip()
+        if chave in TIPOS_FONTE:
+            fonte['tipo'], fonte['caminho'] = chave, valor
+        elif chave == 'colunas':
+            fonte['colunas'] = [c.strip() for c in valor.split(',') if c.strip()]
+        elif chave in fonte:
+            fonte[chave] = valor
+        else:
+            raise ValueError(f"Opção de fonte desconhecida: '{chave}'")
+    if fonte['tipo'] is None:
+        raise ValueError(f"Fonte sem tipo ({', '.join(TIPOS_FONTE)}): '{spec}'")
+    if (fonte['desde'] or fonte['ate']) and not fonte['coluna_data']:
+        raise ValueError("Filtro de período (desde/ate) requer coluna_data")
+    if fonte['filtro'] and fonte['tipo'] == 'parquet':
+        raise ValueError("Fontes parquet aceitam apenas o filtro de período (coluna_data/desde/ate)")
+    return fonte
+
+
+def _colunas_projetadas(fonte: Dict[str, Any], chaves: List[str]) -> Optional[List[str]]:
+    if not fonte['colunas']:
+        return None
+    colunas = list(chaves) + [c for c in fonte['colunas'] if c not in chaves]
+    if fonte['coluna_data'] and fonte['coluna_data'] not in colunas:
+        colunas.append(fonte['coluna_data'])
+    return colunas
+
+
+def _montar_sql(fonte: Dict[str, Any], tabela: str, colunas: Optional[List[str]]):
+    """SELECT com projeção e predicados parametrizados (executados pelo próprio banco)."""
+    aspas = lambda nome: '"' + nome.replace('"', '""') + '"'
+    selecao = ", ".join(aspas(c) for c in colunas) if colunas else "*"
+    condicoes, parametros = [], []
+    if fonte['desde']:
+        condicoes.append(f"{aspas(fonte['coluna_data'])} >= ?")
+        parametros.append(fonte['desde'])
+    if fonte['ate']:
+        condicoes.append(f"{aspas(fonte['coluna_data'])} < ?")
+        parametros.append(fonte['ate'])
+    if fonte['filtro']:
+        condicoes.append(f"({fonte['filtro']})")
+    sql = f"SELECT {selecao} FROM {aspas(tabela)}"
+    if condicoes:
+        sql += " WHERE " + " AND ".join(condicoes)
+    return sql, parametros
+
+
+def _ler_sqlite(fonte, tabela, colunas):
+    sql, parametros = _montar_sql(fonte, tabela, colunas)
+    # Somente leitura: a fonte nunca é alterada pelo pipeline
+    con = sqlite3.connect(f"file:{os.path.abspath(fonte['caminho'])}?mode=ro", uri=True)
+    try:
+        cursor = con.execute(sql, parametros)
+        nomes = [d[0] for d in cursor.description]
+        lotes = []
+        while True:
+            linhas = cursor.fetchmany(TAMANHO_LOTE)
+            if not linhas:
+                break
+            lotes.append(pd.DataFrame.from_records(linhas, columns=nomes))
+    finally:
+        con.close()
+    if not lotes:
+        return pd.DataFrame(columns=nomes)
+    return pd.concat(lotes, ignore_index=True)
+
+
+def _ler_duckdb(fonte, tabela, colunas):
+    if duckdb is None:
+        raise ImportError("Fonte duckdb requer o pacote 'duckdb' (pip install duckdb)")
+    sql, parametros = _montar_sql(fonte, tabela, colunas)
+    con = duckdb.connect(fonte['caminho'], read_only=True)
+    try:
+        resultado = con.execute(sql, parametros)
+        if pa is None:
+            return resultado.df()
+        # Lotes Arrow: o DuckDB entrega colunas prontas, sem passar por tuplas Python
+        leitor = resultado.fetch_record_batch(TAMANHO_LOTE)
+        return leitor.read_all().to_pandas()
+    finally:
+        con.close()
+
+
+def _escalar_data(tipo_coluna, valor):
+    """Converte o limite do período para o tipo da coluna no Parquet (timestamp ou texto)."""
+    if pa.types.is_timestamp(tipo_coluna) or pa.types.is_date(tipo_coluna):
+        return pa.scalar(pd.Timestamp(valor).to_pydatetime(), type=pa.timestamp('us')).cast(tipo_coluna)
+    return pa.scalar(valor)
+
+
+def _ler_parquet(fonte, colunas):
+    if pads is None:
+        raise ImportError("Fonte parquet requer o pacote 'pyarrow' (pip install pyarrow)")
+    dataset = pads.dataset(fonte['caminho'], format='parquet')
+    filtro = None
+    if fonte['coluna_data']:
+        campo = pads.field(fonte['coluna_data'])
+        tipo = dataset.schema.field(fonte['coluna_data']).type
+        if fonte['desde']:
+            filtro = campo >= _escalar_data(tipo, fonte['desde'])
+        if fonte['ate']:
+            limite = campo < _escalar_data(tipo, fonte['ate'])
+            filtro = limite if filtro is None else filtro & limite
+    # Projeção e filtro descem para o scanner: row groups fora do período nem são lidos
+    scanner = dataset.scanner(columns=colunas, filter=filtro, batch_size=TAMANHO_LOTE)
+    return pa.Table.from_batches(scanner.to_batches(), schema=scanner.projected_schema).to_pandas()
+
+
+def ler_fonte(r: Dict[str, Any]) -> pd.DataFrame:
+    """Lê a tabela `r` do mapeamento a partir da fonte declarada em r['fonte']."""
+    fonte = r['fonte']
+    colunas = _colunas_projetadas(fonte, [k for k in r['keys'] if k])
+    if fonte['tipo'] == 'sqlite':
+        return _ler_sqlite(fonte, fonte['tabela'] or r['name'], colunas)
+    if fonte['tipo'] == 'duckdb':
+        return _ler_duckdb(fonte, fonte['tabela'] or r['name'], colunas)
+    return _ler_parquet(fonte, colunas)
+
+
+def _arquivos_da_tabela(r: Dict[str, Any], pasta_datasets: str) -> List[str]:
+    if r.get('fonte'):
+        caminhos = [r['fonte']['caminho']]
+    else:
+        base = os.path.join(pasta_datasets, r['name'])
+        caminhos = [f"{base}.csv", f"{base}.parquet", base]
+    arquivos = []
+    for caminho in caminhos:
+        if os.path.isdir(caminho):
+            arquivos.extend(os.path.join(caminho, nome) for nome in sorted(os.listdir(caminho)))
+        elif os.path.exists(caminho):
+            arquivos.append(caminho)
+    return arquivos
+
+
+def assinatura_datasets(rules: List[Dict[str, Any]], pasta_datasets: str = "datasets",
+                        caminho_mapeamento: Optional[str] = MAPEAMENTO_PADRAO) -> tuple:
+    """
+    Assinatura barata (caminho, tamanho, mtime) de todos os arquivos que alimentam o mapeamento.
+    Muda sempre que uma tabela, partição, banco ou o próprio mapeamento é alterado.
+    `caminho_mapeamento` é o arquivo de onde `rules` foi lido (None para regras montadas em memória).
+    """
+    arquivos = [caminho_mapeamento] if caminho_mapeamento and os.path.exists(caminho_mapeamento) else []
+    for r in rules:
+        arquivos.extend(_arquivos_da_tabela(r, pasta_datasets))
+    assinatura = []
+    for arquivo in arquivos:
+        try:
+            info = os.stat(arquivo)
+        except OSError:
+            continue
+        assinatura.append((arquivo, info.st_size, info.st_mtime_ns))
+    return tuple(assinatura)
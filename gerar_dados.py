@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 import os
+import json
 
 def gerar_dados_teste():
     # Garante que a pasta datasets existe
@@ -32,5 +33,255 @@ def gerar_dados_teste():
     
     print("✅ Arquivos 'clientes.csv' e 'vendas.csv' gerados em /datasets")
 
+def gerar_dados_parametrizados(n_pais=1000, fanout=5, n_colunas=3, cardinalidade=10, esparsidade=0.0,
+                               n_filhas=1, seed=42, pasta='datasets', prefixo='bench'):
+    """
+    Gera um conjunto pai/filhas sintético para benchmarks de escala:
+    - n_pais: linhas da tabela pai (com o target binário 'alvo')
+    - fanout: média de linhas filhas por linha pai
+    - n_colunas: colunas numéricas em cada tabela
+    - cardinalidade: número de categorias da coluna categórica
+    - esparsidade: fração de valores nulos nas colunas numéricas das filhas
+    - n_filhas: número de tabelas filhas ligadas ao pai
+    Retorna a linha de mapeamento (formato do mapeamento.txt) para os arquivos gerados.
+    """
+    if not os.path.exists(pasta):
+        os.makedirs(pasta)
+
+    rng = np.random.default_rng(seed)
+    categorias = np.array([f"cat_{i}" for i in range(cardinalidade)])
+    chave = f"id_{prefixo}"
+
+    pai = pd.DataFrame({chave: np.arange(1, n_pais + 1)})
+    for j in range(n_colunas):
+        pai[f"atributo_{j}"] = rng.normal(size=n_pais)
+    pai['grupo'] = categorias[rng.integers(0, cardinalidade, size=n_pais)]
+    pai['alvo'] = rng.integers(0, 2, size=n_pais)
+    nome_pai = f"{prefixo}_pai"
+    pai.to_csv(os.path.join(pasta, f"{nome_pai}.csv"), index=False)
+
+    regras = [f"{nome_pai}:pai|{chave}"]
+    n_linhas = n_pais * fanout
+    for k in range(1, n_filhas + 1):
+        filha = pd.DataFrame({chave: rng.integers(1, n_pais + 1, size=n_linhas)})
+        for j in range(n_colunas):
+            valores = rng.normal(loc=100.0, scale=25.0, size=n_linhas)
+            if esparsidade > 0:
+                valores[rng.random(n_linhas) < esparsidade] = np.nan
+            filha[f"medida_{j}"] = valores
+        filha['categoria'] = categorias[rng.integers(0, cardinalidade, size=n_linhas)]
+        filha['data_evento'] = (pd.Timestamp('2025-01-01') +
+                                pd.to_timedelta(rng.integers(0, 365 * 24 * 3600, size=n_linhas), unit='s'))
+        nome_filha = f"{prefixo}_filha_{k}"
+        filha.to_csv(os.path.join(pasta, f"{nome_filha}.csv"), index=False,
+                     date_format='%Y-%m-%d %H:%M:%S')
+        regras.append(f"{nome_filha}:filho|{chave}")
+
+    return "#".join(regras)
+
+# ---------------------------------------------------------------------------
+# Geração em escala (streaming por chunks, partições em paralelo)
+# ---------------------------------------------------------------------------
+
+SEGMENTOS = np.array(['Premium', 'Standard', 'Econômico'])
+CATEGORIAS = np.array(['Alimentos', 'Eletrônicos', 'Moda', 'Casa'])
+
+# Sinais plantados: como o churn altera o comportamento do cliente
+FATOR_FREQUENCIA_CHURN = 0.5   # clientes com churn compram metade das vezes
+FATOR_VALOR_CHURN = 1.3        # e gastam 30% a mais por compra
+SINAIS_PLANTADOS = [
+    {'feature': 'COUNT(vendas)', 'direcao': '-', 'descricao': 'Clientes com churn compram com menor frequência'},
+    {'feature': 'MEAN(vendas.valor)', 'direcao': '+', 'descricao': 'Clientes com churn têm ticket médio maior'},
+    {'feature': 'idade', 'direcao': '+', 'descricao': 'Probabilidade de churn cresce com a idade'},
+]
+
+# Estado por processo (montado no initializer para não serializar arrays grandes a cada tarefa)
+_ESTADO_WORKER = {}
+
+def _churn_e_idade(n_clientes, seed):
+    """Idade e churn de todos os clientes (determinísticos a partir da seed)."""
+    rng = np.random.default_rng([seed, 0])
+    idade = rng.integers(18, 70, size=n_clientes, dtype=np.int16)
+    prob_churn = 1.0 / (1.0 + np.exp(-(idade - 44) / 8.0))
+    churn = (rng.random(n_clientes) < prob_churn).astype(np.int8)
+    return idade, churn
+
+def _cdf_clientes(n_clientes, churn, zipf_a, seed):
+    """CDF de compra por cliente: popularidade Zipf (rank aleatório) reduzida para quem tem churn."""
+    rng = np.random.default_rng([seed, 1])
+    ranks = rng.permutation(n_clientes) + 1
+    pesos = ranks.astype(np.float64) ** -zipf_a
+    pesos *= np.where(churn == 1, FATOR_FREQUENCIA_CHURN, 1.0)
+    cdf = np.cumsum(pesos)
+    cdf /= cdf[-1]
+    return cdf
+
+def _cdf_sazonal(ano=2025):
+    """CDF dos dias do ano com sazonalidade anual e pico em novembro/dezembro."""
+    dias = np.arange(365)
+    pesos = 1.0 + 0.3 * np.sin(2 * np.pi * (dias - 80) / 365)
+    pesos[dias >= 305] *= 1.6
+    cdf = np.cumsum(pesos)
+    return cdf / cdf[-1]
+
+def _inicializar_worker(n_clientes, zipf_a, seed):
+    idade, churn = _churn_e_idade(n_clientes, seed)
+    _ESTADO_WORKER['idade'] = idade
+    _ESTADO_WORKER['churn'] = churn
+    _ESTADO_WORKER['cdf_clientes'] = _cdf_clientes(n_clientes, churn, zipf_a, seed)
+    _ESTADO_WORKER['cdf_dias'] = _cdf_sazonal()
+
+def _gravar_particao(df, caminho_base, formato):
+    if formato == 'parquet':
+        df.to_parquet(f"{caminho_base}.parquet", index=False)
+        return f"{caminho_base}.parquet"
+    df.to_csv(f"{caminho_base}.csv", index=False, date_format='%Y-%m-%d %H:%M:%S')
+    return f"{caminho_base}.csv"
+
+def _gerar_chunk_clientes(args):
+    indice, inicio, fim, semente, pasta, formato = args
+    rng = np.random.default_rng(semente)
+    df = pd.DataFrame({
+        'id_cliente': np.arange(inicio + 1, fim + 1, dtype=np.int64),
+        'idade': _ESTADO_WORKER['idade'][inicio:fim],
+        'segmento': SEGMENTOS[rng.integers(0, len(SEGMENTOS), size=fim - inicio)],
+        'churn': _ESTADO_WORKER['churn'][inicio:fim]
+    })
+    _gravar_particao(df, os.path.join(pasta, f"part-{indice:05d}"), formato)
+    return fim - inicio
+
+def _gerar_chunk_vendas(args):
+    indice, inicio, fim, semente, pasta, formato = args
+    rng = np.random.default_rng(semente)
+    n = fim - inicio
+
+    # Clientes por venda: busca binária na CDF Zipf (vetorizado)
+    idx_cliente = np.searchsorted(_ESTADO_WORKER['cdf_clientes'], rng.random(n), side='right')
+    churn = _ESTADO_WORKER['churn'][idx_cliente]
+
+    # Valor log-normal, com ticket maior para clientes com churn
+    valor = rng.lognormal(mean=4.5, sigma=0.6, size=n) * np.where(churn == 1, FATOR_VALOR_CHURN, 1.0)
+
+    # Data sazonal: dia sorteado pela CDF anual + segundos aleatórios no dia
+    dias = np.searchsorted(_ESTADO_WORKER['cdf_dias'], rng.random(n), side='right')
+    segundos = dias.astype(np.int64) * 86400 + rng.integers(0, 86400, size=n)
+    data_venda = np.datetime64('2025-01-01T00:00:00') + segundos.astype('timedelta64[s]')
+
+    df = pd.DataFrame({
+        'id_venda': np.arange(inicio + 1, fim + 1, dtype=np.int64),
+        'id_cliente': idx_cliente.astype(np.int64) + 1,
+        'valor': np.round(valor, 2),
+        'categoria': CATEGORIAS[rng.integers(0, len(CATEGORIAS), size=n)],
+        'data_venda': data_venda
+    })
+    _gravar_particao(df, os.path.join(pasta, f"part-{indice:05d}"), formato)
+    return n
+
+def gerar_dados_em_escala(n_clientes=100_000, n_vendas=1_000_000, tamanho_chunk=1_000_000, formato='csv',
+                          n_workers=None, seed=42, zipf_a=1.1, pasta='datasets_escala'):
+    """
+    Gera clientes/vendas em escala de produção sem materializar a tabela inteira em memória:
+    - Cada chunk de clientes e de vendas usa um Generator NumPy próprio (SeedSequence(seed).spawn),
+      então o resultado depende só de seed, e não do número de workers
+    - Partições CSV ou Parquet são gravadas em paralelo em <pasta>/<tabela>/part-NNNNN.<ext>;
+      a pasta padrão é separada de datasets/ para não conflitar com clientes.csv/vendas.csv
+    - Vendas seguem distribuição Zipf de clientes e sazonalidade anual em data_venda
+    - O churn é plantado: idade aumenta a chance de churn; quem tem churn compra menos e gasta mais
+    Grava também <pasta>/sinais_plantados.json com os drivers esperados.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    if formato not in ('csv', 'parquet'):
+        raise ValueError(f"Formato '{formato}' não suportado (use csv ou parquet)")
+    if formato == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("Formato parquet requer o pacote 'pyarrow' (pip install pyarrow)")
+
+    pasta_clientes = os.path.join(pasta, 'clientes')
+    pasta_vendas = os.path.join(pasta, 'vendas')
+    for p in (pasta_clientes, pasta_vendas):
+        os.makedirs(p, exist_ok=True)
+        # Remove partições antigas para não misturar execuções
+        for arquivo in os.listdir(p):
+            if arquivo.startswith('part-'):
+                os.remove(os.path.join(p, arquivo))
+
+    chunks_clientes = (n_clientes + tamanho_chunk - 1) // tamanho_chunk
+    chunks_vendas = (n_vendas + tamanho_chunk - 1) // tamanho_chunk
+    sementes = np.random.SeedSequence(seed).spawn(chunks_clientes + chunks_vendas)
+    sementes_clientes, sementes_vendas = sementes[:chunks_clientes], sementes[chunks_clientes:]
+    tarefas_clientes = [
+        (i, inicio, min(inicio + tamanho_chunk, n_clientes), sementes_clientes[i], pasta_clientes, formato)
+        for i, inicio in enumerate(range(0, n_clientes, tamanho_chunk))
+    ]
+    tarefas_vendas = [
+        (i, inicio, min(inicio + tamanho_chunk, n_vendas), sementes_vendas[i], pasta_vendas, formato)
+        for i, inicio in enumerate(range(0, n_vendas, tamanho_chunk))
+    ]
+
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_inicializar_worker,
+                             initargs=(n_clientes, zipf_a, seed)) as executor:
+        total_clientes = sum(executor.map(_gerar_chunk_clientes, tarefas_clientes))
+        total_vendas = sum(executor.map(_gerar_chunk_vendas, tarefas_vendas))
+
+    manifesto = {
+        'seed': seed,
+        'n_clientes': total_clientes,
+        'n_vendas': total_vendas,
+        'zipf_a': zipf_a,
+        'formato': formato,
+        'target': 'churn',
+        'sinais': SINAIS_PLANTADOS
+    }
+    with open(os.path.join(pasta, 'sinais_plantados.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+
+    print(f"✅ {total_clientes} clientes e {total_vendas} vendas gerados em /{pasta} ({formato}, "
+          f"{len(tarefas_vendas)} partições de vendas)")
+    return manifesto
+
+def verificar_sinais_plantados(ranking, manifesto, top_n=10):
+    """
+    Confere se os drivers plantados aparecem no ranking do motor (DataFrame com
+    Feature/Importance/Correlation) entre os top_n e com a direção esperada.
+    """
+    ranking = ranking.sort_values(by='Importance', ascending=False).reset_index(drop=True)
+    verificacao = []
+    for sinal in manifesto['sinais']:
+        linhas = ranking.index[ranking['Feature'] == sinal['feature']].tolist()
+        posicao = linhas[0] + 1 if linhas else None
+        direcao_ok = False
+        if posicao is not None:
+            corr = ranking.loc[linhas[0], 'Correlation']
+            direcao_ok = (corr > 0) if sinal['direcao'] == '+' else (corr < 0)
+        verificacao.append({
+            'feature': sinal['feature'],
+            'posicao': posicao,
+            'no_top': posicao is not None and posicao <= top_n,
+            'direcao_ok': direcao_ok
+        })
+    return verificacao
+
 if __name__ == "__main__":
-    gerar_dados_teste()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Gerador de dados de teste do DiscoverySpark")
+    parser.add_argument("--escala", action="store_true",
+                        help="Gera clientes/vendas em escala, em partições (streaming por chunks)")
+    parser.add_argument("--clientes", type=int, default=100_000)
+    parser.add_argument("--vendas", type=int, default=1_000_000)
+    parser.add_argument("--chunk", type=int, default=1_000_000, help="Linhas por partição")
+    parser.add_argument("--formato", choices=['csv', 'parquet'], default='csv')
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Expoente Zipf de clientes por venda")
+    parser.add_argument("--pasta", default="datasets_escala",
+                        help="Pasta das partições geradas (use --datasets com o mesmo valor no run)")
+    args = parser.parse_args()
+
+    if args.escala:
+        gerar_dados_em_escala(args.clientes, args.vendas, args.chunk, args.formato,
+                              args.workers, args.seed, args.zipf, args.pasta)
+    else:
+        gerar_dados_teste()
@@ -0,0 +1,92 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+N_BINS = 16
+AMOSTRA_QUANTIS = 200_000
+# Elementos do índice conjunto (linhas x colunas) por bloco: limita o int64 temporário a ~64 MB
+ELEMENTOS_POR_BLOCO = 8_000_000
+
+
+def discretizar(X: pd.DataFrame, n_bins: int = N_BINS, seed: int = 42) -> np.ndarray:
+    """
+    Códigos uint8 (n x m) de bins por quantil, calculados uma única vez por coluna.
+    Os limites vêm de no máximo AMOSTRA_QUANTIS linhas; valores repetidos deixam bins vazios
+    (colunas discretas ocupam menos bins). Nulos e infinitos entram como 0, como na análise.
+    """
+    if n_bins > 255:
+        raise ValueError("n_bins deve caber em uint8 (<= 255)")
+    n, m = X.shape
+    codigos = np.empty((n, m), dtype=np.uint8)
+    amostra = None
+    if n > AMOSTRA_QUANTIS:
+        amostra = np.random.default_rng(seed).choice(n, AMOSTRA_QUANTIS, replace=False)
+    fracoes = np.linspace(0, 1, n_bins + 1)[1:-1]
+    for inicio in range(0, m, 256):
+        valores = X.iloc[:, inicio:inicio + 256].to_numpy(dtype=np.float64, na_value=np.nan)
+        valores[~np.isfinite(valores)] = 0.0
+        base = valores if amostra is None else valores[amostra]
+        # Quantis (inferiores) lidos da amostra ordenada; a contagem de limites <= valor é o código do bin.
+        # Limites repetidos só deixam códigos vazios, sem juntar valores distintos no mesmo bin
+        ordenada = np.sort(np.asfortranarray(base), axis=0)
+        limites = ordenada[(fracoes * (len(ordenada) - 1)).astype(np.int64)]
+        bloco = np.zeros(valores.shape, dtype=np.uint8)
+        for limite in limites:
+            bloco += valores >= limite
+        codigos[:, inicio:inicio + valores.shape[1]] = bloco
+    return codigos
+
+
+def codificar_target(y: pd.Series, classificacao: bool, n_bins: int = N_BINS) -> np.ndarray:
+    """Classes do target (classificação) ou bins por quantil (regressão), como códigos inteiros."""
+    if classificacao:
+        return pd.factorize(y.astype(str))[0].astype(np.int64)
+    return discretizar(y.to_frame(), n_bins)[:, 0].astype(np.int64)
+
+
+def _informacao_bloco(codigos_bloco: np.ndarray, y_codigos: np.ndarray, n_bins: int, k_y: int) -> np.ndarray:
+    """Histograma conjunto de todas as colunas do bloco em um único np.bincount e a MI de cada uma."""
+    n, b = codigos_bloco.shape
+    celulas = n_bins * k_y
+    indice = (np.arange(b, dtype=np.int64) * celulas + codigos_bloco.astype(np.int64) * k_y + y_codigos[:, None]).ravel()
+    pxy = np.bincount(indice, minlength=b * celulas).reshape(b, n_bins, k_y) / n
+    px = pxy.sum(axis=2, keepdims=True)
+    py = pxy.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        termos = np.where(pxy > 0, pxy * np.log(pxy / (px * py)), 0.0)
+    mi = termos.sum(axis=(1, 2))
+    # Correção de Miller-Madow: o viés positivo da MI estimada por histograma cresce com os bins ocupados
+    bins_x = (px[:, :, 0] > 0).sum(axis=1)
+    bins_y = (py[:, 0, :] > 0).sum(axis=1)
+    return np.maximum(mi - (bins_x - 1) * (bins_y - 1) / (2 * n), 0.0)
+
+
+def informacao_mutua(X: pd.DataFrame, y: pd.Series, classificacao: bool, n_bins: int = N_BINS,
+                     max_workers: Optional[int] = None) -> pd.Series:
+    """
+    Informação mútua de cada coluna de X com o target, normalizada pela entropia do target (0 a 1).
+    Captura dependências não lineares (ex.: efeito em U) que a correlação de Pearson não vê.
+    As colunas são discretizadas uma vez e processadas em blocos em paralelo.
+    """
+    if X.shape[1] == 0 or len(X) == 0:
+        return pd.Series(dtype=np.float64)
+    codigos = discretizar(X, n_bins)
+    y_codigos = codificar_target(y, classificacao, n_bins)
+    k_y = int(y_codigos.max()) + 1
+    n, m = codigos.shape
+    bloco = max(1, min(m, ELEMENTOS_POR_BLOCO // max(n, 1)))
+    inicios = list(range(0, m, bloco))
+    if max_workers is None:
+        max_workers = min(os.cpu_count() or 1, len(inicios))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        partes = list(pool.map(lambda j: _informacao_bloco(codigos[:, j:j + bloco], y_codigos, n_bins, k_y), inicios))
+
+    py = np.bincount(y_codigos) / n
+    py = py[py > 0]
+    entropia_y = float(-(py * np.log(py)).sum())
+    mi = np.concatenate(partes)
+    normalizada = mi / entropia_y if entropia_y > 0 else np.zeros_like(mi)
+    return pd.Series(np.clip(normalizada, 0.0, 1.0), index=X.columns)
@@ -0,0 +1,238 @@
+import os
+import sys
+import time
+import json
+import cProfile
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from rich.console import Console
+from rich.table import Table
+from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn, TimeElapsedColumn
+
+try:
+    import psutil
+except ImportError:  # psutil vem com o featuretools, mas não é obrigatório aqui
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def rss_atual_mb():
+    """Retorna o RSS atual do processo em MB (ou None se psutil não estiver disponível)."""
+    if psutil is None:
+        return None
+    return psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024)
+
+
+def rss_maximo_mb():
+    """Retorna o maior RSS já atingido pelo processo em MB (ru_maxrss; None fora de Unix)."""
+    if resource is None:
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return maximo / (1024 * 1024) if sys.platform == "darwin" else maximo / 1024
+
+
+class _EtapaAtiva:
+    """Handle devolvido por MonitorExecucao.estagio para avançar a barra da etapa."""
+
+    def __init__(self, progress, task_id):
+        self._progress = progress
+        self._task_id = task_id
+
+    def avancar(self, passos=1, descricao=None):
+        if self._progress is None:
+            return
+        kwargs = {'advance': passos}
+        if descricao:
+            kwargs['description'] = descricao
+        self._progress.update(self._task_id, **kwargs)
+
+
+class MonitorExecucao:
+    """
+    Mede tempo e pico de memória de cada etapa do pipeline:
+    - Exibe uma barra de progresso Rich por etapa
+    - Registra duração, RSS ao final de cada etapa (psutil) e o maior RSS do processo até ali
+      (ru_maxrss, sem custo): quando esse máximo sobe, foi a etapa que elevou o pico
+    - Com medir_memoria=True, registra também o pico de memória Python (tracemalloc); o rastreamento
+      deixa o pipeline várias vezes mais lento, por isso é opcional
+    - Opcionalmente grava saídas do cProfile (.prof + resumo .txt) das etapas perfiladas
+    - `ao_registrar(registro)`, se informado, recebe cada registro assim que a etapa ou sub-etapa termina
+    """
+
+    def __init__(self, console=None, exibir_progresso=True, medir_memoria=False,
+                 perfilar=False, estagios_perfilados=None, dir_perfil="resultados", prefixo_perfil="perfil",
+                 ao_registrar=None):
+        self.console = console or Console()
+        self.exibir_progresso = exibir_progresso
+        self.medir_memoria = medir_memoria
+        self.perfilar = perfilar
+        self.estagios_perfilados = set(estagios_perfilados) if estagios_perfilados else None
+        self.dir_perfil = dir_perfil
+        self.prefixo_perfil = prefixo_perfil
+        self.ao_registrar = ao_registrar
+        self.registros = []
+        self.arquivos_perfil = []
+        self._etapa_atual = None
+        self._etapa_handle = None
+        self._pico_etapa = 0.0
+
+        if self.medir_memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _deve_perfilar(self, nome):
+        if not self.perfilar:
+            return False
+        return self.estagios_perfilados is None or nome in self.estagios_perfilados
+
+    @contextmanager
+    def estagio(self, nome, total=None, progresso=True):
+        """
+        Executa uma etapa do pipeline medindo tempo e memória.
+        `total` define o número de passos da barra (None = barra indeterminada).
+        Use progresso=False para etapas interativas (ex.: prompts de input()).
+        """
+        progress = None
+        task_id = None
+        if self.exibir_progresso and progresso:
+            progress = Progress(
+                SpinnerColumn(),
+                TextColumn("[bold blue]{task.description}"),
+                BarColumn(),
+                TaskProgressColumn(),
+                TimeElapsedColumn(),
+                console=self.console
+            )
+            progress.start()
+            task_id = progress.add_task(nome, total=total)
+
+        profiler = cProfile.Profile() if self._deve_perfilar(nome) else None
+        if self.medir_memoria:
+            tracemalloc.reset_peak()
+
+        etapa_anterior, handle_anterior, pico_anterior = self._etapa_atual, self._etapa_handle, self._pico_etapa
+        self._etapa_atual = nome
+        self._etapa_handle = _EtapaAtiva(progress, task_id)
+        self._pico_etapa = 0.0
+
+        # Reserva a posição do registro para que a etapa apareça antes das sub-etapas
+        registro = {'estagio': nome, 'alvo': None}
+        self.registros.append(registro)
+
+        inicio = time.perf_counter()
+        status = "ok"
+        if profiler:
+            profiler.enable()
+        try:
+            yield self._etapa_handle
+        except BaseException:
+            status = "erro"
+            raise
+        finally:
+            if profiler:
+                profiler.disable()
+            duracao = time.perf_counter() - inicio
+            pico = None
+            if self.medir_memoria:
+                # O pico da etapa é o maior entre o trecho final e as sub-etapas (que reiniciam o pico)
+                pico = max(tracemalloc.get_traced_memory()[1] / (1024 * 1024), self._pico_etapa)
+            registro.update({
+                'duracao_s': duracao,
+                'pico_memoria_mb': pico,
+                'rss_mb': rss_atual_mb(),
+                'rss_max_mb': rss_maximo_mb(),
+                'status': status
+            })
+            if progress is not None:
+                if total is None:
+                    progress.update(task_id, total=1, completed=1)
+                else:
+                    progress.update(task_id, completed=total)
+                progress.stop()
+            if profiler:
+                self._gravar_perfil(nome, profiler)
+            self._etapa_atual, self._etapa_handle = etapa_anterior, handle_anterior
+            if pico is not None:
+                pico_anterior = max(pico_anterior, pico)
+            self._pico_etapa = pico_anterior
+            if self.ao_registrar is not None:
+                self.ao_registrar(dict(registro))
+
+    @contextmanager
+    def subestagio(self, alvo):
+        """Mede uma sub-etapa (ex.: um target dentro de run_analytics) e avança a barra da etapa atual."""
+        if self.medir_memoria:
+            tracemalloc.reset_peak()
+        inicio = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "erro"
+            raise
+        finally:
+            duracao = time.perf_counter() - inicio
+            pico = None
+            if self.medir_memoria:
+                pico = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+                self._pico_etapa = max(self._pico_etapa, pico)
+            registro = {
+                'estagio': self._etapa_atual,
+                'alvo': alvo,
+                'duracao_s': duracao,
+                'pico_memoria_mb': pico,
+                'rss_mb': rss_atual_mb(),
+                'rss_max_mb': rss_maximo_mb(),
+                'status': status
+            }
+            self.registros.append(registro)
+            if self.ao_registrar is not None:
+                self.ao_registrar(dict(registro))
+            if self._etapa_handle is not None:
+                self._etapa_handle.avancar(descricao=f"{self._etapa_atual} ({alvo})")
+
+    def _gravar_perfil(self, nome, profiler):
+        """Grava o .prof binário e um resumo texto das 30 funções mais caras (tempo cumulativo)."""
+        os.makedirs(self.dir_perfil, exist_ok=True)
+        base = os.path.join(self.dir_perfil, f"{self.prefixo_perfil}_{nome}")
+        profiler.dump_stats(f"{base}.prof")
+        with open(f"{base}.txt", "w", encoding="utf-8") as f:
+            stats = pstats.Stats(profiler, stream=f)
+            stats.sort_stats('cumulative').print_stats(30)
+        self.arquivos_perfil.append(f"{base}.prof")
+
+    def tabela_resumo(self):
+        """Monta uma tabela Rich com o tempo e a memória de cada etapa."""
+        total = sum(r['duracao_s'] for r in self.registros if r['alvo'] is None)
+        tabela = Table(title="⏱️  Perfil de Execução por Etapa")
+        tabela.add_column("Etapa", style="white")
+        tabela.add_column("Tempo (s)", style="green", justify="right")
+        tabela.add_column("% do total", style="cyan", justify="right")
+        tabela.add_column("Pico Python (MB)", style="yellow", justify="right")
+        tabela.add_column("RSS final (MB)", style="magenta", justify="right")
+        tabela.add_column("RSS máx. (MB)", style="red", justify="right")
+
+        for r in self.registros:
+            nome = r['estagio'] if r['alvo'] is None else f"  ↳ {r['alvo']}"
+            pct = f"{r['duracao_s'] / total:.1%}" if total > 0 and r['alvo'] is None else ""
+            pico = f"{r['pico_memoria_mb']:.1f}" if r['pico_memoria_mb'] is not None else "-"
+            rss = f"{r['rss_mb']:.1f}" if r['rss_mb'] is not None else "-"
+            rss_max = f"{r['rss_max_mb']:.1f}" if r.get('rss_max_mb') is not None else "-"
+            tabela.add_row(nome, f"{r['duracao_s']:.3f}", pct, pico, rss, rss_max)
+        return tabela
+
+    def salvar(self, caminho, metadados=None):
+        """Grava os registros de tempo/memória em JSON."""
+        dados = {
+            'metadados': metadados or {},
+            'registros': self.registros,
+            'arquivos_perfil': self.arquivos_perfil
+        }
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+        return caminho
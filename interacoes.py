@@ -0,0 +1,136 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from informacao_mutua import discretizar
+from padroes import ORCAMENTO_S
+
+TOP_DRIVERS = 10
+BINS_INTERACAO = 4
+ROTULOS_QUARTIS = ["Q1", "Q2", "Q3", "Q4"]
+# Aceitação de uma interação: fração mínima da variância do target e nível do teste F (antes de Bonferroni)
+FORCA_MINIMA = 0.01
+ALFA = 0.01
+
+
+def coocorrencia_arvores(estimador, indices: np.ndarray) -> np.ndarray:
+    """
+    Quantas vezes cada par de features (entre `indices`) aparece em splits pai -> filho nas árvores
+    da floresta já treinada, ponderado pela fração de amostras que chega ao nó filho.
+    Um par que se repete em sequência nos caminhos é candidato a interação: o efeito de uma
+    depende do lado do split da outra. Retorna matriz triangular superior N x N.
+    """
+    posicao = np.full(estimador.n_features_in_, -1, dtype=np.int64)
+    posicao[indices] = np.arange(len(indices))
+    contagem = np.zeros((len(indices), len(indices)))
+    for arvore in estimador.estimators_:
+        t = arvore.tree_
+        internos = np.flatnonzero(t.children_left >= 0)
+        for filhos in (t.children_left, t.children_right):
+            filho = filhos[internos]
+            com_split = t.children_left[filho] >= 0
+            pai, filho = internos[com_split], filho[com_split]
+            a, b = posicao[t.feature[pai]], posicao[t.feature[filho]]
+            validos = (a >= 0) & (b >= 0) & (a != b)
+            peso = t.weighted_n_node_samples[filho[validos]] / t.weighted_n_node_samples[0]
+            np.add.at(contagem, (np.minimum(a[validos], b[validos]), np.maximum(a[validos], b[validos])), peso)
+    return contagem / max(len(estimador.estimators_), 1)
+
+
+def efeito_2d(codigo_a: np.ndarray, codigo_b: np.ndarray, y: np.ndarray, n_bins: int = BINS_INTERACAO) -> Dict[str, Any]:
+    """
+    Tabela 2-D de médias do target por (bin de A, bin de B) com dois np.bincount.
+    Os efeitos principais aditivos (linha + coluna) são ajustados por mínimos quadrados ponderados
+    pela contagem de cada célula, o que vale também para drivers correlacionados (tabela desbalanceada).
+    A força da interação é a fração da variância do target que sobra depois desse ajuste, e `p_valor`
+    vem do teste F da interação contra a variância dentro das células (ANOVA de dois fatores).
+    """
+    celula = codigo_a.astype(np.int64) * n_bins + codigo_b
+    contagem = np.bincount(celula, minlength=n_bins * n_bins).reshape(n_bins, n_bins)
+    soma = np.bincount(celula, weights=y, minlength=n_bins * n_bins).reshape(n_bins, n_bins)
+    ocupadas = contagem > 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        medias = np.where(ocupadas, soma / contagem, np.nan)
+
+    linhas, colunas = np.nonzero(ocupadas)
+    n_celula = contagem[linhas, colunas].astype(np.float64)
+    desenho = np.zeros((len(linhas), 2 * n_bins))
+    desenho[np.arange(len(linhas)), linhas] = 1.0
+    desenho[np.arange(len(linhas)), n_bins + colunas] = 1.0
+    peso = np.sqrt(n_celula)
+    coef = np.linalg.lstsq(desenho * peso[:, None], medias[linhas, colunas] * peso, rcond=None)[0]
+    residuo = medias[linhas, colunas] - desenho @ coef
+
+    geral = y.mean()
+    total = ((y - geral) ** 2).sum()
+    ss_interacao = float((n_celula * residuo ** 2).sum())
+    ss_dentro = max(total - float((n_celula * (medias[linhas, colunas] - geral) ** 2).sum()), 0.0)
+    gl_interacao = len(linhas) - len(np.unique(linhas)) - len(np.unique(colunas)) + 1
+    gl_dentro = len(y) - len(linhas)
+    p_valor = 1.0
+    if gl_interacao > 0 and gl_dentro > 0 and ss_dentro > 0:
+        estatistica = (ss_interacao / gl_interacao) / (ss_dentro / gl_dentro)
+        p_valor = float(stats.f.sf(estatistica, gl_interacao, gl_dentro))
+    forca = ss_interacao / total if total > 0 else 0.0
+    maior = np.unravel_index(np.nanargmax(medias), medias.shape)
+    menor = np.unravel_index(np.nanargmin(medias), medias.shape)
+    return {'forca': forca, 'p_valor': p_valor, 'medias': medias, 'contagem': contagem,
+            'maior': maior, 'menor': menor}
+
+
+def descobrir_interacoes(estimador, X: pd.DataFrame, y: pd.Series, importancias: np.ndarray,
+                         top: int = TOP_DRIVERS, max_pares: int = 10, orcamento_s: float = ORCAMENTO_S,
+                         max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Interações entre pares dos `top` drivers de um target:
+    1. Candidatos ordenados pela co-ocorrência nas árvores da floresta já treinada (sem novo ajuste)
+    2. Os melhores candidatos são testados com tabelas 2-D de médias, em paralelo,
+       até o orçamento de tempo acabar (pares não testados a tempo ficam de fora)
+    3. Só são aceitos pares com força >= FORCA_MINIMA e p-valor do teste F abaixo de ALFA
+       corrigido por Bonferroni pelo número de pares testados; em ruído puro a lista sai vazia
+    Retorna até `max_pares` interações aceitas, da mais forte para a mais fraca.
+    """
+    prazo = time.perf_counter() + orcamento_s
+    indices = np.argsort(-importancias, kind='stable')[:min(top, X.shape[1])]
+    if len(indices) < 2:
+        return []
+    coocorrencia = coocorrencia_arvores(estimador, indices)
+    a, b = np.nonzero(coocorrencia > 0)
+    ordem = np.argsort(-coocorrencia[a, b], kind='stable')
+    candidatos = [(int(a[k]), int(b[k]), float(coocorrencia[a[k], b[k]])) for k in ordem]
+
+    colunas = [X.columns[i] for i in indices]
+    codigos = discretizar(X[colunas], BINS_INTERACAO)
+    valores_y = pd.to_numeric(y, errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+
+    def verificar(candidato):
+        if time.perf_counter() > prazo:
+            return None
+        i, j, peso = candidato
+        efeito = efeito_2d(codigos[:, i], codigos[:, j], valores_y)
+        return {'Feature1': colunas[i], 'Feature2': colunas[j], 'Coocorrencia': peso, **efeito}
+
+    if max_workers is None:
+        max_workers = min(os.cpu_count() or 1, max(len(candidatos), 1))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        testadas = [r for r in pool.map(verificar, candidatos) if r is not None]
+
+    limiar_p = ALFA / max(len(testadas), 1)
+    aceitas = [r for r in testadas if r['forca'] >= FORCA_MINIMA and r['p_valor'] <= limiar_p]
+    for r in aceitas:
+        r['verificados'] = len(testadas)
+        r['candidatos'] = len(candidatos)
+    aceitas.sort(key=lambda r: -r['forca'])
+    return aceitas[:max_pares]
+
+
+def descrever_padrao(interacao: Dict[str, Any]) -> str:
+    """Célula de maior e de menor média do target na tabela 2-D, em quartis de cada feature."""
+    (ma, mb), (na, nb) = interacao['maior'], interacao['menor']
+    return (f"maior com {ROTULOS_QUARTIS[ma]}/{ROTULOS_QUARTIS[mb]}, "
+            f"menor com {ROTULOS_QUARTIS[na]}/{ROTULOS_QUARTIS[nb]}")
@@ -0,0 +1,118 @@
+from typing import Dict, List, Any, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+JANELAS_PADRAO = (30, 90)
+SEGUNDOS_POR_DIA = 86_400
+
+
+class OrdenacaoTemporal:
+    """
+    Linhas de uma tabela filha ordenadas uma única vez por (chave do pai, data).
+    Cada linha vira um inteiro `codigo_chave * amplitude + tempo`, de modo que um único
+    searchsorted no array ordenado encontra, para todas as chaves de uma vez, os limites
+    de uma janela [corte - dias, corte]. Somas acumuladas dos valores transformam cada
+    janela em duas leituras (fim - início), qualquer que seja o número de janelas.
+    """
+
+    def __init__(self, chaves: pd.Series, datas: pd.Series, chaves_pai: pd.Index):
+        validas = datas.notna().to_numpy() & chaves.isin(chaves_pai).to_numpy()
+        self.linhas = np.flatnonzero(validas)
+        self.chaves_pai = chaves_pai
+        codigos = chaves_pai.get_indexer(chaves.to_numpy()[validas]).astype(np.int64)
+        # Segundos (e não nanossegundos) para que codigo_chave * amplitude caiba em int64
+        tempos = datas.to_numpy()[validas].astype('datetime64[s]').astype(np.int64)
+
+        self.tempo_min = int(tempos.min()) if len(tempos) else 0
+        # Folga de um dia em cada ponta para janelas que começam antes da primeira data
+        self.amplitude = (int(tempos.max()) - self.tempo_min + 3 * SEGUNDOS_POR_DIA) if len(tempos) else 1
+        compostos = codigos * self.amplitude + (tempos - self.tempo_min + SEGUNDOS_POR_DIA)
+        self.ordem = np.argsort(compostos, kind='stable')
+        self.compostos = compostos[self.ordem]
+        self.tempos = tempos[self.ordem]
+        self.inicio_chave = np.searchsorted(self.compostos, np.arange(len(chaves_pai), dtype=np.int64) * self.amplitude)
+
+    def posicoes(self, cortes: np.ndarray, dias: Optional[int]) -> np.ndarray:
+        """Índice (no array ordenado) da primeira linha após o limite, para cada chave do pai."""
+        base = np.arange(len(self.chaves_pai), dtype=np.int64) * self.amplitude
+        if dias is None:
+            relativo = cortes - self.tempo_min + SEGUNDOS_POR_DIA
+            lado = 'right'
+        else:
+            relativo = cortes - dias * SEGUNDOS_POR_DIA - self.tempo_min + SEGUNDOS_POR_DIA
+            lado = 'left'
+        relativo = np.clip(relativo, 0, self.amplitude - 1)
+        return np.searchsorted(self.compostos, base + relativo, side=lado)
+
+    def acumulado(self, valores: np.ndarray) -> tuple:
+        """Somas acumuladas (com zero inicial) dos valores não nulos e da contagem de não nulos."""
+        ordenados = valores[self.linhas][self.ordem].astype(np.float64)
+        nulos = np.isnan(ordenados)
+        soma = np.concatenate([[0.0], np.cumsum(np.where(nulos, 0.0, ordenados))])
+        contagem = np.concatenate([[0], np.cumsum(~nulos)])
+        return soma, contagem
+
+
+def _cortes_em_segundos(corte: Union[pd.Timestamp, pd.Series], chaves_pai: pd.Index) -> np.ndarray:
+    if isinstance(corte, pd.Series):
+        cortes = pd.to_datetime(corte.reindex(chaves_pai)).to_numpy().astype('datetime64[s]')
+    else:
+        cortes = np.full(len(chaves_pai), np.datetime64(pd.Timestamp(corte), 's'))
+    # Corte ausente (NaT) vira o menor instante possível: nenhuma linha entra na janela
+    return np.where(np.isnat(cortes), np.iinfo(np.int64).min // 2, cortes.astype(np.int64))
+
+
+def agregar_janelas(filha: pd.DataFrame, nome: str, chave: str, coluna_data: str, chaves_pai: pd.Index,
+                    corte: Union[pd.Timestamp, pd.Series, None] = None,
+                    janelas: Sequence[int] = JANELAS_PADRAO,
+                    colunas_valor: Optional[List[str]] = None,
+                    ordenacao: Optional[OrdenacaoTemporal] = None) -> pd.DataFrame:
+    """
+    Features de recência, frequência e valor da tabela filha para cada chave do pai:
+    - DAYS_SINCE_LAST(filha.data): dias entre o corte e o último evento até o corte
+    - COUNT(filha, Last N Days): eventos na janela
+    - SUM/MEAN(filha.coluna, Last N Days): soma e média de cada coluna numérica na janela
+    `corte` pode ser uma data única ou uma Series (indexada pela chave do pai) com o corte de cada linha;
+    o padrão é a data mais recente da filha. Eventos depois do corte nunca entram.
+    `ordenacao` reaproveita a ordenação já feita para a mesma filha e chaves (ex.: vários cortes).
+    """
+    if corte is None:
+        corte = filha[coluna_data].max()
+    if colunas_valor is None:
+        colunas_valor = [c for c in filha.select_dtypes(include=['number']).columns
+                         if c != chave and not c.startswith('id_auto_')]
+
+    if ordenacao is None:
+        ordenacao = OrdenacaoTemporal(filha[chave], filha[coluna_data], chaves_pai)
+    cortes = _cortes_em_segundos(corte, chaves_pai)
+    fim = ordenacao.posicoes(cortes, None)
+
+    features: Dict[str, Any] = {}
+    tem_evento = fim > ordenacao.inicio_chave
+    ultimo = ordenacao.tempos[np.maximum(fim - 1, 0)] if len(ordenacao.tempos) else np.zeros(len(fim))
+    features[f"DAYS_SINCE_LAST({nome}.{coluna_data})"] = np.where(tem_evento, (cortes - ultimo) / SEGUNDOS_POR_DIA, np.nan)
+
+    acumulados = {c: ordenacao.acumulado(filha[c].to_numpy(dtype=np.float64, na_value=np.nan)) for c in colunas_valor}
+    for dias in janelas:
+        inicio = np.maximum(ordenacao.posicoes(cortes, dias), ordenacao.inicio_chave)
+        inicio = np.minimum(inicio, fim)
+        sufixo = f"Last {dias} Days"
+        features[f"COUNT({nome}, {sufixo})"] = fim - inicio
+        for coluna, (soma, contagem) in acumulados.items():
+            total = soma[fim] - soma[inicio]
+            n = contagem[fim] - contagem[inicio]
+            features[f"SUM({nome}.{coluna}, {sufixo})"] = total
+            with np.errstate(invalid='ignore', divide='ignore'):
+                features[f"MEAN({nome}.{coluna}, {sufixo})"] = np.where(n > 0, total / np.maximum(n, 1), np.nan)
+
+    return pd.DataFrame(features, index=chaves_pai)
+
+
+def coluna_data_da_tabela(r: Dict[str, Any], df: pd.DataFrame) -> Optional[str]:
+    """Coluna de data usada nas janelas: a `coluna_data` da fonte ou a primeira coluna datetime."""
+    fonte = r.get('fonte') or {}
+    if fonte.get('coluna_data') in df.columns:
+        return fonte['coluna_data']
+    datas = df.select_dtypes(include=['datetime', 'datetimetz']).columns
+    return datas[0] if len(datas) else None
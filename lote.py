@@ -0,0 +1,306 @@
+import os
+import sys
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from rich.console import Console
+from rich.table import Table
+from rich.panel import Panel
+
+import pandas as pd
+
+import app
+from instrumentacao import MonitorExecucao
+from discoveryspark import analisar_argumentos
+from padroes import MAPEAMENTO_PADRAO, EXPORTACOES
+
+console = Console()
+
+DATASETS_PADRAO = "datasets"
+
+# Opções de um job e seus valores padrão (mesmos significados das opções de app.py)
+OPCOES_JOB = {
+    'politica': 'continuar',
+    'janelas': [30, 90],
+    'data_corte': None,
+    'por': None,
+    'periodo': None,
+    'periodos': app.PERIODOS_PADRAO,
+    'janela_periodos': 3,
+    'min_segmento': app.MIN_LINHAS_SEGMENTO,
+    'pre_filtro_mi': None,
+    'orcamento_interacoes': app.ORCAMENTO_S,
+    'estabilidade': None,
+    'modo_estabilidade': 'bootstrap',
+    'exportar': ['markdown', 'json', 'modelo'],
+}
+
+
+def ler_jobs(caminho):
+    """
+    Arquivo de jobs em JSON: uma lista de jobs ou {"padrao": {...}, "jobs": [...]}.
+    Cada job tem `projeto` e `targets` (texto separado por vírgula ou lista) e, opcionalmente,
+    `id`, `mapeamento`, `datasets` e qualquer chave de OPCOES_JOB; `padrao` vale para todos.
+    A política para targets sinalizados nunca é interativa (padrão: continuar).
+    """
+    with open(caminho, "r", encoding="utf-8") as f:
+        conteudo = json.load(f)
+    padrao, jobs = ({}, conteudo) if isinstance(conteudo, list) else (conteudo.get('padrao', {}), conteudo['jobs'])
+
+    normalizados = []
+    for i, job in enumerate(jobs, 1):
+        completo = {**OPCOES_JOB, 'mapeamento': MAPEAMENTO_PADRAO, 'datasets': DATASETS_PADRAO, **padrao, **job}
+        desconhecidas = set(completo) - set(OPCOES_JOB) - {'id', 'projeto', 'targets', 'mapeamento', 'datasets'}
+        if desconhecidas:
+            raise ValueError(f"Job {i}: opção(ões) desconhecida(s): {', '.join(sorted(desconhecidas))}")
+        if not completo.get('projeto') or not completo.get('targets'):
+            raise ValueError(f"Job {i}: 'projeto' e 'targets' são obrigatórios")
+        if completo['politica'] not in app.POLITICAS_TARGETS:
+            raise ValueError(f"Job {i}: política inválida '{completo['politica']}' "
+                             f"(use {', '.join(app.POLITICAS_TARGETS)}; o lote não pergunta ao usuário)")
+        if completo['periodo'] is not None and completo['periodo'] not in app.FREQUENCIAS:
+            raise ValueError(f"Job {i}: período inválido '{completo['periodo']}' (use {', '.join(app.FREQUENCIAS)})")
+        invalidas = set(completo['exportar']) - set(EXPORTACOES)
+        if invalidas:
+            raise ValueError(f"Job {i}: exportação inválida: {', '.join(sorted(invalidas))} (use {', '.join(EXPORTACOES)})")
+        if isinstance(completo['janelas'], str):
+            completo['janelas'] = [int(j) for j in completo['janelas'].split(',') if j.strip()]
+        if isinstance(completo['targets'], list):
+            completo['targets'] = ','.join(completo['targets'])
+        completo['id'] = str(completo.get('id') or f"{i:02d}_{completo['projeto']}")
+        normalizados.append(completo)
+    ids = [j['id'] for j in normalizados]
+    if len(set(ids)) != len(ids):
+        raise ValueError("Ids de job repetidos no arquivo de jobs")
+    return normalizados
+
+
+def chave_tabelas(job):
+    """Jobs com o mesmo mapeamento e a mesma pasta de datasets compartilham as tabelas carregadas."""
+    return (os.path.abspath(job['mapeamento']), os.path.abspath(job['datasets']))
+
+
+def chave_matriz(job):
+    """Jobs com as mesmas tabelas e as mesmas opções de síntese compartilham a matriz de features."""
+    if job['periodo']:
+        return chave_tabelas(job) + (job['projeto'], 'periodo', job['periodo'], job['periodos'], tuple(job['janelas']))
+    return chave_tabelas(job) + (job['projeto'], 'dfs', tuple(job['janelas']), job['data_corte'])
+
+
+class CacheCompartilhado:
+    """
+    Valores construídos uma única vez por chave e compartilhados entre threads:
+    - A primeira thread que pede uma chave constrói o valor; as demais esperam por ele
+    - Cada chave conhece quantos jobs ainda vão usá-la e é liberada após o último (memória)
+    """
+
+    def __init__(self, usos):
+        self._usos = dict(usos)
+        self._valores = {}
+        self._locks = {chave: threading.Lock() for chave in self._usos}
+        self._lock = threading.Lock()
+        self.construidos = 0
+
+    def obter(self, chave, construir):
+        with self._locks[chave]:
+            if chave not in self._valores:
+                self._valores[chave] = construir()
+                with self._lock:
+                    self.construidos += 1
+            return self._valores[chave]
+
+    def liberar(self, chave):
+        with self._lock:
+            self._usos[chave] -= 1
+            if self._usos[chave] == 0:
+                self._valores.pop(chave, None)
+
+
+class ExecutorLote:
+    """
+    Executa os jobs em um pool de threads: carga e DFS de cada mapeamento/configuração acontecem
+    uma vez e são compartilhadas pelos jobs que as usam; o treino das florestas libera o GIL,
+    então jobs diferentes analisam em paralelo sobre as mesmas matrizes em memória.
+    O motor roda com verbose=False: as mensagens de jobs simultâneos se misturariam no console, e o
+    progresso vem de `ao_concluir` e da tabela de resumo.
+    """
+
+    def __init__(self, jobs, max_workers=None, pasta_resultados="resultados"):
+        self.jobs = jobs
+        self.max_workers = max_workers or min(os.cpu_count() or 1, len(jobs)) or 1
+        self.pasta_resultados = pasta_resultados
+        self._usos_tabelas = {}
+        self._usos_matrizes = {}
+        for job in jobs:
+            self._usos_tabelas[chave_tabelas(job)] = self._usos_tabelas.get(chave_tabelas(job), 0) + 1
+            self._usos_matrizes[chave_matriz(job)] = self._usos_matrizes.get(chave_matriz(job), 0) + 1
+        self.tabelas = CacheCompartilhado(self._usos_tabelas)
+        self.matrizes = CacheCompartilhado(self._usos_matrizes)
+
+    def _carregar_tabelas(self, job):
+        rules = app.parse_mapping_file(job['mapeamento'], verbose=False)
+        if not rules:
+            raise ValueError(f"Mapeamento vazio ou inválido: {job['mapeamento']}")
+        monitor = MonitorExecucao(app.CONSOLE_SILENCIOSO, exibir_progresso=False, medir_memoria=False)
+        return rules, app.carregar_tabelas(rules, monitor, job['datasets'], verbose=False)
+
+    def _construir_matriz(self, job):
+        rules, tabelas = self.tabelas.obter(chave_tabelas(job), lambda: self._carregar_tabelas(job))
+        # Cópias rasas: o EntitySet acrescenta colunas às tabelas, sem duplicar os dados já carregados
+        tabelas = [(r, df.copy(deep=False)) for r, df in tabelas]
+        monitor = MonitorExecucao(app.CONSOLE_SILENCIOSO, exibir_progresso=False, medir_memoria=False)
+        if job['periodo']:
+            feature_matrix, _ = app.preparar_matriz_periodos(job['projeto'], rules, monitor, job['periodo'],
+                                                             job['janelas'], job['periodos'], tabelas=tabelas,
+                                                             verbose=False)
+            return feature_matrix, None
+        data_corte = pd.Timestamp(job['data_corte']) if job['data_corte'] else None
+        feature_matrix, _, definicoes = app.preparar_matriz(job['projeto'], rules, monitor, job['janelas'],
+                                                            data_corte, tabelas=tabelas, verbose=False)
+        return feature_matrix, definicoes
+
+    def executar_job(self, job):
+        registro = {'id': job['id'], 'projeto': job['projeto'], 'targets': job['targets'], 'arquivos': []}
+        inicio = time.perf_counter()
+        try:
+            feature_matrix, definicoes = self.matrizes.obter(chave_matriz(job), lambda: self._construir_matriz(job))
+            registro['matriz_s'] = time.perf_counter() - inicio
+            registro['linhas'], registro['features'] = feature_matrix.shape
+
+            inicio_analise = time.perf_counter()
+            monitor = MonitorExecucao(app.CONSOLE_SILENCIOSO, exibir_progresso=False, medir_memoria=False)
+            results, tipo_ml = app.run_analytics(
+                feature_matrix, job['targets'], monitor=monitor, politica=job['politica'], por=job['por'],
+                min_linhas_segmento=job['min_segmento'],
+                janela_periodos=job['janela_periodos'] if job['periodo'] else None,
+                pre_filtro_mi=job['pre_filtro_mi'], orcamento_interacoes=job['orcamento_interacoes'],
+                reamostras=job['estabilidade'], modo_reamostragem=job['modo_estabilidade'], verbose=False)
+            registro['analise_s'] = time.perf_counter() - inicio_analise
+            registro['tipo'] = tipo_ml
+            if results is None:
+                registro['status'] = 'cancelado'
+                return registro
+
+            inicio_export = time.perf_counter()
+            registro['arquivos'] = self._exportar(job, results, tipo_ml, feature_matrix, definicoes)
+            registro['export_s'] = time.perf_counter() - inicio_export
+            registro['status'] = 'ok'
+        except Exception as e:
+            registro['status'] = 'erro'
+            registro['erro'] = f"{type(e).__name__}: {e}"
+        finally:
+            self.matrizes.liberar(chave_matriz(job))
+            self.tabelas.liberar(chave_tabelas(job))
+            registro['duracao_s'] = time.perf_counter() - inicio
+        return registro
+
+    def _exportar(self, job, results, tipo_ml, feature_matrix, definicoes):
+        arquivos = []
+        exportar = set(job['exportar'])
+        if 'markdown' in exportar:
+            arquivos.append(app.export_to_markdown(results, tipo_ml, job['projeto'], job['targets'], job['ts'],
+                                                   verbose=False))
+        if 'json' in exportar:
+            arquivos.append(app.export_to_json(results, tipo_ml, job['projeto'], job['targets'], job['ts'],
+                                               verbose=False))
+        if 'csv' in exportar:
+            caminho = os.path.join(self.pasta_resultados, f"result_{job['projeto']}_{job['ts']}.csv")
+            feature_matrix.to_csv(caminho)
+            arquivos.append(caminho)
+        if 'modelo' in exportar and definicoes is not None and tipo_ml not in ("Segmentado", "Deriva"):
+            arquivos.append(app.export_modelo(results, tipo_ml, definicoes, job['projeto'], job['ts']))
+        return [a for a in arquivos if a]
+
+    def executar(self, ao_concluir=None):
+        """Executa todos os jobs; `ao_concluir(registro)` é chamado a cada job terminado."""
+        ts = datetime.now().strftime("%Y%m%d%H%M%S")
+        for job in self.jobs:
+            # Timestamp único por job: os arquivos de jobs do mesmo projeto não se sobrescrevem
+            job['ts'] = f"{ts}_{job['id']}"
+        inicio = time.perf_counter()
+        registros = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futuros = [pool.submit(self.executar_job, job) for job in self.jobs]
+            for futuro in as_completed(futuros):
+                registro = futuro.result()
+                registros.append(registro)
+                if ao_concluir is not None:
+                    ao_concluir(registro)
+        total = time.perf_counter() - inicio
+        ordem = {job['id']: i for i, job in enumerate(self.jobs)}
+        registros.sort(key=lambda r: ordem[r['id']])
+        return {
+            'timestamp': ts,
+            'workers': self.max_workers,
+            'jobs': len(self.jobs),
+            'ok': sum(r['status'] == 'ok' for r in registros),
+            'erros': sum(r['status'] == 'erro' for r in registros),
+            'cancelados': sum(r['status'] == 'cancelado' for r in registros),
+            'matrizes_construidas': self.matrizes.construidos,
+            'cargas_de_tabelas': self.tabelas.construidos,
+            'duracao_total_s': total,
+            'soma_jobs_s': sum(r['duracao_s'] for r in registros),
+            'jobs_por_minuto': len(registros) / total * 60 if total > 0 else None,
+            'registros': registros
+        }
+
+
+def exibir_resumo(resumo):
+    tabela = Table(title=f"📦 Lote: {resumo['jobs']} jobs em {resumo['duracao_total_s']:.1f}s "
+                         f"({resumo['workers']} workers)")
+    tabela.add_column("Job", style="cyan")
+    tabela.add_column("Targets", style="white")
+    tabela.add_column("Status")
+    tabela.add_column("Matriz (s)", justify="right")
+    tabela.add_column("Análise (s)", justify="right")
+    tabela.add_column("Total (s)", style="green", justify="right")
+    cores = {'ok': 'green', 'erro': 'red', 'cancelado': 'yellow'}
+    for r in resumo['registros']:
+        status = f"[{cores[r['status']]}]{r['status']}[/{cores[r['status']]}]"
+        if r['status'] == 'erro':
+            status += f" {r['erro'][:60]}"
+        tabela.add_row(r['id'], r['targets'], status, f"{r.get('matriz_s', 0):.1f}", f"{r.get('analise_s', 0):.1f}",
+                       f"{r['duracao_s']:.1f}")
+    console.print(tabela)
+    console.print(f"[bold]Vazão:[/bold] {resumo['jobs_por_minuto']:.1f} jobs/min | "
+                  f"soma dos jobs {resumo['soma_jobs_s']:.1f}s em {resumo['duracao_total_s']:.1f}s de relógio | "
+                  f"{resumo['matrizes_construidas']} matriz(es) e {resumo['cargas_de_tabelas']} carga(s) de tabelas "
+                  f"para {resumo['jobs']} jobs")
+
+
+def main(args=None):
+    if args is None:
+        args = analisar_argumentos("batch")
+    app.setup_environment()
+
+    try:
+        jobs = ler_jobs(args.jobs)
+    except (OSError, ValueError, KeyError) as e:
+        console.print(f"[red]❌ Arquivo de jobs inválido: {e}[/red]")
+        sys.exit(2)
+
+    executor = ExecutorLote(jobs, args.workers)
+    console.print(Panel(f"📦 [bold]DiscoverySpark Lote[/bold]\n{len(jobs)} jobs, "
+                        f"{len(executor._usos_matrizes)} matriz(es) distinta(s), {executor.max_workers} workers",
+                        style="blue"))
+
+    def ao_concluir(registro):
+        cor = {'ok': 'green', 'erro': 'red', 'cancelado': 'yellow'}[registro['status']]
+        console.print(f"[{cor}]■ {registro['id']}: {registro['status']} em {registro['duracao_s']:.1f}s[/{cor}]")
+
+    resumo = executor.executar(ao_concluir)
+    exibir_resumo(resumo)
+
+    saida = args.saida or os.path.join("resultados", f"lote_{resumo['timestamp']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(resumo, f, ensure_ascii=False, indent=2, default=str)
+    console.print(f"[green]✓ Resumo do lote salvo em: {saida}[/green]")
+    if resumo['erros']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
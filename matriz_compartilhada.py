@@ -0,0 +1,127 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import weakref
+from multiprocessing import shared_memory, resource_tracker
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+MODOS_PUBLICACAO = ("memoria", "arquivo")
+
+# Até o Python 3.12 não há SharedMemory(track=False): a anexação desliga o registro no resource
+# tracker trocando resource_tracker.register, e este lock impede que outra thread crie ou anexe
+# um bloco (e perca o próprio registro) enquanto a troca está ativa
+_LOCK_REGISTRO = threading.Lock()
+
+
+def _liberar(shm, diretorio):
+    """Fecha e remove o bloco publicado. Chamada no máximo uma vez (weakref.finalize)."""
+    if shm is not None:
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+    if diretorio is not None:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+class MatrizCompartilhada:
+    """
+    Publica a matriz numérica já limpa (não finitos viram 0) uma única vez, em float32 e ordem
+    Fortran, para workers de um pool de processos anexarem sem cópia:
+    - modo "memoria": bloco de multiprocessing.shared_memory (/dev/shm)
+    - modo "arquivo": .npy em diretório temporário, aberto por memmap (quando /dev/shm é pequeno)
+    O `descritor` (dict pequeno e serializável: nome, forma, colunas, dtypes originais e índice)
+    é o que vai para os workers no lugar da matriz.
+
+    Garantia de limpeza: fechar() (ou o bloco with) remove o bloco; se o objeto for coletado ou o
+    interpretador encerrar sem isso, o weakref.finalize faz a remoção. Se o processo morrer sem
+    chance de finalizar, o resource tracker do multiprocessing remove o shared_memory registrado.
+    """
+
+    def __init__(self, dados: pd.DataFrame, modo: str = "memoria", dtype=np.float32,
+                 diretorio_temporario: Optional[str] = None, bloco: int = 256):
+        if modo not in MODOS_PUBLICACAO:
+            raise ValueError(f"Modo de publicação inválido: {modo} (use {', '.join(MODOS_PUBLICACAO)})")
+        dtype = np.dtype(dtype)
+        forma = (len(dados), dados.shape[1])
+        shm = diretorio = None
+        if modo == "memoria":
+            with _LOCK_REGISTRO:
+                shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(forma)) * dtype.itemsize, 1))
+            nome = shm.name
+            destino = np.ndarray(forma, dtype=dtype, buffer=shm.buf, order='F')
+        else:
+            diretorio = tempfile.mkdtemp(prefix="matriz_", dir=diretorio_temporario)
+            nome = os.path.join(diretorio, "matriz.npy")
+            destino = np.lib.format.open_memmap(nome, mode='w+', dtype=dtype, shape=forma, fortran_order=True)
+        self._finalizador = weakref.finalize(self, _liberar, shm, diretorio)
+
+        # Cópia bloco a bloco de colunas: a matriz float64 inteira nunca fica em memória
+        for j in range(0, forma[1], bloco):
+            valores = dados.iloc[:, j:j + bloco].to_numpy(dtype=np.float64, na_value=np.nan)
+            valores[~np.isfinite(valores)] = 0.0
+            destino[:, j:j + valores.shape[1]] = valores
+        if isinstance(destino, np.memmap):
+            destino.flush()
+        del destino
+
+        self.descritor: Dict[str, Any] = {
+            'modo': modo,
+            'nome': nome,
+            'forma': forma,
+            'dtype': dtype.str,
+            'colunas': list(dados.columns),
+            'dtypes': {str(c): str(t) for c, t in dados.dtypes.items()},
+            'indice': dados.index,
+        }
+        self.tamanho_mb = int(np.prod(forma)) * dtype.itemsize / (1024 * 1024)
+
+    def fechar(self):
+        self._finalizador()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+        return False
+
+
+def anexar(descritor: Dict[str, Any]) -> Tuple[np.ndarray, Any]:
+    """
+    Visão ndarray (n x m, ordem Fortran) da matriz publicada, sem cópia. O segundo item mantém o
+    mapeamento vivo: chame .close() nele depois de descartar a visão (e tudo derivado dela).
+    O worker não é dono do bloco: a anexação não é registrada no resource tracker (track=False a partir
+    do Python 3.13; antes, um tracker próprio do worker removeria o bloco quando o worker terminasse).
+    """
+    if descritor['modo'] == "arquivo":
+        return np.load(descritor['nome'], mmap_mode='r'), _SemRecurso()
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name=descritor['nome'], track=False)
+    else:
+        with _LOCK_REGISTRO:
+            registrar = resource_tracker.register
+            resource_tracker.register = lambda *args, **kwargs: None
+            try:
+                shm = shared_memory.SharedMemory(name=descritor['nome'])
+            finally:
+                resource_tracker.register = registrar
+    matriz = np.ndarray(descritor['forma'], dtype=np.dtype(descritor['dtype']), buffer=shm.buf, order='F')
+    matriz.flags.writeable = False
+    return matriz, shm
+
+
+def como_dataframe(matriz: np.ndarray, descritor: Dict[str, Any]) -> pd.DataFrame:
+    """DataFrame sobre a visão anexada; a ordem Fortran vira um único bloco do pandas sem cópia."""
+    return pd.DataFrame(matriz, index=descritor['indice'], columns=descritor['colunas'], copy=False)
+
+
+class _SemRecurso:
+    def close(self):
+        pass
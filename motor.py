@@ -0,0 +1,257 @@
+import os
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import pandas as pd
+
+import app
+from instrumentacao import MonitorExecucao
+from redundancia import analisar_redundancia
+from padroes import (MAPEAMENTO_PADRAO, EXPORTACOES, POLITICAS_TARGETS, FREQUENCIAS, PERIODOS_PADRAO, ORCAMENTO_S,
+                     MODOS_REAMOSTRAGEM, LIMIAR_PADRAO, MIN_LINHAS_SEGMENTO)
+
+# Biblioteca: sem handler próprio, os eventos só aparecem se a aplicação configurar o logging
+log = logging.getLogger("discoveryspark")
+log.addHandler(logging.NullHandler())
+
+
+class ResultadoAnalise:
+    """
+    Resultado em memória de DiscoverySpark.analisar, com as mesmas estruturas que o app.py exporta:
+    - `results` / `tipo`: saída de app.run_analytics (rankings, modelos, interações, estabilidade...)
+    - `feature_matrix`: matriz analisada; `definicoes`: o necessário para exportar o modelo de pontuação
+    - `redundancia`: análise de redundância, se pedida; `tempos`: registros do MonitorExecucao
+    - `arquivos`: {formato: caminho}, preenchido por DiscoverySpark.exportar
+    """
+
+    def __init__(self, projeto: str, target: str, tipo: str, timestamp: str, results: Dict[str, Any],
+                 feature_matrix: pd.DataFrame, definicoes: Optional[Dict[str, Any]] = None,
+                 redundancia: Optional[Dict[str, Any]] = None, tempos: Optional[List[Dict[str, Any]]] = None):
+        self.projeto = projeto
+        self.target = target
+        self.tipo = tipo
+        self.timestamp = timestamp
+        self.results = results
+        self.feature_matrix = feature_matrix
+        self.definicoes = definicoes
+        self.redundancia = redundancia
+        self.tempos = tempos or []
+        self.arquivos: Dict[str, str] = {}
+
+    def _individuais(self) -> Dict[str, Any]:
+        if self.tipo in ("Segmentado", "Deriva"):
+            raise ValueError(f"Análise do tipo {self.tipo} não tem ranking único por target: "
+                             f"use `results` ou para_dict()")
+        return self.results.get('individual', {}) if self.tipo == "Múltiplos" else self.results
+
+    @property
+    def targets(self) -> List[str]:
+        return [t.strip() for t in self.target.split(',')]
+
+    def ranking(self, target: Optional[str] = None) -> pd.DataFrame:
+        """Ranking de drivers de um target (Feature, Impacto, Direção...); opcional quando há um único target."""
+        individuais = self._individuais()
+        if target is None:
+            if len(individuais) != 1:
+                raise ValueError(f"Informe o target: {', '.join(individuais)}")
+            target = next(iter(individuais))
+        if target not in individuais:
+            raise KeyError(f"Target '{target}' não analisado ({', '.join(individuais)})")
+        return individuais[target]['ranking']
+
+    def para_dict(self) -> Dict[str, Any]:
+        """Estrutura serializável (a mesma do result_<projeto>_<ts>.json) com redundância e tempos por etapa."""
+        dados = app.resultados_para_dict(self.results, self.tipo, self.projeto, self.target, self.timestamp)
+        if self.redundancia:
+            dados['redundancia'] = {**self.redundancia, 'arquivo': os.path.basename(self.redundancia['arquivo'])}
+        dados['tempos'] = self.tempos
+        return dados
+
+
+class DiscoverySpark:
+    """
+    API embutível do motor: carga → DFS → analytics → exportação no mesmo processo, sem
+    subprocesso e sem ler arquivos de saída:
+    - Nada é impresso no terminal nem perguntado ao usuário (targets sinalizados seguem `politica`)
+    - Tabelas e matriz de features ficam em memória entre chamadas: vários targets pagam a carga
+      e o DFS uma vez (recarregar() descarta tudo)
+    - Eventos estruturados (etapas com duração e memória, matriz, análise, exportação) vão para o
+      logger `discoveryspark` (ou o informado), com os campos em `record.evento`; sem handler
+      configurado, nada é emitido
+    - Arquivos só são gravados por exportar() (e pelas arestas de `redundancia=True`)
+
+        motor = DiscoverySpark("analise_churn", janelas=(30, 90))
+        resultado = motor.analisar("churn")
+        resultado.ranking().head()
+    """
+
+    def __init__(self, projeto: str, mapeamento: Union[str, List[Dict[str, Any]]] = MAPEAMENTO_PADRAO,
+                 pasta_datasets: str = "datasets", janelas: Sequence[int] = (30, 90), data_corte=None,
+                 medir_memoria: bool = False, logger: Optional[logging.Logger] = None):
+        self.projeto = projeto
+        if isinstance(mapeamento, str):
+            rules = app.parse_mapping_file(mapeamento, verbose=False)
+            if not rules:
+                raise ValueError(f"Mapeamento vazio ou inválido: {mapeamento}")
+        else:
+            rules = mapeamento
+        self.rules = rules
+        self.pasta_datasets = pasta_datasets
+        self.janelas = list(janelas)
+        self.data_corte = pd.Timestamp(data_corte) if data_corte is not None else None
+        self.medir_memoria = medir_memoria
+        self.logger = logger or log
+        self._lock = threading.RLock()
+        self._tabelas = None
+        self._matriz = None
+        self._matrizes_periodos = {}
+
+    def _evento(self, nome: str, **campos):
+        evento = {'evento': nome, 'projeto': self.projeto,
+                  'instante': datetime.now().isoformat(timespec='milliseconds'), **campos}
+        if self.logger.isEnabledFor(logging.INFO):
+            detalhes = " ".join(f"{k}={v}" for k, v in campos.items() if v is not None)
+            self.logger.info(f"{nome} {detalhes}".strip(), extra={'evento': evento})
+
+    def _monitor(self) -> MonitorExecucao:
+        return MonitorExecucao(app.CONSOLE_SILENCIOSO, exibir_progresso=False, medir_memoria=self.medir_memoria,
+                               ao_registrar=lambda registro: self._evento('etapa', **registro))
+
+    def carregar(self) -> List[tuple]:
+        """Tabelas do mapeamento [(regra, DataFrame), ...], lidas uma vez."""
+        with self._lock:
+            if self._tabelas is None:
+                self._tabelas = app.carregar_tabelas(self.rules, self._monitor(), self.pasta_datasets,
+                                                     verbose=False)
+                self._evento('carga', tabelas={r['name']: list(df.shape) for r, df in self._tabelas})
+            return self._tabelas
+
+    def _copias_tabelas(self) -> List[tuple]:
+        # Cópias rasas: o EntitySet acrescenta colunas às tabelas, sem duplicar os dados já carregados
+        return [(r, df.copy(deep=False)) for r, df in self.carregar()]
+
+    def matriz(self) -> pd.DataFrame:
+        """Matriz de features (DFS + janelas de tempo), construída uma vez."""
+        return self._matriz_e_definicoes()[0]
+
+    def _matriz_e_definicoes(self) -> tuple:
+        with self._lock:
+            if self._matriz is None:
+                feature_matrix, _, definicoes = app.preparar_matriz(
+                    self.projeto, self.rules, self._monitor(), self.janelas, self.data_corte,
+                    tabelas=self._copias_tabelas(), verbose=False)
+                self._matriz = (feature_matrix, definicoes)
+                self._evento('matriz', linhas=feature_matrix.shape[0], features=feature_matrix.shape[1])
+            return self._matriz
+
+    def matriz_periodos(self, periodo: str, periodos: int = PERIODOS_PADRAO) -> pd.DataFrame:
+        """Matriz com a coluna de período para a análise de deriva (ver app.preparar_matriz_periodos)."""
+        if periodo not in FREQUENCIAS:
+            raise ValueError(f"Período inválido: {periodo} (use {', '.join(FREQUENCIAS)})")
+        with self._lock:
+            chave = (periodo, periodos)
+            if chave not in self._matrizes_periodos:
+                feature_matrix, _ = app.preparar_matriz_periodos(
+                    self.projeto, self.rules, self._monitor(), periodo, self.janelas, periodos,
+                    tabelas=self._copias_tabelas(), verbose=False)
+                self._matrizes_periodos[chave] = feature_matrix
+                self._evento('matriz', periodo=periodo, linhas=feature_matrix.shape[0],
+                             features=feature_matrix.shape[1] - 1)
+            return self._matrizes_periodos[chave]
+
+    def recarregar(self):
+        """Descarta tabelas e matrizes em memória (ex.: datasets alterados); a próxima chamada relê tudo."""
+        with self._lock:
+            self._tabelas = None
+            self._matriz = None
+            self._matrizes_periodos.clear()
+
+    def analisar(self, target: str, politica: str = 'continuar', por: Optional[str] = None,
+                 periodo: Optional[str] = None, periodos: int = PERIODOS_PADRAO, janela_periodos: int = 3,
+                 min_segmento: int = MIN_LINHAS_SEGMENTO, pre_filtro_mi: Optional[int] = None,
+                 orcamento_interacoes: float = ORCAMENTO_S, estabilidade: Optional[int] = None,
+                 modo_estabilidade: str = "bootstrap", redundancia: bool = False,
+                 limiar_redundancia: float = LIMIAR_PADRAO) -> Optional[ResultadoAnalise]:
+        """
+        Analisa um ou mais targets (separados por vírgula) com as mesmas opções do `discoveryspark run`.
+        Retorna None se a política descartar todos os targets (ex.: 'cancelar' com target sinalizado).
+        """
+        if politica not in POLITICAS_TARGETS:
+            raise ValueError(f"Política inválida: {politica} (use {', '.join(POLITICAS_TARGETS)}; a API não pergunta)")
+        if por and periodo:
+            raise ValueError("Use `por` ou `periodo`, não os dois")
+        if modo_estabilidade not in MODOS_REAMOSTRAGEM:
+            raise ValueError(f"Modo de reamostragem inválido: {modo_estabilidade} (use {', '.join(MODOS_REAMOSTRAGEM)})")
+
+        if periodo:
+            feature_matrix, definicoes = self.matriz_periodos(periodo, periodos), None
+        else:
+            feature_matrix, definicoes = self._matriz_e_definicoes()
+
+        ts = datetime.now().strftime("%Y%m%d%H%M%S%f")
+        monitor = self._monitor()
+        results, tipo_ml = app.run_analytics(
+            feature_matrix, target, monitor=monitor, politica=politica, por=por,
+            min_linhas_segmento=min_segmento, janela_periodos=janela_periodos if periodo else None,
+            pre_filtro_mi=pre_filtro_mi, orcamento_interacoes=orcamento_interacoes,
+            reamostras=estabilidade, modo_reamostragem=modo_estabilidade, verbose=False)
+        if results is None:
+            self._evento('analise', target=target, status='cancelada')
+            return None
+
+        analise_redundancia = None
+        if redundancia:
+            os.makedirs("resultados", exist_ok=True)
+            with monitor.estagio("redundancia"):
+                analise_redundancia = analisar_redundancia(
+                    feature_matrix.drop(columns=[t.strip() for t in target.split(',')], errors='ignore'),
+                    os.path.join("resultados", f"redundancia_{self.projeto}_{ts}.npz"), limiar_redundancia)
+
+        resultado = ResultadoAnalise(self.projeto, target, tipo_ml, ts, results, feature_matrix, definicoes,
+                                     analise_redundancia, monitor.registros)
+        self._evento('analise', target=target, tipo=tipo_ml, status='ok',
+                     duracao_s=sum(r['duracao_s'] for r in monitor.registros if r['alvo'] is None))
+        return resultado
+
+    def exportar(self, resultado: ResultadoAnalise, formatos: Sequence[str] = EXPORTACOES) -> Dict[str, str]:
+        """Grava em resultados/ os formatos pedidos (markdown, json, csv, modelo). Retorna {formato: caminho}."""
+        invalidos = set(formatos) - set(EXPORTACOES)
+        if invalidos:
+            raise ValueError(f"Exportação inválida: {', '.join(sorted(invalidos))} (use {', '.join(EXPORTACOES)})")
+        os.makedirs("resultados", exist_ok=True)
+        projeto, target, ts, tipo_ml = resultado.projeto, resultado.target, resultado.timestamp, resultado.tipo
+        monitor = self._monitor()
+        if 'markdown' in formatos:
+            with monitor.estagio("export_markdown"):
+                arquivo = app.export_to_markdown(resultado.results, tipo_ml, projeto, target, ts,
+                                                 resultado.redundancia, verbose=False)
+            if arquivo:
+                resultado.arquivos['markdown'] = os.path.join("resultados", arquivo)
+        if 'json' in formatos:
+            with monitor.estagio("export_json"):
+                arquivo = app.export_to_json(resultado.results, tipo_ml, projeto, target, ts,
+                                             resultado.redundancia, verbose=False)
+            if arquivo:
+                resultado.arquivos['json'] = os.path.join("resultados", arquivo)
+        if 'csv' in formatos:
+            caminho = os.path.join("resultados", f"result_{projeto}_{ts}.csv")
+            with monitor.estagio("export_csv"):
+                resultado.feature_matrix.to_csv(caminho)
+            resultado.arquivos['csv'] = caminho
+        if ('modelo' in formatos and resultado.definicoes is not None
+                and tipo_ml not in ("Segmentado", "Deriva")):
+            with monitor.estagio("export_modelo"):
+                resultado.arquivos['modelo'] = app.export_modelo(resultado.results, tipo_ml,
+                                                                 resultado.definicoes, projeto, ts)
+        resultado.tempos.extend(monitor.registros)
+        self._evento('exportacao', target=target, arquivos=dict(resultado.arquivos))
+        return resultado.arquivos
+
+    def executar(self, target: str, exportar: Sequence[str] = (), **opcoes) -> Optional[ResultadoAnalise]:
+        """Pipeline completo de uma chamada: analisar(target, **opcoes) e, se pedido, exportar(formatos)."""
+        resultado = self.analisar(target, **opcoes)
+        if resultado is not None and exportar:
+            self.exportar(resultado, exportar)
+        return resultado
@@ -0,0 +1,33 @@
+"""
+Padrões e opções da linha de comando compartilhados pelos módulos de análise e pelo discoveryspark.py.
+Sem dependências: importar este módulo não carrega pandas, featuretools nem sklearn.
+"""
+import os
+
+# Caminho do mapeamento lido por app.parse_mapping_file
+MAPEAMENTO_PADRAO = os.path.join("mapeamento", "mapeamento.txt")
+
+# Checkpoints das execuções (um diretório por run_id, retomado com --resume)
+RAIZ_EXECUCOES = os.path.join("resultados", "execucoes")
+
+# Saídas que podem ser gravadas ao fim de uma análise (jobs do lote e DiscoverySpark.exportar)
+EXPORTACOES = ('markdown', 'json', 'csv', 'modelo')
+
+# Políticas não interativas para targets sinalizados por validate_targets
+POLITICAS_TARGETS = ['continuar', 'sugeridos', 'cancelar']
+
+# Deriva temporal (--period): frequência do pandas de cada opção e períodos analisados
+FREQUENCIAS = {'monthly': 'M', 'weekly': 'W'}
+PERIODOS_PADRAO = 12
+
+# Orçamento em segundos, por target, para verificar interações entre drivers
+ORCAMENTO_S = 10.0
+
+# Reamostragens de estabilidade do ranking (--estabilidade)
+MODOS_REAMOSTRAGEM = ("bootstrap", "subamostra")
+
+# |Correlação| mínima para duas features serem consideradas redundantes
+LIMIAR_PADRAO = 0.95
+
+# Segmentos com menos linhas que isso são ignorados em --by
+MIN_LINHAS_SEGMENTO = 30
@@ -0,0 +1,243 @@
+import warnings
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+QUANTIS = (0.05, 0.25, 0.5, 0.75, 0.95)
+MAX_CATEGORIAS_TARGET = 20
+
+
+class AcumuladorPerfil:
+    """
+    Estatísticas suficientes de todas as colunas numéricas, atualizadas bloco a bloco:
+    - contagem de não nulos, soma e soma de quadrados (com deslocamento para estabilidade numérica)
+    - produtos cruzados com as colunas de referência (targets e principais drivers) para correlação
+    - amostra uniforme de até `max_amostra` linhas para os quantis (cada linha recebe uma chave
+      aleatória e ficam as menores, sem precisar saber o total de linhas antes de ler o arquivo)
+    - contagem de valores dos targets
+    Um DataFrame inteiro é tratado como um único bloco, então o resultado em memória e
+    o resultado por chunks usam exatamente o mesmo cálculo.
+    """
+
+    def __init__(self, colunas: List[str], referencias: List[str], alvos: List[str],
+                 max_amostra: int = 100_000, seed: int = 42):
+        self.colunas = colunas
+        self.referencias = [c for c in referencias if c in colunas]
+        self.idx_referencias = [colunas.index(c) for c in self.referencias]
+        self.alvos = [c for c in alvos if c in colunas]
+        self.max_amostra = max_amostra
+        self.rng = np.random.default_rng(seed)
+
+        k, r = len(colunas), len(self.referencias)
+        self.n = 0
+        self.deslocamento = None
+        self.nao_nulos = np.zeros(k)
+        self.soma = np.zeros(k)
+        self.soma_quadrados = np.zeros(k)
+        self.soma_cruzada = np.zeros((k, r))
+        self.amostra = np.empty((0, k))
+        self.chaves_amostra = np.empty(0)
+        self.contagens_alvo: Dict[str, Optional[pd.Series]] = {a: pd.Series(dtype=float) for a in self.alvos}
+
+    def atualizar(self, bloco: pd.DataFrame):
+        X = bloco[self.colunas].to_numpy(dtype=np.float64, na_value=np.nan)
+        nulos = np.isnan(X)
+        if self.deslocamento is None:
+            with np.errstate(all='ignore'):
+                self.deslocamento = np.nan_to_num(np.nanmean(X, axis=0)) if len(X) else np.zeros(X.shape[1])
+
+        # Valores centralizados no deslocamento; nulos viram 0 (não contribuem para as somas)
+        Z = np.where(nulos, 0.0, X - self.deslocamento)
+        self.n += len(X)
+        self.nao_nulos += (~nulos).sum(axis=0)
+        self.soma += Z.sum(axis=0)
+        self.soma_quadrados += np.einsum('ij,ij->j', Z, Z)
+        if self.idx_referencias:
+            self.soma_cruzada += Z.T @ Z[:, self.idx_referencias]
+
+        self.amostra = np.vstack([self.amostra, X])
+        self.chaves_amostra = np.concatenate([self.chaves_amostra, self.rng.random(len(X))])
+        if len(self.amostra) > self.max_amostra:
+            menores = np.argpartition(self.chaves_amostra, self.max_amostra)[:self.max_amostra]
+            self.amostra = self.amostra[menores]
+            self.chaves_amostra = self.chaves_amostra[menores]
+
+        for alvo in self.alvos:
+            if self.contagens_alvo[alvo] is None:
+                continue
+            contagem = self.contagens_alvo[alvo].add(bloco[alvo].value_counts(), fill_value=0)
+            # Targets contínuos não têm distribuição por categoria
+            self.contagens_alvo[alvo] = contagem if len(contagem) <= MAX_CATEGORIAS_TARGET else None
+
+    def resultado(self) -> pd.DataFrame:
+        """Tabela de perfil: uma linha por coluna numérica."""
+        with np.errstate(all='ignore'):
+            media_z = self.soma / self.nao_nulos
+            media = media_z + self.deslocamento
+            variancia = (self.soma_quadrados - self.nao_nulos * media_z ** 2) / (self.nao_nulos - 1)
+            std = np.sqrt(np.clip(variancia, 0, None))
+
+            # Correlação com os nulos imputados pelo deslocamento (a média do primeiro bloco), não por 0
+            # como no fillna(0) do motor: colunas com muitos nulos podem diferir do ranking
+            media_linhas = self.soma / self.n
+            cov = self.soma_cruzada / self.n - np.outer(media_linhas, media_linhas[self.idx_referencias])
+            var_linhas = self.soma_quadrados / self.n - media_linhas ** 2
+            desvio = np.sqrt(np.clip(var_linhas, 0, None))
+            corr = cov / np.outer(desvio, desvio[self.idx_referencias])
+        corr = np.nan_to_num(corr)
+
+        perfil = pd.DataFrame({
+            'media': media,
+            'std': std,
+            'taxa_nulos': 1 - self.nao_nulos / max(self.n, 1),
+        }, index=self.colunas)
+
+        amostra = self.amostra
+        if len(amostra):
+            with warnings.catch_warnings():
+                # Colunas inteiramente nulas na amostra geram aviso e quantis NaN
+                warnings.simplefilter('ignore', RuntimeWarning)
+                quantis = np.nanquantile(amostra, QUANTIS, axis=0)
+            for q, valores in zip(QUANTIS, quantis):
+                perfil[f"q{int(q * 100):02d}"] = valores
+
+        for j, ref in enumerate(self.referencias):
+            perfil[f"corr_{ref}"] = corr[:, j]
+
+        # Maior correlação (em módulo) com outra coluna de referência
+        if self.referencias:
+            absoluta = np.abs(corr).copy()
+            for j, i in enumerate(self.idx_referencias):
+                absoluta[i, j] = -1
+            melhor = absoluta.argmax(axis=1)
+            perfil['top_corr_com'] = [self.referencias[j] for j in melhor]
+            perfil['top_corr'] = corr[np.arange(len(self.colunas)), melhor]
+        return perfil
+
+
+def _escolher_referencias(colunas: List[str], alvos: List[str], drivers: List[str], limite: int = 30) -> List[str]:
+    referencias = [c for c in alvos if c in colunas]
+    referencias += [c for c in drivers if c in colunas and c not in referencias]
+    return referencias[:limite]
+
+
+def perfilar_dataframe(df: pd.DataFrame, alvos: Optional[List[str]] = None,
+                       drivers: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Perfil de todas as colunas numéricas de um DataFrame em memória (uma passada vetorizada)."""
+    colunas = df.select_dtypes(include=['number', 'bool']).columns.tolist()
+    alvos = [a for a in (alvos or []) if a in df.columns]
+    referencias = _escolher_referencias(colunas, alvos, drivers or [])
+    acumulador = AcumuladorPerfil(colunas, referencias, alvos)
+    if colunas:
+        acumulador.atualizar(df)
+    return {
+        'linhas': len(df),
+        'colunas_total': len(df.columns),
+        'perfil': acumulador.resultado() if colunas else pd.DataFrame(),
+        'alvos': alvos,
+        'referencias': acumulador.referencias,
+        'contagens_alvo': acumulador.contagens_alvo,
+        'linhas_amostra': len(acumulador.amostra),
+        'amostrado': len(df) > acumulador.max_amostra
+    }
+
+
+def perfilar_csv(caminho_csv: str, alvos: Optional[List[str]] = None, drivers: Optional[List[str]] = None,
+                 max_linhas_amostra: int = 100_000, chunksize: int = 200_000, seed: int = 42) -> Dict[str, Any]:
+    """
+    Perfil de um CSV sem carregá-lo inteiro, lido por chunks com memória constante:
+    - Projeção (usecols): com drivers conhecidos (resultados da execução), só targets e drivers são
+      lidos; sem eles, todas as colunas numéricas, para escolher as mais informativas
+    - Média, desvio, nulos, correlações e distribuição dos targets são exatos (todas as linhas);
+      os quantis vêm de uma amostra uniforme de até `max_linhas_amostra` linhas
+    """
+    cabecalho = pd.read_csv(caminho_csv, nrows=1000)
+    numericas = cabecalho.select_dtypes(include=['number', 'bool']).columns.tolist()
+    alvos = [a for a in (alvos or []) if a in cabecalho.columns]
+    drivers = [d for d in (drivers or []) if d in numericas]
+    if drivers:
+        colunas = [c for c in numericas if c in alvos or c in drivers]
+    else:
+        colunas = numericas
+    usecols = colunas + [a for a in alvos if a not in colunas]
+
+    acumulador = AcumuladorPerfil(colunas, _escolher_referencias(colunas, alvos, drivers), alvos,
+                                  max_amostra=max_linhas_amostra, seed=seed)
+    for bloco in pd.read_csv(caminho_csv, usecols=usecols, chunksize=chunksize):
+        acumulador.atualizar(bloco)
+    return {
+        'linhas': acumulador.n,
+        'linhas_amostra': len(acumulador.amostra),
+        'colunas_total': len(cabecalho.columns),
+        'colunas_numericas': len(numericas),
+        'perfil': acumulador.resultado() if colunas else pd.DataFrame(),
+        'alvos': alvos,
+        'referencias': acumulador.referencias,
+        'contagens_alvo': acumulador.contagens_alvo,
+        'amostrado': acumulador.n > max_linhas_amostra
+    }
+
+
+def colunas_informativas(resultado: Dict[str, Any], drivers: Optional[List[str]] = None,
+                         limite: int = 15) -> List[str]:
+    """Targets, depois principais drivers da execução, depois as colunas mais correlacionadas aos targets."""
+    perfil = resultado['perfil']
+    if perfil.empty:
+        return []
+    escolhidas = [a for a in resultado['alvos'] if a in perfil.index]
+    escolhidas += [d for d in (drivers or []) if d in perfil.index and d not in escolhidas]
+    colunas_corr = [f"corr_{a}" for a in resultado['alvos'] if f"corr_{a}" in perfil.columns]
+    if colunas_corr:
+        forca = perfil[colunas_corr].abs().max(axis=1)
+    else:
+        forca = perfil['std'] / perfil['media'].abs().replace(0, np.nan)  # sem target: maior variação relativa
+    for col in forca.fillna(0).sort_values(ascending=False).index:
+        if len(escolhidas) >= limite:
+            break
+        if col not in escolhidas and perfil.loc[col, 'taxa_nulos'] < 1:
+            escolhidas.append(col)
+    return escolhidas[:limite]
+
+
+def formatar_perfil(resultado: Dict[str, Any], drivers: Optional[List[str]] = None, limite: int = 15) -> str:
+    """Texto do resumo para os agentes: visão geral + perfil das colunas mais informativas."""
+    perfil = resultado['perfil']
+    summary = [f"Total de registros: {resultado['linhas']}"]
+    n_numericas = resultado.get('colunas_numericas', len(perfil))
+    summary.append(f"Total de colunas: {resultado['colunas_total']} ({n_numericas} numéricas"
+                   + (f", {len(perfil)} perfiladas)" if len(perfil) < n_numericas else ")"))
+    if perfil.empty:
+        return "\n".join(summary)
+
+    constantes = int((perfil['std'].fillna(0) == 0).sum())
+    muito_nulas = int((perfil['taxa_nulos'] > 0.5).sum())
+    summary.append(f"Taxa média de nulos: {perfil['taxa_nulos'].mean():.1%} | "
+                   f"colunas constantes: {constantes} | colunas com >50% nulos: {muito_nulas}")
+    if resultado['amostrado']:
+        summary.append(f"Quantis calculados sobre amostra aleatória de {resultado['linhas_amostra']} linhas")
+
+    for alvo in resultado['alvos']:
+        contagem = resultado['contagens_alvo'].get(alvo)
+        if contagem is not None and len(contagem):
+            dist = contagem / contagem.sum()
+            summary.append(f"Distribuição de {alvo}: " + ", ".join(f"{k}: {v:.1%}" for k, v in dist.items()))
+        elif alvo in perfil.index:
+            linha = perfil.loc[alvo]
+            summary.append(f"{alvo} (contínuo): média={linha['media']:.2f}, std={linha['std']:.2f}")
+
+    colunas = colunas_informativas(resultado, drivers, limite)
+    summary.append(f"Perfil das {len(colunas)} colunas mais informativas:")
+    for col in colunas:
+        linha = perfil.loc[col]
+        partes = [f"média={linha['media']:.2f}", f"std={linha['std']:.2f}"]
+        if 'q50' in perfil.columns:
+            partes.append(f"p05/p50/p95={linha['q05']:.2f}/{linha['q50']:.2f}/{linha['q95']:.2f}")
+        partes.append(f"nulos={linha['taxa_nulos']:.1%}")
+        for alvo in resultado['alvos']:
+            if f"corr_{alvo}" in perfil.columns and col != alvo:
+                partes.append(f"corr({alvo})={linha[f'corr_{alvo}']:+.2f}")
+        if 'top_corr_com' in perfil.columns and linha['top_corr_com'] != col:
+            partes.append(f"mais correlacionada: {linha['top_corr_com']} ({linha['top_corr']:+.2f})")
+        summary.append(f"  {col}: " + ", ".join(partes))
+    return "\n".join(summary)
@@ -0,0 +1,181 @@
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+import featuretools as ft
+from rich.console import Console
+from rich.table import Table
+from rich.panel import Panel
+
+import app
+from codificacao_categorica import aplicar_codificacao
+from janelas_temporais import coluna_data_da_tabela
+from discoveryspark import analisar_argumentos
+
+console = Console()
+
+
+class Pontuador:
+    """
+    Pontua entidades novas com as features e modelos salvos por app.py (resultados/modelo_<projeto>_<ts>/):
+    - Filtra a tabela pai e as filhas para as chaves pedidas antes de montar o EntitySet
+    - Recalcula só essas linhas com ft.calculate_feature_matrix e as mesmas janelas de tempo
+    - Aplica a codificação das categóricas do treino e os estimadores de cada target
+    Definições e modelos são carregados uma vez; cada chamada de pontuar() custa proporcional ao lote.
+    As mensagens do motor (carga, EntitySet, janelas) só aparecem com `verbose`.
+    """
+
+    def __init__(self, diretorio_modelo: str, verbose: bool = False):
+        self.diretorio = diretorio_modelo
+        self.verbose = verbose
+        self.features = ft.load_features(os.path.join(diretorio_modelo, "features.json"))
+        self.artefato = joblib.load(os.path.join(diretorio_modelo, "modelo.joblib"))
+        self.rules = self.artefato['rules']
+        self.pai = [r for r in self.rules if r['role'] == 'pai'][0]
+
+    def carregar_tabelas(self, pasta_datasets: str = "datasets") -> Dict[str, pd.DataFrame]:
+        """Lê as tabelas do mapeamento salvo (mesmas fontes e tipos do treino)."""
+        return {r['name']: app.carregar_tabela(r, pasta_datasets, verbose=self.verbose) for r in self.rules}
+
+    def _filtrar(self, tabelas: Dict[str, pd.DataFrame], chaves) -> List[tuple]:
+        filtradas = []
+        for r in self.rules:
+            df = tabelas[r['name']]
+            if r['role'] in ('pai', 'filho'):
+                df = df[df[r['keys'][0]].isin(chaves)]
+            # Cópia: construir_entityset acrescenta a coluna de índice das filhas
+            filtradas.append((r, df.copy()))
+        return filtradas
+
+    def calcular_features(self, tabelas: Dict[str, pd.DataFrame], chaves=None) -> pd.DataFrame:
+        """Matriz de features (DFS + janelas) apenas para `chaves` (padrão: todas as linhas da tabela pai)."""
+        if chaves is None:
+            chaves = tabelas[self.pai['name']][self.pai['keys'][0]].unique()
+        corte = self.artefato['data_corte'] or self._cortes(tabelas)
+        filtradas = self._filtrar(tabelas, chaves)
+        es, _ = app.construir_entityset(self.artefato['projeto'], filtradas, self.artefato['tipos_logicos'],
+                                       verbose=self.verbose)
+        feature_matrix = ft.calculate_feature_matrix(self.features, entityset=es, instance_ids=list(chaves))
+        return app.sintetizar_janelas(filtradas, feature_matrix, self.artefato['janelas'], corte, self.verbose)
+
+    def _cortes(self, tabelas: Dict[str, pd.DataFrame]) -> Dict[str, pd.Timestamp]:
+        """Corte das janelas igual ao do treino: data mais recente de cada filha (antes de filtrar o lote)."""
+        cortes = {}
+        for r in self.rules:
+            if r['role'] == 'filho':
+                coluna_data = coluna_data_da_tabela(r, tabelas[r['name']])
+                if coluna_data is not None:
+                    cortes[r['name']] = tabelas[r['name']][coluna_data].max()
+        return cortes
+
+    def prever(self, feature_matrix: pd.DataFrame) -> pd.DataFrame:
+        """Previsões de cada target: probabilidade (classificação binária) e/ou valor previsto."""
+        previsoes = {}
+        for target, modelo in self.artefato['targets'].items():
+            numericas = feature_matrix.select_dtypes(include=['number', 'bool'])
+            if modelo['codificacao']:
+                numericas = pd.concat([numericas.drop(columns=list(modelo['codificacao']), errors='ignore'),
+                                       aplicar_codificacao(feature_matrix, modelo['codificacao'])], axis=1)
+            X = numericas.reindex(columns=modelo['colunas']).fillna(0)
+            estimador = modelo['estimador']
+            previsto = estimador.predict(X)
+            if modelo['classes']:
+                previsoes[f"previsao_{target}"] = [modelo['classes'].get(int(v), v) for v in previsto]
+            else:
+                previsoes[f"previsao_{target}"] = previsto
+            if modelo['tipo'] == "Classificação" and len(estimador.classes_) == 2:
+                previsoes[f"score_{target}"] = estimador.predict_proba(X)[:, 1]
+        return pd.DataFrame(previsoes, index=feature_matrix.index)
+
+    def pontuar(self, tabelas: Dict[str, pd.DataFrame], chaves=None) -> pd.DataFrame:
+        """Previsões seguidas dos valores de todas as features de cada entidade."""
+        feature_matrix = self.calcular_features(tabelas, chaves)
+        return pd.concat([self.prever(feature_matrix), feature_matrix], axis=1)
+
+    def drivers(self) -> List[str]:
+        """Principais drivers de todos os targets (colunas de destaque na saída)."""
+        colunas = []
+        for modelo in self.artefato['targets'].values():
+            colunas.extend(d for d in modelo['drivers'] if d not in colunas)
+        return colunas
+
+
+def medir_lotes(pontuador: Pontuador, tabelas: Dict[str, pd.DataFrame], tamanhos: List[int],
+                repeticoes: int = 3, seed: int = 42) -> List[Dict[str, Any]]:
+    """Latência e vazão de pontuar() para lotes de cada tamanho (mediana de `repeticoes` para lotes pequenos)."""
+    todas = tabelas[pontuador.pai['name']][pontuador.pai['keys'][0]].unique()
+    rng = np.random.default_rng(seed)
+    medicoes = []
+    for tamanho in tamanhos:
+        n = min(tamanho, len(todas))
+        vezes = repeticoes if n <= 1000 else 1
+        duracoes = []
+        for _ in range(vezes):
+            chaves = rng.choice(todas, size=n, replace=False)
+            inicio = time.perf_counter()
+            pontuador.pontuar(tabelas, chaves)
+            duracoes.append(time.perf_counter() - inicio)
+        latencia = float(np.median(duracoes))
+        medicoes.append({'lote': tamanho, 'entidades': n, 'latencia_s': latencia,
+                         'entidades_por_s': n / latencia if latencia > 0 else None})
+    return medicoes
+
+
+def exibir_lotes(medicoes):
+    tabela = Table(title="🎯 Pontuação: latência e vazão por tamanho de lote")
+    tabela.add_column("Lote", justify="right", style="cyan")
+    tabela.add_column("Entidades", justify="right")
+    tabela.add_column("Latência (s)", justify="right", style="green")
+    tabela.add_column("Entidades/s", justify="right", style="yellow")
+    for m in medicoes:
+        vazao = f"{m['entidades_por_s']:,.0f}" if m['entidades_por_s'] else "-"
+        tabela.add_row(f"{m['lote']:,}", f"{m['entidades']:,}", f"{m['latencia_s']:.3f}", vazao)
+    console.print(tabela)
+
+
+def _ler_chaves(args) -> Optional[list]:
+    if args.chaves:
+        return [c.strip() for c in args.chaves.split(',') if c.strip()]
+    if args.arquivo_chaves:
+        return pd.read_csv(args.arquivo_chaves).iloc[:, 0].tolist()
+    return None
+
+
+def main(args=None):
+    if args is None:
+        args = analisar_argumentos("score")
+
+    pontuador = Pontuador(args.modelo)
+    projeto = pontuador.artefato['projeto']
+    console.print(Panel(f"🎯 [bold]DiscoverySpark Pontuação[/bold]\nModelo: {args.modelo}\n"
+                        f"Targets: {', '.join(pontuador.artefato['targets'])}", style="blue"))
+
+    tabelas = pontuador.carregar_tabelas(args.datasets)
+    if args.medir:
+        exibir_lotes(medir_lotes(pontuador, tabelas, [int(t) for t in args.medir.split(',') if t.strip()]))
+        return
+
+    chaves = _ler_chaves(args)
+    if chaves is not None:
+        # Chaves chegam como texto: converte para o tipo da coluna de chave da tabela pai
+        tipo_chave = tabelas[pontuador.pai['name']][pontuador.pai['keys'][0]].dtype
+        chaves = pd.Series(chaves).astype(tipo_chave).tolist()
+    inicio = time.perf_counter()
+    resultado = pontuador.pontuar(tabelas, chaves)
+    duracao = time.perf_counter() - inicio
+
+    ts = datetime.now().strftime("%Y%m%d%H%M%S")
+    saida = args.saida or os.path.join("resultados", f"score_{projeto}_{ts}.csv")
+    previsoes = [c for c in resultado.columns if c.startswith(('previsao_', 'score_'))]
+    destaque = [d for d in pontuador.drivers() if d in resultado.columns]
+    resultado[previsoes + destaque].to_csv(saida)
+    console.print(f"[green]✓ {len(resultado)} entidade(s) pontuada(s) em {duracao:.3f}s "
+                  f"({len(resultado) / duracao:,.0f}/s). Saída: {saida}[/green]")
+
+
+if __name__ == "__main__":
+    main()
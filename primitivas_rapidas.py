@@ -0,0 +1,83 @@
+"""
+Primitivas de agregação rápidas para o Deep Feature Synthesis.
+
+O featuretools agrega cada tabela filha com um único `groupby(chave).agg({coluna: [funções]})`.
+Quando a função de uma primitiva é um callable Python (ex.: pd.Series.skew, o `x.iloc[-1]`
+do Last), o pandas a chama uma vez por grupo. Quando é o nome de uma agregação do groupby
+("sum", "skew", "last", ...), o pandas fatoriza a chave uma vez e reduz todas as linhas em
+um único laço vetorizado por coluna (kernels Cython do groupby).
+
+As primitivas abaixo herdam das padrão do featuretools — mesmos nomes, tipos de entrada e
+empilhamento, portanto os mesmos nomes de feature — e trocam apenas a função.
+
+Só SKEW e LAST mudam de kernel hoje. Sum, Mean, Std, Min, Max, Count e NumUnique padrão
+usam callables do numpy/pandas que o groupby ainda traduz para o kernel equivalente, mas
+essa tradução está depreciada (FutureWarning do pandas 2.1+): as subclasses fixam o nome
+da agregação para que não voltem a ser chamadas por grupo quando ela for removida.
+"""
+from featuretools.primitives import (Sum, Mean, Count, Std, Min, Max, Skew, Last, NumUnique,
+                                     PercentTrue, Mode)
+from featuretools.utils.gen_utils import Library
+
+
+class SomaRapida(Sum):
+    def get_function(self, agg_type=Library.PANDAS):
+        return "sum"
+
+
+class MediaRapida(Mean):
+    def get_function(self, agg_type=Library.PANDAS):
+        return "mean"
+
+
+class ContagemRapida(Count):
+    def get_function(self, agg_type=Library.PANDAS):
+        return "count"
+
+
+class DesvioRapido(Std):
+    # Mesmo ddof=1 que o pandas aplica hoje ao np.std do Std padrão
+    def get_function(self, agg_type=Library.PANDAS):
+        return "std"
+
+
+class MinimoRapido(Min):
+    def get_function(self, agg_type=Library.PANDAS):
+        return "min"
+
+
+class MaximoRapido(Max):
+    def get_function(self, agg_type=Library.PANDAS):
+        return "max"
+
+
+class AssimetriaRapida(Skew):
+    def get_function(self, agg_type=Library.PANDAS):
+        return "skew"
+
+
+class UltimoRapido(Last):
+    # Diferença em relação ao Last padrão: ignora nulos (último valor não nulo do grupo)
+    def get_function(self, agg_type=Library.PANDAS):
+        return "last"
+
+
+class UnicosRapido(NumUnique):
+    def get_function(self, agg_type=Library.PANDAS):
+        return "nunique"
+
+
+# Pares (padrão, rápida) comparados pelo benchmark
+PARES_PRIMITIVAS = [
+    (Sum, SomaRapida), (Mean, MediaRapida), (Count, ContagemRapida), (Std, DesvioRapido),
+    (Min, MinimoRapido), (Max, MaximoRapido), (Skew, AssimetriaRapida), (Last, UltimoRapido),
+    (NumUnique, UnicosRapido),
+]
+
+# Primitivas padrão que hoje já executam no kernel do groupby (o ganho no benchmark é ruído)
+KERNEL_JA_VETORIZADO = {Sum, Mean, Count, Std, Min, Max, NumUnique}
+
+# Conjunto padrão do ft.dfs com as versões rápidas (gera exatamente as mesmas features).
+# PercentTrue e Mode não têm agregação equivalente no groupby e seguem as do featuretools.
+PRIMITIVAS_AGREGACAO = [SomaRapida, DesvioRapido, MaximoRapido, AssimetriaRapida, MinimoRapido,
+                        MediaRapida, ContagemRapida, PercentTrue, UnicosRapido, Mode]
@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from padroes import LIMIAR_PADRAO
+
+TOP_PARES_PADRAO = 50
+TAMANHO_BLOCO = 512
+
+
+def matriz_padronizada(feature_matrix: pd.DataFrame, caminho: str, bloco: int = 256):
+    """
+    Cópia float32 padronizada (média 0, desvio 1) das colunas numéricas em um np.memmap em ordem
+    Fortran, de modo que cada bloco de colunas é contíguo no disco. É escrita bloco a bloco:
+    a matriz float64 inteira nunca fica em memória. Colunas constantes viram zeros (correlação 0).
+    Retorna (memmap, colunas, constantes).
+    """
+    colunas = list(feature_matrix.select_dtypes(include=['number', 'bool']).columns)
+    n = len(feature_matrix)
+    z = np.memmap(caminho, dtype=np.float32, mode='w+', shape=(n, max(len(colunas), 1)), order='F')
+    constantes = []
+    for j in range(0, len(colunas), bloco):
+        nomes = colunas[j:j + bloco]
+        X = feature_matrix[nomes].to_numpy(dtype=np.float64, na_value=np.nan)
+        X[~np.isfinite(X)] = 0.0
+        media = X.mean(axis=0)
+        desvio = X.std(axis=0)
+        constantes.extend(nome for nome, d in zip(nomes, desvio) if d == 0)
+        desvio[desvio == 0] = np.inf
+        z[:, j:j + len(nomes)] = (X - media) / desvio
+    z.flush()
+    return z, colunas, constantes
+
+
+def _correlacao_bloco(z, n, inicio_i, fim_i, inicio_j, fim_j, limiar, top_pares):
+    """Gram de um par de blocos de colunas (Z_I' Z_J / n = correlações) e as arestas que interessam."""
+    G = (np.asarray(z[:, inicio_i:fim_i]).T @ np.asarray(z[:, inicio_j:fim_j])) / np.float32(n)
+    if inicio_i == inicio_j:
+        # Bloco diagonal: só o triângulo superior (sem a própria coluna)
+        G[np.tril_indices(G.shape[0], m=G.shape[1])] = 0.0
+    absoluto = np.abs(G)
+    linhas, colunas = np.nonzero(absoluto >= limiar)
+    # Melhores pares do bloco para o top-k global (mesmo abaixo do limiar)
+    k = min(top_pares, absoluto.size)
+    melhores = np.argpartition(absoluto.ravel(), -k)[-k:] if k else np.array([], dtype=np.int64)
+    topo_l, topo_c = np.unravel_index(melhores, G.shape)
+    return (linhas + inicio_i, colunas + inicio_j, G[linhas, colunas],
+            topo_l + inicio_i, topo_c + inicio_j, G[topo_l, topo_c])
+
+
+def correlacao_em_blocos(z, limiar: float = LIMIAR_PADRAO, top_pares: int = TOP_PARES_PADRAO,
+                         tamanho_bloco: int = TAMANHO_BLOCO, max_workers: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Correlação feature x feature calculada bloco a bloco (só blocos com J >= I) em um pool de threads;
+    o BLAS libera o GIL durante cada produto. Só as arestas com |r| >= limiar e os `top_pares`
+    melhores pares sobrevivem a cada bloco: a matriz m x m completa nunca é montada.
+    """
+    n, m = z.shape
+    inicios = list(range(0, m, tamanho_bloco))
+    tarefas = [(a, min(a + tamanho_bloco, m), b, min(b + tamanho_bloco, m))
+               for i, a in enumerate(inicios) for b in inicios[i:]]
+    if max_workers is None:
+        max_workers = min(os.cpu_count() or 1, len(tarefas)) or 1
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        partes = list(pool.map(lambda t: _correlacao_bloco(z, n, *t, limiar, top_pares), tarefas))
+
+    juntar = lambda indice, tipo: np.concatenate([p[indice] for p in partes]).astype(tipo) if partes else np.array([], dtype=tipo)
+    topo_r = juntar(5, np.float32)
+    # Zeros vêm do triângulo inferior dos blocos diagonais (pares repetidos ou da própria coluna)
+    ordem = np.argsort(-np.abs(topo_r), kind='stable')
+    ordem = ordem[topo_r[ordem] != 0][:top_pares]
+    return {
+        'i': juntar(0, np.uint32), 'j': juntar(1, np.uint32), 'r': juntar(2, np.float32),
+        'topo_i': juntar(3, np.uint32)[ordem], 'topo_j': juntar(4, np.uint32)[ordem], 'topo_r': topo_r[ordem],
+        'blocos': len(tarefas), 'workers': max_workers
+    }
+
+
+def grupos_redundantes(arestas: Dict[str, np.ndarray], colunas: List[str]) -> List[Dict[str, Any]]:
+    """
+    Componentes conexas do grafo de arestas |r| >= limiar. O representante sugerido de cada grupo
+    é a feature com mais arestas (a que mais "explica" as demais); grupos maiores primeiro.
+    """
+    m = len(colunas)
+    if len(arestas['i']) == 0:
+        return []
+    grafo = coo_matrix((np.ones(len(arestas['i'])), (arestas['i'], arestas['j'])), shape=(m, m))
+    _, rotulos = connected_components(grafo, directed=False)
+    graus = np.bincount(np.concatenate([arestas['i'], arestas['j']]), minlength=m)
+    tamanhos = np.bincount(rotulos)
+    grupos = []
+    for rotulo in np.flatnonzero(tamanhos >= 2):
+        membros = np.flatnonzero(rotulos == rotulo)
+        membros = membros[np.argsort(-graus[membros], kind='stable')]
+        grupos.append({'representante': colunas[membros[0]], 'membros': [colunas[k] for k in membros]})
+    return sorted(grupos, key=lambda g: -len(g['membros']))
+
+
+def analisar_redundancia(feature_matrix: pd.DataFrame, caminho_arestas: str, limiar: float = LIMIAR_PADRAO,
+                         top_pares: int = TOP_PARES_PADRAO, tamanho_bloco: int = TAMANHO_BLOCO,
+                         diretorio_temporario: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Padroniza a matriz em um memmap temporário, calcula as correlações em blocos e grava a lista
+    de arestas esparsa (índices uint32, r float32 e nomes das colunas) em `caminho_arestas` (.npz).
+    """
+    if feature_matrix.select_dtypes(include=['number', 'bool']).shape[1] < 2 or len(feature_matrix) < 2:
+        raise ValueError("A análise de redundância requer ao menos 2 linhas e 2 features numéricas")
+    diretorio = tempfile.mkdtemp(prefix="redundancia_", dir=diretorio_temporario)
+    try:
+        z, colunas, constantes = matriz_padronizada(feature_matrix, os.path.join(diretorio, "z.f32"))
+        arestas = correlacao_em_blocos(z, limiar, top_pares, tamanho_bloco)
+        del z
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    np.savez_compressed(caminho_arestas, i=arestas['i'], j=arestas['j'], r=arestas['r'],
+                        colunas=np.array(colunas, dtype=str), limiar=limiar)
+    pares = [{'Feature1': colunas[a], 'Feature2': colunas[b], 'Correlation': float(r)}
+             for a, b, r in zip(arestas['topo_i'], arestas['topo_j'], arestas['topo_r'])]
+    return {
+        'features': len(colunas),
+        'constantes': constantes,
+        'limiar': limiar,
+        'arestas': int(len(arestas['i'])),
+        'blocos': arestas['blocos'],
+        'workers': arestas['workers'],
+        'pares': pares,
+        'grupos': grupos_redundantes(arestas, colunas),
+        'arquivo': caminho_arestas
+    }
@@ -0,0 +1,109 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from padroes import MIN_LINHAS_SEGMENTO
+
+
+class MatrizSegmentada:
+    """
+    Matriz de features reordenada uma única vez pela coluna de segmento:
+    - pd.factorize + argsort estável agrupam as linhas de cada segmento em um bloco contíguo
+    - Cada segmento é então uma fatia posicional [início, fim) da mesma matriz (iloc com slice
+      devolve uma visão), sem filtros booleanos nem uma cópia da matriz por segmento
+    Segmentos com menos de `min_linhas` linhas ficam de fora (registrados em `ignorados`).
+    """
+
+    def __init__(self, feature_matrix: pd.DataFrame, coluna: str, min_linhas: int = MIN_LINHAS_SEGMENTO):
+        if coluna not in feature_matrix.columns:
+            raise ValueError(f"Coluna de segmento '{coluna}' não encontrada na matriz de features")
+        self.coluna = coluna
+        codigos, valores = pd.factorize(feature_matrix[coluna], sort=True)
+        ordem = np.argsort(codigos, kind='stable')
+        # Nulos (código -1) ficam no início e não formam segmento
+        self.matriz = feature_matrix.iloc[ordem]
+        contagens = np.bincount(codigos[codigos >= 0], minlength=len(valores))
+        inicio = int((codigos < 0).sum())
+        self.fatias: Dict[Any, slice] = {}
+        self.ignorados: Dict[Any, int] = {}
+        for valor, n in zip(valores, contagens):
+            if n >= min_linhas:
+                self.fatias[valor] = slice(inicio, inicio + int(n))
+            else:
+                self.ignorados[valor] = int(n)
+            inicio += int(n)
+
+    def segmento(self, valor) -> pd.DataFrame:
+        return self.matriz.iloc[self.fatias[valor]]
+
+    def tamanhos(self) -> Dict[Any, int]:
+        return {valor: fatia.stop - fatia.start for valor, fatia in self.fatias.items()}
+
+
+def analisar_segmentos(segmentada: MatrizSegmentada, targets: List[str],
+                       analisar: Callable[[pd.DataFrame, str], tuple],
+                       max_workers: Optional[int] = None,
+                       ao_concluir: Optional[Callable[[Any, str], None]] = None) -> Dict[str, Any]:
+    """
+    Executa `analisar(df_segmento, target)` para cada (segmento, target) em um pool de threads.
+    O treino das florestas (sklearn) libera o GIL, então os segmentos rodam em paralelo
+    compartilhando a mesma matriz em memória. `ao_concluir(segmento, target)` é chamado
+    na thread principal a cada tarefa concluída (ex.: avançar a barra de progresso).
+    Retorna {'segmentos': {valor: {target: {...}}}, 'erros': {...}, 'duracoes': {...}}.
+    """
+    tarefas = [(valor, target) for valor in segmentada.fatias for target in targets]
+    if max_workers is None:
+        max_workers = min(os.cpu_count() or 1, len(tarefas)) or 1
+
+    def executar(valor, target):
+        df = segmentada.segmento(valor)
+        if df[target].nunique() <= 1:
+            raise ValueError(f"target '{target}' constante no segmento")
+        inicio = time.perf_counter()
+        ranking, tipo, _ = analisar(df, target)
+        return {'ranking': ranking, 'tipo': tipo, 'linhas': len(df), 'duracao_s': time.perf_counter() - inicio}
+
+    segmentos: Dict[Any, Dict[str, Any]] = {valor: {} for valor in segmentada.fatias}
+    erros: Dict[Any, Dict[str, str]] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futuros = {pool.submit(executar, valor, target): (valor, target) for valor, target in tarefas}
+        for futuro in as_completed(futuros):
+            valor, target = futuros[futuro]
+            try:
+                segmentos[valor][target] = futuro.result()
+            except Exception as e:
+                erros.setdefault(valor, {})[target] = str(e)
+            if ao_concluir is not None:
+                ao_concluir(valor, target)
+
+    return {
+        'coluna': segmentada.coluna,
+        'targets': targets,
+        'tamanhos': segmentada.tamanhos(),
+        'ignorados': segmentada.ignorados,
+        'segmentos': {valor: r for valor, r in segmentos.items() if r},
+        'erros': erros,
+        'workers': max_workers
+    }
+
+
+def drivers_comuns(resultado: Dict[str, Any], target: str, top: int = 10) -> pd.DataFrame:
+    """
+    Tabela feature x segmento com a posição de cada feature no ranking de `target` de cada segmento,
+    ordenada pelas features presentes no top de mais segmentos (drivers comuns vs. específicos).
+    """
+    posicoes = {}
+    for valor, por_target in resultado['segmentos'].items():
+        if target in por_target:
+            ranking = por_target[target]['ranking'].head(top)
+            posicoes[str(valor)] = pd.Series(np.arange(1, len(ranking) + 1), index=ranking['Feature'])
+    if not posicoes:
+        return pd.DataFrame()
+    tabela = pd.DataFrame(posicoes)
+    tabela['segmentos'] = tabela.notna().sum(axis=1)
+    tabela['posicao_media'] = tabela.drop(columns='segmentos').mean(axis=1)
+    return tabela.sort_values(['segmentos', 'posicao_media'], ascending=[False, True])
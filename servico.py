@@ -0,0 +1,252 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from rich.console import Console
+from rich.panel import Panel
+
+import pandas as pd
+
+import app
+from instrumentacao import MonitorExecucao
+from fontes_dados import assinatura_datasets
+from padroes import MAPEAMENTO_PADRAO
+from discoveryspark import analisar_argumentos
+
+console = Console()
+
+
+class ServicoAnalise:
+    """
+    Mantém a matriz de features de um projeto em memória e responde análises de qualquer target:
+    - Carga, EntitySet, DFS e janelas rodam uma vez (e de novo só quando os datasets mudam)
+    - Cada requisição verifica a assinatura dos arquivos; se mudou, a matriz é reconstruída
+      uma única vez (as demais requisições esperam a nova versão)
+    - Resultados ficam em cache por (versão da matriz, target, política)
+    Várias análises podem rodar ao mesmo tempo: a saída detalhada do motor só aparece com `verbose`.
+    `mapeamento` é o caminho do mapeamento (relido a cada verificação) ou a lista de regras já montada.
+    """
+
+    def __init__(self, projeto, janelas=(30, 90), data_corte=None, max_cache=64, verbose=False,
+                 mapeamento=MAPEAMENTO_PADRAO, pasta_datasets="datasets"):
+        self.projeto = projeto
+        self.mapeamento = mapeamento
+        self.pasta_datasets = pasta_datasets
+        self.verbose = verbose
+        self.janelas = janelas
+        self.data_corte = data_corte
+        self.max_cache = max_cache
+        self.versao = 0
+        self.feature_matrix = None
+        self.assinatura = None
+        self.carregado_em = None
+        self.duracao_carga_s = None
+        self._lock_carga = threading.Lock()
+        self._lock_estado = threading.Lock()
+        self._cache = {}
+        self.latencias = deque(maxlen=1000)
+
+    def _saida(self):
+        return app.console if self.verbose else app.CONSOLE_SILENCIOSO
+
+    def _regras(self):
+        if isinstance(self.mapeamento, str):
+            return app.parse_mapping_file(self.mapeamento, verbose=self.verbose)
+        return self.mapeamento
+
+    def _assinatura(self, rules):
+        caminho = self.mapeamento if isinstance(self.mapeamento, str) else None
+        return assinatura_datasets(rules, self.pasta_datasets, caminho)
+
+    def _carregar(self):
+        rules = self._regras()
+        if not rules:
+            raise RuntimeError(f"Mapeamento vazio ou inválido: {self.mapeamento}")
+        assinatura = self._assinatura(rules)
+        inicio = time.perf_counter()
+        monitor = MonitorExecucao(self._saida(), exibir_progresso=False, medir_memoria=False)
+        feature_matrix, _, _ = app.preparar_matriz(self.projeto, rules, monitor, self.janelas, self.data_corte,
+                                                   pasta_datasets=self.pasta_datasets, verbose=self.verbose)
+        with self._lock_estado:
+            self.feature_matrix = feature_matrix
+            self.assinatura = assinatura
+            self.versao += 1
+            self.carregado_em = datetime.now().isoformat(timespec='seconds')
+            self.duracao_carga_s = time.perf_counter() - inicio
+            self._cache.clear()
+        console.print(f"[green]✓ Matriz v{self.versao} carregada: {feature_matrix.shape[0]} x "
+                      f"{feature_matrix.shape[1]} em {self.duracao_carga_s:.1f}s[/green]")
+
+    def _desatualizada(self):
+        if self.feature_matrix is None:
+            return True
+        rules = self._regras()
+        return not rules or self._assinatura(rules) != self.assinatura
+
+    def matriz_atual(self, forcar=False):
+        """Retorna (versão, matriz), reconstruindo-a se os datasets mudaram desde a última carga."""
+        if forcar or self._desatualizada():
+            with self._lock_carga:
+                # Outra requisição pode ter recarregado enquanto esta esperava
+                if forcar or self._desatualizada():
+                    if self.feature_matrix is not None:
+                        console.print("[yellow]🔄 Datasets alterados: reconstruindo a matriz de features...[/yellow]")
+                    self._carregar()
+        with self._lock_estado:
+            return self.versao, self.feature_matrix
+
+    def analisar(self, target, politica='continuar', exportar=False):
+        versao, feature_matrix = self.matriz_atual()
+        chave = (versao, target, politica)
+        with self._lock_estado:
+            em_cache = self._cache.get(chave)
+        if em_cache is not None:
+            return em_cache, True
+
+        ts = datetime.now().strftime("%Y%m%d%H%M%S%f")
+        monitor = MonitorExecucao(self._saida(), exibir_progresso=False, medir_memoria=False)
+        results, tipo_ml = app.run_analytics(feature_matrix, target, monitor=monitor, politica=politica,
+                                             verbose=self.verbose)
+        if results is None:
+            return None, False
+
+        dados = app.resultados_para_dict(results, tipo_ml, self.projeto, target, ts)
+        dados['versao_matriz'] = versao
+        dados['tempos'] = {r['estagio'] if r['alvo'] is None else f"{r['estagio']}:{r['alvo']}": r['duracao_s']
+                           for r in monitor.registros}
+        if exportar:
+            dados['arquivos'] = [app.export_to_markdown(results, tipo_ml, self.projeto, target, ts,
+                                                        verbose=self.verbose),
+                                 app.export_to_json(results, tipo_ml, self.projeto, target, ts, verbose=self.verbose)]
+
+        with self._lock_estado:
+            if versao == self.versao:
+                if len(self._cache) >= self.max_cache:
+                    self._cache.pop(next(iter(self._cache)))
+                self._cache[chave] = dados
+        return dados, False
+
+    def registrar_latencia(self, rota, status, latencia_s, detalhe=""):
+        self.latencias.append({'rota': rota, 'status': status, 'latencia_s': latencia_s})
+        hora = datetime.now().strftime("%H:%M:%S")
+        cor = "green" if status < 400 else "red"
+        console.print(f"[dim]{hora}[/dim] {rota} [{cor}]{status}[/{cor}] {latencia_s * 1000:.0f} ms {detalhe}")
+
+    def metricas(self):
+        por_rota = {}
+        for m in list(self.latencias):
+            por_rota.setdefault(m['rota'], []).append(m['latencia_s'])
+        resumo = {}
+        for rota, valores in por_rota.items():
+            serie = pd.Series(valores)
+            resumo[rota] = {'requisicoes': len(valores), 'p50_s': float(serie.quantile(0.5)),
+                            'p95_s': float(serie.quantile(0.95)), 'max_s': float(serie.max())}
+        return resumo
+
+    def status(self):
+        with self._lock_estado:
+            shape = self.feature_matrix.shape if self.feature_matrix is not None else (0, 0)
+            return {'projeto': self.projeto, 'versao_matriz': self.versao, 'linhas': shape[0],
+                    'features': shape[1], 'carregado_em': self.carregado_em,
+                    'duracao_carga_s': self.duracao_carga_s, 'resultados_em_cache': len(self._cache)}
+
+
+def criar_handler(servico):
+    class Handler(BaseHTTPRequestHandler):
+        """Rotas: GET /status, GET /metricas, GET|POST /analisar, POST /recarregar."""
+
+        def log_message(self, formato, *args):
+            pass  # as requisições são registradas com latência em registrar_latencia
+
+        def _responder(self, status, corpo):
+            dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def _parametros(self):
+            url = urlparse(self.path)
+            parametros = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            tamanho = int(self.headers.get("Content-Length") or 0)
+            if tamanho:
+                parametros.update(json.loads(self.rfile.read(tamanho).decode("utf-8")))
+            return url.path, parametros
+
+        def _tratar(self):
+            inicio = time.perf_counter()
+            rota, detalhe = self.path, ""
+            try:
+                rota, parametros = self._parametros()
+                if rota == "/status":
+                    status, corpo = 200, servico.status()
+                elif rota == "/metricas":
+                    status, corpo = 200, servico.metricas()
+                elif rota == "/recarregar" and self.command == "POST":
+                    servico.matriz_atual(forcar=True)
+                    status, corpo = 200, servico.status()
+                elif rota == "/analisar":
+                    target = parametros.get("target")
+                    politica = parametros.get("politica", "continuar")
+                    if not target:
+                        status, corpo = 400, {'erro': "Informe o parâmetro 'target'"}
+                    elif politica not in app.POLITICAS_TARGETS:
+                        status, corpo = 400, {'erro': f"Política inválida: {politica} ({', '.join(app.POLITICAS_TARGETS)})"}
+                    else:
+                        exportar = str(parametros.get("exportar", "")).lower() in ("1", "true", "sim")
+                        dados, cache = servico.analisar(target, politica, exportar)
+                        detalhe = f"{target}{' (cache)' if cache else ''}"
+                        if dados is None:
+                            status, corpo = 409, {'erro': f"Análise de '{target}' cancelada pela política '{politica}'"}
+                        else:
+                            status, corpo = 200, {**dados, 'cache': cache}
+                else:
+                    status, corpo = 404, {'erro': f"Rota não encontrada: {rota}"}
+            except ValueError as e:
+                status, corpo = 400, {'erro': str(e)}
+            except Exception as e:
+                status, corpo = 500, {'erro': str(e)}
+
+            latencia = time.perf_counter() - inicio
+            if isinstance(corpo, dict) and rota == "/analisar":
+                corpo['latencia_s'] = latencia
+            self._responder(status, corpo)
+            servico.registrar_latencia(f"{self.command} {rota}", status, latencia, detalhe)
+
+        do_GET = _tratar
+        do_POST = _tratar
+
+    return Handler
+
+
+def main(args=None):
+    if args is None:
+        args = analisar_argumentos("serve")
+
+    app.setup_environment()
+    janelas = [int(j) for j in args.janelas.split(',') if j.strip()]
+    servico = ServicoAnalise(args.projeto, janelas, pd.Timestamp(args.data_corte) if args.data_corte else None,
+                             verbose=args.verbose, mapeamento=args.mapeamento, pasta_datasets=args.datasets)
+
+    console.print(Panel(f"🔥 [bold]DiscoverySpark Serviço[/bold]\nProjeto: {args.projeto}\n"
+                        f"http://{args.host}:{args.porta}", style="blue"))
+    servico.matriz_atual()
+
+    servidor = ThreadingHTTPServer((args.host, args.porta), criar_handler(servico))
+    servidor.daemon_threads = True
+    console.print(f"[cyan]Pronto. Ex.: curl 'http://{args.host}:{args.porta}/analisar?target=churn'[/cyan]")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Serviço encerrado.[/yellow]")
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Testes do cliente da análise profunda contra um servidor HTTP local (sem rede nem chave de API).
+Executar a partir da raiz do projeto: python -m unittest discover tests
+"""
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from rich.console import Console
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analise_profunda import AnaliseProfunda, DeepSeekAPIClient, SeniorEstrategista  # noqa: E402
+from cache_respostas import CacheRespostas  # noqa: E402
+
+
+class _ServidorStub(BaseHTTPRequestHandler):
+    """
+    Imita /v1/chat/completions: responde com o último conteúdo do usuário, após `atraso` segundos.
+    Com `erro` (código HTTP), responde só com o erro.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        corpo = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.requisicoes.append({'corpo': corpo, 'porta_cliente': self.client_address[1]})
+        time.sleep(self.server.atraso)
+        if getattr(self.server, "erro", None):
+            self.send_response(self.server.erro)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        resposta = json.dumps({
+            "choices": [{"message": {"content": f"eco: {corpo['messages'][-1]['content'][-20:]}"}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5}
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(resposta)))
+        self.end_headers()
+        self.wfile.write(resposta)
+
+    def log_message(self, *args):
+        pass
+
+
+class TesteClienteConcorrente(unittest.TestCase):
+    def setUp(self):
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), _ServidorStub)
+        self.servidor.daemon_threads = True
+        self.servidor.atraso = 0.3
+        self.servidor.requisicoes = []
+        self.servidor.lock = threading.Lock()
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.servidor.server_address[1]}/v1"
+
+    def tearDown(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+    def _cliente(self, max_concorrencia=4):
+        cliente = DeepSeekAPIClient("sk-teste", max_concorrencia=max_concorrencia)
+        cliente.base_url = self.base_url
+        return cliente
+
+    def test_chamadas_em_paralelo_preservam_a_ordem(self):
+        mensagens = [[{"role": "user", "content": f"prompt numero {i}"}] for i in range(4)]
+        with self._cliente() as cliente:
+            inicio = time.perf_counter()
+            respostas = cliente.chat_completion_concorrente(mensagens, rotulos=[f"t{i}" for i in range(4)])
+            duracao = time.perf_counter() - inicio
+        self.assertEqual(respostas, [f"eco: prompt numero {i}" for i in range(4)])
+        # Em série seriam 4 x 0,3 s
+        self.assertLess(duracao, 0.9)
+        self.assertEqual([m['rotulo'] for m in sorted(cliente.metricas, key=lambda m: m['rotulo'])],
+                         ["t0", "t1", "t2", "t3"])
+        self.assertTrue(all(m['tokens_prompt'] == 10 for m in cliente.metricas))
+
+    def test_sessao_reaproveita_a_conexao(self):
+        self.servidor.atraso = 0.0
+        with self._cliente() as cliente:
+            for i in range(5):
+                cliente.chat_completion([{"role": "user", "content": f"p{i}"}])
+        portas = {r['porta_cliente'] for r in self.servidor.requisicoes}
+        self.assertEqual(len(self.servidor.requisicoes), 5)
+        self.assertEqual(len(portas), 1)
+
+    def test_estrategias_de_varios_targets_em_paralelo(self):
+        with self._cliente() as cliente:
+            estrategista = SeniorEstrategista(cliente)
+            analise = {'analista': "Analisador", 'timestamp': "2025-01-01T00:00:00",
+                       'analise_completa': "churn: ...\n\nfaturamento: ...",
+                       'analise_por_target': {'churn': "análise de churn", 'faturamento': "análise de faturamento"}}
+            inicio = time.perf_counter()
+            resultado = estrategista.criar_estrategia(analise)
+            duracao = time.perf_counter() - inicio
+        self.assertLess(duracao, 0.55)
+        self.assertIn("=== ESTRATÉGIA DO TARGET: churn ===", resultado['estrategia_completa'])
+        self.assertIn("=== ESTRATÉGIA DO TARGET: faturamento ===", resultado['estrategia_completa'])
+        prompts = [r['corpo']['messages'][-1]['content'] for r in self.servidor.requisicoes]
+        self.assertEqual(sum("análise de churn" in p for p in prompts), 1)
+        self.assertEqual(sum("análise de faturamento" in p for p in prompts), 1)
+
+
+def _evento(delta=None, usage=None):
+    evento = {"choices": [{"delta": delta}] if delta else []}
+    if usage:
+        evento["usage"] = usage
+    return f"data: {json.dumps(evento)}\n\n"
+
+
+class _ServidorSSE(BaseHTTPRequestHandler):
+    """
+    Imita o streaming (SSE) de /v1/chat/completions em chunked encoding. Com `cair_na_primeira`,
+    a primeira resposta é cortada no meio (a conexão cai sem o chunk final nem [DONE]).
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        corpo = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.requisicoes.append(corpo)
+            numero = len(self.server.requisicoes)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        if self.server.cair_na_primeira and numero == 1:
+            self._chunk(_evento({"reasoning_content": "pensando"}))
+            self._chunk(_evento({"content": "Olá, "}))
+            self._chunk(_evento({"content": "mundo"}))
+            self.wfile.flush()
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        ultimo = corpo["messages"][-1]["content"]
+        trechos = [" continua."] if numero > 1 and self.server.cair_na_primeira else ["eco: ", ultimo[-12:]]
+        for trecho in trechos:
+            self._chunk(_evento({"content": trecho}))
+        self._chunk(_evento(usage={"prompt_tokens": 7, "completion_tokens": 3}))
+        self._chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, texto):
+        dados = texto.encode()
+        self.wfile.write(f"{len(dados):x}\r\n".encode() + dados + b"\r\n")
+
+    def log_message(self, *args):
+        pass
+
+
+class TesteStreaming(unittest.TestCase):
+    def setUp(self):
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), _ServidorSSE)
+        self.servidor.daemon_threads = True
+        self.servidor.requisicoes = []
+        self.servidor.lock = threading.Lock()
+        self.servidor.cair_na_primeira = False
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.cliente = DeepSeekAPIClient("sk-teste", stream=True)
+        self.cliente.base_url = f"http://127.0.0.1:{self.servidor.server_address[1]}/v1"
+
+    def tearDown(self):
+        self.cliente.fechar()
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+    def test_queda_no_meio_do_stream_pede_so_a_continuacao(self):
+        self.servidor.cair_na_primeira = True
+        recebidos = []
+        mensagens = [{"role": "user", "content": "analise os dados"}]
+        with mock.patch("analise_profunda.time.sleep") as espera:
+            resposta = self.cliente.chat_completion(mensagens, ao_receber=lambda t, r: recebidos.append((t, r)))
+        self.assertEqual(resposta, "Olá, mundo continua.")
+        self.assertEqual(recebidos, [("pensando", True), ("Olá, ", False), ("mundo", False), (" continua.", False)])
+        espera.assert_called_once_with(1)
+        self.assertEqual(len(self.servidor.requisicoes), 2)
+        # A nova tentativa reenvia o texto parcial como resposta do assistente e pede só a continuação
+        retomada = self.servidor.requisicoes[1]["messages"]
+        self.assertEqual(retomada[:1], mensagens)
+        self.assertEqual(retomada[1], {"role": "assistant", "content": "Olá, mundo"})
+        self.assertIn("Continue exatamente de onde parou", retomada[2]["content"])
+        self.assertTrue(self.servidor.requisicoes[1]["stream"])
+        self.assertEqual(self.cliente.metricas[-1]["origem"], "api")
+        self.assertEqual(self.cliente.metricas[-1]["tokens_resposta"], 3)
+
+    def test_chamadas_concorrentes_repassam_trechos_com_o_rotulo(self):
+        recebidos = []
+        lock = threading.Lock()
+
+        def ao_receber(texto, eh_raciocinio, rotulo):
+            with lock:
+                recebidos.append((rotulo, texto))
+
+        respostas = self.cliente.chat_completion_concorrente(
+            [[{"role": "user", "content": f"alvo {alvo}"}] for alvo in ("churn", "ticket")],
+            rotulos=["Analisador (churn)", "Analisador (ticket)"], ao_receber=ao_receber)
+        self.assertEqual(respostas, ["eco: alvo churn", "eco: alvo ticket"])
+        for rotulo, resposta in zip(["Analisador (churn)", "Analisador (ticket)"], respostas):
+            self.assertEqual("".join(t for r, t in recebidos if r == rotulo), resposta)
+
+    def test_exibicao_ao_vivo_com_um_painel_por_chamada(self):
+        analise = AnaliseProfunda("sk-teste", stream=True)
+        analise.console = Console(quiet=True)
+        analise.api_client.base_url = self.cliente.base_url
+        renderizados = []
+        with mock.patch("analise_profunda.Live.update", autospec=True,
+                        side_effect=lambda live, renderizavel, **kw: renderizados.append(renderizavel)):
+            with analise.api_client, analise._exibir_stream("Analisador de Insights") as ao_receber:
+                respostas = analise.api_client.chat_completion_concorrente(
+                    [[{"role": "user", "content": "alvo churn"}], [{"role": "user", "content": "alvo ticket"}]],
+                    rotulos=["Analisador (churn)", "Analisador (ticket)"], ao_receber=ao_receber)
+        self.assertEqual(respostas, ["eco: alvo churn", "eco: alvo ticket"])
+        titulos = [painel.title for painel in renderizados[-1].renderables]
+        self.assertEqual(sorted(titulos), ["[bold cyan]Analisador (churn)[/bold cyan]",
+                                           "[bold cyan]Analisador (ticket)[/bold cyan]"])
+
+
+class TesteCacheRespostas(unittest.TestCase):
+    def setUp(self):
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), _ServidorStub)
+        self.servidor.daemon_threads = True
+        self.servidor.atraso = 0.0
+        self.servidor.requisicoes = []
+        self.servidor.lock = threading.Lock()
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.temporario = tempfile.TemporaryDirectory()
+        self.cache = CacheRespostas(self.temporario.name, ttl_segundos=3600)
+        self.mensagens = [{"role": "system", "content": "analista"}, {"role": "user", "content": "analise churn"}]
+
+    def tearDown(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+        self.temporario.cleanup()
+
+    def _cliente(self, offline=False):
+        cliente = DeepSeekAPIClient("sk-teste", cache=self.cache, offline=offline)
+        cliente.base_url = f"http://127.0.0.1:{self.servidor.server_address[1]}/v1"
+        return cliente
+
+    def test_falha_e_depois_acerto_sem_nova_chamada(self):
+        with self._cliente() as cliente:
+            primeira = cliente.chat_completion(self.mensagens)
+            segunda = cliente.chat_completion(self.mensagens)
+        self.assertEqual(primeira, segunda)
+        self.assertEqual(len(self.servidor.requisicoes), 1)
+        self.assertEqual([m['origem'] for m in cliente.metricas], ["api", "cache"])
+        self.assertEqual((self.cache.acertos, self.cache.falhas), (1, 1))
+
+    def test_chave_estavel(self):
+        chave = CacheRespostas.gerar_chave("deepseek-chat", self.mensagens, 0.7)
+        reordenadas = [{"content": m["content"], "role": m["role"]} for m in self.mensagens]
+        self.assertEqual(chave, CacheRespostas.gerar_chave("deepseek-chat", reordenadas, 0.7))
+        self.assertNotEqual(chave, CacheRespostas.gerar_chave("deepseek-reasoner", self.mensagens, 0.7))
+        self.assertNotEqual(chave, CacheRespostas.gerar_chave("deepseek-chat", self.mensagens, 0.2))
+        self.assertNotEqual(chave, CacheRespostas.gerar_chave("deepseek-chat", self.mensagens[1:], 0.7))
+
+    def test_entrada_expirada_volta_a_chamar_a_api(self):
+        with self._cliente() as cliente:
+            cliente.chat_completion(self.mensagens)
+            with mock.patch("cache_respostas.time.time", return_value=time.time() + 7200):
+                cliente.chat_completion(self.mensagens)
+        self.assertEqual(len(self.servidor.requisicoes), 2)
+        self.assertEqual([m['origem'] for m in cliente.metricas], ["api", "api"])
+
+    def test_offline_usa_o_cache_e_depois_o_fallback(self):
+        with self._cliente() as cliente:
+            resposta_api = cliente.chat_completion(self.mensagens)
+        with self._cliente(offline=True) as offline:
+            self.assertEqual(offline.chat_completion(self.mensagens), resposta_api)
+            fallback = offline.chat_completion([{"role": "user", "content": "outra pergunta"}])
+        self.assertEqual(len(self.servidor.requisicoes), 1)
+        self.assertIn("API indisponível", fallback)
+        self.assertEqual([m['origem'] for m in offline.metricas], ["cache", "offline"])
+        self.assertEqual(len(os.listdir(self.temporario.name)), 1)
+
+    def test_fallback_por_erro_da_api_nao_vai_para_o_cache(self):
+        self.servidor.erro = 500
+        with self._cliente() as cliente, mock.patch("analise_profunda.time.sleep"):
+            resposta = cliente.chat_completion(self.mensagens)
+        self.assertIn("Erro na comunicação com a API", resposta)
+        self.assertEqual(cliente.metricas[-1]['origem'], "fallback")
+        self.assertEqual(os.listdir(self.temporario.name), [])
+
+    def test_excesso_remove_as_entradas_menos_usadas(self):
+        cache = CacheRespostas(self.temporario.name, tamanho_max_mb=2.5 / 1024)  # 2,5 KB
+        for i in range(3):
+            cache.gravar(f"chave{i}", "modelo", "x" * 1000)
+            os.utime(os.path.join(self.temporario.name, f"chave{i}.json"), (i, i))
+        self.assertIsNone(cache.obter("chave0"))
+        self.assertIsNotNone(cache.obter("chave2"))
+        tamanhos = [os.path.getsize(os.path.join(self.temporario.name, n)) for n in os.listdir(self.temporario.name)]
+        self.assertEqual(cache._total_bytes, sum(tamanhos))
+        self.assertLessEqual(cache._total_bytes, cache.tamanho_max_bytes)
+        cache.limpar()
+        self.assertEqual(cache._total_bytes, 0)
+
+
+class TesteEncerramento(unittest.TestCase):
+    def test_conexoes_fechadas_quando_a_analise_falha(self):
+        analise = AnaliseProfunda("offline", offline=True, stream=False)
+        analise.console = Console(quiet=True)
+        with mock.patch.object(analise.api_client, "fechar", wraps=analise.api_client.fechar) as fechar, \
+                mock.patch.object(analise, "selecionar_arquivos_interativo", side_effect=RuntimeError("falha")):
+            with self.assertRaises(RuntimeError):
+                analise.executar_analise()
+        fechar.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+"""
+Testes do gerador em escala: o motor precisa recuperar os drivers de churn plantados.
+Executar a partir da raiz do projeto: python -m unittest discover tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gerar_dados import gerar_dados_em_escala, verificar_sinais_plantados  # noqa: E402
+from motor import DiscoverySpark  # noqa: E402
+
+REGRAS = [
+    {'name': 'clientes', 'role': 'pai', 'keys': ['id_cliente'], 'fonte': None},
+    {'name': 'vendas', 'role': 'filho', 'keys': ['id_cliente'], 'fonte': None},
+]
+
+
+class TestSinaisPlantados(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temporario = tempfile.TemporaryDirectory()
+        cls.pasta = os.path.join(cls.temporario.name, 'datasets_escala')
+        with redirect_stdout(StringIO()):
+            cls.manifesto = gerar_dados_em_escala(n_clientes=4000, n_vendas=200_000, tamanho_chunk=50_000,
+                                                  n_workers=2, pasta=cls.pasta)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.temporario.cleanup()
+
+    def test_manifesto_gravado(self):
+        self.assertTrue(os.path.exists(os.path.join(self.pasta, 'sinais_plantados.json')))
+        self.assertEqual(self.manifesto['n_clientes'], 4000)
+        self.assertEqual(self.manifesto['n_vendas'], 200_000)
+
+    def test_motor_recupera_drivers_plantados(self):
+        motor = DiscoverySpark("sinais", mapeamento=REGRAS, pasta_datasets=self.pasta, janelas=())
+        resultado = motor.analisar("churn", orcamento_interacoes=0)
+        verificacao = verificar_sinais_plantados(resultado.ranking(), self.manifesto)
+        for sinal in verificacao:
+            with self.subTest(feature=sinal['feature']):
+                self.assertTrue(sinal['no_top'], f"{sinal['feature']} na posição {sinal['posicao']}")
+                self.assertTrue(sinal['direcao_ok'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Testes da matriz publicada em memória compartilhada: memória privada dos workers e limpeza do bloco.
+Executar a partir da raiz do projeto: python -m unittest discover tests
+"""
+import gc
+import os
+import sys
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from matriz_compartilhada import MatrizCompartilhada, anexar  # noqa: E402
+
+WORKERS = 2
+
+
+def _uss_mb():
+    return psutil.Process(os.getpid()).memory_full_info().uss / (1024 * 1024)
+
+
+def _worker_anexar(descritor):
+    """Crescimento do USS do worker ao anexar a matriz e tocar todas as páginas (soma das colunas)."""
+    antes = _uss_mb()
+    matriz, recurso = anexar(descritor)
+    try:
+        matriz.sum(axis=0)
+        return _uss_mb() - antes
+    finally:
+        del matriz
+        recurso.close()
+
+
+def _worker_copiar(descritor):
+    """Controle: a mesma leitura, mas com cópia privada da matriz no worker."""
+    antes = _uss_mb()
+    matriz, recurso = anexar(descritor)
+    try:
+        copia = np.array(matriz)
+        copia.sum(axis=0)
+        return _uss_mb() - antes
+    finally:
+        del matriz
+        recurso.close()
+
+
+def _bloco_existe(nome):
+    try:
+        shm = shared_memory.SharedMemory(name=nome)
+    except FileNotFoundError:
+        return False
+    shm.close()
+    return True
+
+
+def _matriz(linhas=100_000, colunas=100):
+    rng = np.random.default_rng(42)
+    return pd.DataFrame(rng.random((linhas, colunas)), columns=[f"f{i}" for i in range(colunas)])
+
+
+@unittest.skipIf(psutil is None, "psutil não disponível")
+class TestMemoriaWorkers(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.publicada = MatrizCompartilhada(_matriz())
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.publicada.fechar()
+
+    def _crescimento_por_worker(self, funcao):
+        with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+            return list(pool.map(funcao, [self.publicada.descritor] * WORKERS))
+
+    def test_workers_nao_copiam_a_matriz(self):
+        tamanho = self.publicada.tamanho_mb
+        for crescimento in self._crescimento_por_worker(_worker_anexar):
+            self.assertLess(crescimento, 0.1 * tamanho)
+
+    def test_controle_com_copia_cresce_o_tamanho_da_matriz(self):
+        # Garante que a medição enxerga uma cópia privada: sem isso o teste acima passaria por engano
+        tamanho = self.publicada.tamanho_mb
+        for crescimento in self._crescimento_por_worker(_worker_copiar):
+            self.assertGreater(crescimento, 0.8 * tamanho)
+
+
+class TestLimpeza(unittest.TestCase):
+    def test_fechar_remove_o_bloco(self):
+        publicada = MatrizCompartilhada(_matriz(1000, 10))
+        nome = publicada.descritor['nome']
+        self.assertTrue(_bloco_existe(nome))
+        publicada.fechar()
+        self.assertFalse(_bloco_existe(nome))
+        publicada.fechar()  # idempotente
+
+    def test_coleta_do_objeto_remove_o_bloco(self):
+        publicada = MatrizCompartilhada(_matriz(1000, 10))
+        nome = publicada.descritor['nome']
+        del publicada
+        gc.collect()
+        self.assertFalse(_bloco_existe(nome))
+
+    def test_modo_arquivo_remove_o_diretorio(self):
+        with MatrizCompartilhada(_matriz(1000, 10), modo="arquivo") as publicada:
+            diretorio = os.path.dirname(publicada.descritor['nome'])
+            self.assertTrue(os.path.exists(publicada.descritor['nome']))
+        self.assertFalse(os.path.exists(diretorio))
+
+
+if __name__ == "__main__":
+    unittest.main()